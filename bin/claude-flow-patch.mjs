@@ -48,6 +48,8 @@ Options for default (all patches) and check:
   --target <dir>                             Patch node_modules inside <dir>
   --include <regex>                          Only patches matching regex (against dir name)
   --exclude <regex>                          Skip patches matching regex (against dir name)
+  --jobs <n>                                 Patch up to <n> installs concurrently (default: CPU count)
+  --profile <file>                           Time every op; write a JSON report to <file>
 
   If neither --global nor --target is given, --global is assumed.
 
@@ -92,6 +94,8 @@ const includeRe = extractOpt(rawArgs, '--include');
 const excludeRe = extractOpt(rawArgs, '--exclude');
 const globalFlag = extractFlag(rawArgs, '--global');
 const targetDir = extractOpt(rawArgs, '--target');
+const jobs = extractOpt(rawArgs, '--jobs');
+const profileOut = extractOpt(rawArgs, '--profile');
 
 const [subcommand, ...args] = rawArgs;
 
@@ -113,7 +117,9 @@ function scopeArgs() {
 
 // No args → apply all patches (most common use case)
 if (!subcommand) {
-  run('bash', [resolve(rootDir, 'patch-all.sh'), ...scopeArgs()], { env: filterEnv() });
+  const jobArgs = jobs ? ['--jobs', jobs] : [];
+  const profileArgs = profileOut ? ['--profile', resolve(profileOut)] : [];
+  run('bash', [resolve(rootDir, 'patch-all.sh'), ...scopeArgs(), ...jobArgs, ...profileArgs], { env: filterEnv() });
 }
 
 if (subcommand === '--help' || subcommand === '-h') {
@@ -0,0 +1,372 @@
+#!/usr/bin/env node
+// lib/check-sentinels.mjs — Single-process sentinel + syntax checker for check-patches.sh
+// Loads every patch/*/sentinel once, reads each target file at most once per
+// install, and evaluates all grep/absent directives against the in-memory text.
+// Patched JS files are also syntax-checked in-process (lib/syntax-check.mjs).
+//
+// Results are cached per target file, keyed by inode/size/mtime/ctime and a
+// hash of the sentinel set. When nothing changed, the check finishes after a
+// round of stat() calls without reading any JS. Syntax verdicts are also
+// cached by content hash, so identical bytes are never parsed twice.
+//
+// Usage:
+//   printf '%s\n' "${INSTALLS[@]}" | node lib/check-sentinels.mjs
+//
+// stdin: discover.sh lines (dist_src \t version \t ruvector_cli \t ruv_swarm_root \t writable)
+// stdout: one "[PATCHES] FAIL: <patch dir> — <directive>" line per failed patch,
+//         "[PATCHES] SYNTAX ERROR: <file>" + node's message per unparsable file
+// exit:   0 if every sentinel and syntax check passes, 1 otherwise
+// env:    CFP_CACHE_DIR overrides the cache location (default ~/.cache/claude-flow-patch)
+
+import { createHash } from 'node:crypto';
+import {
+  readdirSync, readFileSync, writeFileSync, existsSync, statSync, mkdirSync, renameSync,
+} from 'node:fs';
+import { homedir } from 'node:os';
+import { resolve, dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { parseSentinels } from './discover.mjs';
+import { checkSyntax } from './syntax-check.mjs';
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const PATCH_DIR = resolve(__dirname, '..', 'patch');
+const CACHE_VERSION = 2;
+const SYNTAX_OK_MAX = 1000;  // content hashes kept in the syntax-OK cache
+
+// Patched JS files validated with `node --check`: [package, path]
+// (package null = @claude-flow/cli, path relative to dist/src)
+export const SYNTAX_FILES = [
+  // @claude-flow/cli
+  [null, 'commands/config.js'],
+  [null, 'commands/start.js'],
+  [null, 'commands/init.js'],
+  [null, 'commands/doctor.js'],
+  [null, 'commands/status.js'],
+  [null, 'commands/swarm.js'],
+  [null, 'commands/daemon.js'],
+  [null, 'commands/hooks.js'],
+  [null, 'commands/memory.js'],
+  [null, 'commands/neural.js'],
+  [null, 'memory/memory-initializer.js'],
+  [null, 'memory/intelligence.js'],
+  [null, 'init/executor.js'],
+  [null, 'init/helpers-generator.js'],
+  [null, 'init/settings-generator.js'],
+  [null, 'init/types.js'],
+  [null, 'init/claudemd-generator.js'],
+  [null, 'mcp-tools/hooks-tools.js'],
+  [null, 'mcp-tools/memory-tools.js'],
+  [null, 'mcp-tools/embeddings-tools.js'],
+  [null, 'services/worker-daemon.js'],
+  [null, 'services/headless-worker-executor.js'],
+  [null, 'index.js'],
+  // @claude-flow/memory (WM-008)
+  ['@claude-flow/memory', 'dist/agentdb-backend.js'],
+  // @claude-flow/memory (WM-020)
+  ['@claude-flow/memory', 'dist/hybrid-backend.js'],
+  // @claude-flow/neural (WM-008)
+  ['@claude-flow/neural', 'dist/reasoning-bank.js'],
+  // @claude-flow/shared (WM-008)
+  ['@claude-flow/shared', 'dist/core/config/defaults.js'],
+];
+
+// POSIX bracket classes → JS class bodies
+const POSIX_CLASSES = {
+  alnum: 'A-Za-z0-9', alpha: 'A-Za-z', blank: ' \\t', cntrl: '\\x00-\\x1f\\x7f',
+  digit: '0-9', graph: '!-~', lower: 'a-z', print: ' -~',
+  punct: '!-\\/:-@\\[-`{-~', space: ' \\t\\n\\r\\f\\v', upper: 'A-Z', xdigit: '0-9A-Fa-f',
+};
+
+/**
+ * Translate a GNU grep basic regular expression (what `grep -q "$pattern"`
+ * evaluates in check-patches.sh) into an equivalent multiline JS RegExp.
+ */
+export function breToRegExp(pattern) {
+  let out = '';
+  let atStart = true;  // position where `*` is literal and `^` is an anchor
+  for (let i = 0; i < pattern.length; i++) {
+    const c = pattern[i];
+    if (c === '\\' && i + 1 < pattern.length) {
+      const n = pattern[++i];
+      if ('(){}|+?'.includes(n)) {
+        out += n;  // GNU BRE extensions: \( \) \{ \} \| \+ \?
+        atStart = n === '(' || n === '|';
+        continue;
+      }
+      if ('<>'.includes(n)) out += '\\b';
+      else if (n === '`') out += '(?<![\\s\\S])';  // GNU: start of buffer
+      else if (n === "'") out += '(?![\\s\\S])';   // GNU: end of buffer
+      else if ('wWsSbB'.includes(n) || /[1-9]/.test(n)) out += '\\' + n;
+      else out += n.replace(/[.*+?^${}()|[\]\\/]/g, '\\$&');
+    } else if (c === '[') {
+      let j = i + 1;
+      let body = '';
+      if (pattern[j] === '^') { body += '^'; j++; }
+      if (pattern[j] === ']') { body += '\\]'; j++; }
+      while (j < pattern.length && pattern[j] !== ']') {
+        const cls = pattern.slice(j).match(/^\[:([a-z]+):\]/);
+        if (cls && POSIX_CLASSES[cls[1]]) {
+          body += POSIX_CLASSES[cls[1]];
+          j += cls[0].length;
+          continue;
+        }
+        body += '\\[]'.includes(pattern[j]) ? '\\' + pattern[j] : pattern[j];
+        j++;
+      }
+      if (j >= pattern.length) {
+        out += '\\[';  // unterminated bracket: literal
+      } else {
+        out += `[${body}]`;
+        i = j;
+      }
+    } else if (c === '*') {
+      out += atStart ? '\\*' : '*';
+    } else if (c === '^') {
+      out += atStart ? '^' : '\\^';
+    } else if (c === '$') {
+      const end = i === pattern.length - 1 || pattern.startsWith('\\)', i + 1) || pattern.startsWith('\\|', i + 1);
+      out += end ? '$' : '\\$';
+    } else if (c === '.') {
+      out += '.';
+    } else {
+      out += c.replace(/[+?{}()|\]\\/]/g, '\\$&');
+    }
+    atStart = c === '^' && atStart;
+  }
+  return new RegExp(out, 'm');
+}
+
+/**
+ * Load every sentinel file once, honouring PATCH_INCLUDE / PATCH_EXCLUDE.
+ * The returned array carries a `hash` of the selected sentinel set (texts,
+ * directory names and filters) used to key the result cache.
+ */
+export function loadSentinels(env = process.env) {
+  const include = env.PATCH_INCLUDE ? new RegExp(env.PATCH_INCLUDE) : null;
+  const exclude = env.PATCH_EXCLUDE ? new RegExp(env.PATCH_EXCLUDE) : null;
+  let dirs;
+  try {
+    dirs = readdirSync(PATCH_DIR, { withFileTypes: true })
+      .filter(d => d.isDirectory())
+      .map(d => d.name)
+      .sort();
+  } catch { dirs = []; }
+
+  const patches = [];
+  const hash = createHash('sha256');
+  hash.update(`v${CACHE_VERSION} include=${env.PATCH_INCLUDE || ''} exclude=${env.PATCH_EXCLUDE || ''}\n`);
+  for (const dir of dirs) {
+    const sentinelPath = resolve(PATCH_DIR, dir, 'sentinel');
+    if (!existsSync(sentinelPath)) continue;
+    const matchName = dir.replace(/^\d{3}-/, '');
+    if (include && !include.test(matchName)) continue;
+    if (exclude && exclude.test(matchName)) continue;
+    hash.update(`${dir}\n${readFileSync(sentinelPath, 'utf-8')}\n`);
+    const { sentinels } = parseSentinels(sentinelPath);
+    patches.push({
+      dir,
+      checks: sentinels
+        .filter(s => s.type === 'grep' || s.type === 'absent')
+        .map(s => ({ ...s, re: breToRegExp(s.pattern) })),
+    });
+  }
+  patches.hash = hash.digest('hex');
+  return patches;
+}
+
+/** Parse one discover.sh output line. */
+export function parseInstall(line) {
+  const [distSrc, version, rvCli, rsRoot, writable] = line.split('\t');
+  return {
+    distSrc,
+    version,
+    rvCli: rvCli === '-' ? '' : (rvCli || ''),
+    rsRoot: rsRoot === '-' ? '' : (rsRoot || ''),
+    writable,
+  };
+}
+
+/** Map a sentinel's package context + relative path to an absolute path. */
+function resolveTarget(install, pkg, relpath) {
+  switch (pkg) {
+    case 'ruvector':
+      return install.rvCli ? resolve(dirname(install.rvCli), '..', relpath) : null;
+    case 'ruv-swarm':
+      return install.rsRoot ? resolve(install.rsRoot, relpath) : null;
+    default:
+      if (pkg && pkg.startsWith('@claude-flow/')) {
+        // distSrc is <nm>/@claude-flow/cli/dist/src → <nm>/@claude-flow/<pkg>
+        return resolve(install.distSrc, '..', '..', '..', '..', pkg, relpath);
+      }
+      return resolve(install.distSrc, relpath);
+  }
+}
+
+/** Cheap change detector: identity + size + timestamps, or null if missing. */
+function statKey(path) {
+  try {
+    const st = statSync(path, { bigint: true });
+    return `${st.dev}:${st.ino}:${st.size}:${st.mtimeNs}:${st.ctimeNs}`;
+  } catch {
+    return null;
+  }
+}
+
+/**
+ * Evaluate every sentinel against one install and collect its changed syntax
+ * files. Work is grouped by target file so each file is stat'ed once and read
+ * at most once. A missing file passes (package not installed / layout without
+ * that file), matching the shell checker.
+ *
+ * opts.cache: { [path]: statKey } of files that fully passed last time; files
+ *   whose key still matches are skipped without being read. Passing files
+ *   without a syntax check are written back into opts.cache here; syntax
+ *   files are returned in `pending` for checkInstalls() to finish.
+ * opts.syntaxOnly: skip sentinel evaluation (an earlier install already failed).
+ *
+ * Returns { results: [{ dir, ok, failed: [directive, ...] }],
+ *           pending: [{ path, key, text, pass }], checked: <files read> }.
+ */
+export function checkInstall(install, patches, opts = {}) {
+  const cache = opts.cache || {};
+  const groups = new Map();  // path -> { checks: [{ dir, check }], syntax }
+  const group = (path) => {
+    if (!groups.has(path)) groups.set(path, { checks: [], syntax: false });
+    return groups.get(path);
+  };
+
+  if (!opts.syntaxOnly) {
+    for (const { dir, checks } of patches) {
+      for (const check of checks) {
+        const path = resolveTarget(install, check.package, check.file);
+        if (path) group(path).checks.push({ dir, check });
+      }
+    }
+  }
+  for (const [pkg, relpath] of SYNTAX_FILES) {
+    group(resolveTarget(install, pkg, relpath)).syntax = true;
+  }
+
+  const failedByDir = new Map();
+  const pending = [];
+  let checked = 0;
+
+  for (const [path, { checks, syntax }] of groups) {
+    const key = statKey(path);
+    if (key === null) continue;
+    if (cache[path] === key) continue;
+    delete cache[path];
+
+    let text;
+    try { text = readFileSync(path, 'utf-8'); } catch { continue; }
+    checked++;
+
+    let pass = true;
+    for (const { dir, check } of checks) {
+      const found = check.re.test(text);
+      if ((check.type === 'grep' && !found) || (check.type === 'absent' && found)) {
+        if (!failedByDir.has(dir)) failedByDir.set(dir, []);
+        failedByDir.get(dir).push(`${check.type} "${check.pattern}" ${check.file}`);
+        pass = false;
+      }
+    }
+    // A syntaxOnly pass says nothing about sentinels, so it is never recorded.
+    if (syntax) pending.push({ path, key, text, pass: pass && !opts.syntaxOnly });
+    else if (pass && !opts.syntaxOnly) cache[path] = key;
+  }
+
+  const results = patches.map(({ dir }) => {
+    const failed = failedByDir.get(dir) || [];
+    return { dir, ok: failed.length === 0, failed };
+  });
+  return { results, pending, checked };
+}
+
+/**
+ * Check every install: sentinels per install (stopping sentinel evaluation
+ * after the first failing install — one failure is enough to trigger
+ * reapply), then one pooled syntax pass over the changed JS files of all
+ * installs. Updates `data` (see loadCache) in place.
+ *
+ * Returns { ok, failures: [{ install, dir, failed }], syntaxErrors: [{ file, message }],
+ *           checked: <files read>, parsed: <files compiled> }.
+ */
+export async function checkInstalls(installs, patches, data, opts = {}) {
+  const failures = [];
+  const pending = [];
+  let checked = 0;
+  let sentinelsFailed = false;
+
+  for (const install of installs) {
+    const cache = data.installs[install.distSrc] || (data.installs[install.distSrc] = {});
+    const r = checkInstall(install, patches, { cache, syntaxOnly: sentinelsFailed });
+    checked += r.checked;
+    for (const { dir, ok, failed } of r.results) {
+      if (!ok) failures.push({ install, dir, failed });
+    }
+    if (r.results.some(x => !x.ok)) sentinelsFailed = true;
+    for (const item of r.pending) pending.push({ ...item, cache });
+  }
+
+  const okHashes = new Set(data.syntaxOk);
+  const { errors: syntaxErrors, parsed } = await checkSyntax(pending, { okHashes, jobs: opts.jobs });
+  const bad = new Set(syntaxErrors.map(e => e.file));
+  for (const { path, key, pass, cache } of pending) {
+    if (pass && !bad.has(path)) cache[path] = key;
+  }
+  data.syntaxOk = [...okHashes].slice(-SYNTAX_OK_MAX);
+
+  return { ok: !sentinelsFailed && syntaxErrors.length === 0, failures, syntaxErrors, checked, parsed };
+}
+
+// ── Result cache ──
+// { version, sentinels: <hash>, installs: { <dist_src>: { <path>: <statKey> } },
+//   syntaxOk: [<content hash>, ...] }
+// A sentinel-set change resets `installs`; syntax verdicts survive it.
+
+export function cachePath(env = process.env) {
+  const dir = env.CFP_CACHE_DIR
+    || join(env.XDG_CACHE_HOME || join(homedir(), '.cache'), 'claude-flow-patch');
+  return join(dir, 'check-cache.json');
+}
+
+export function loadCache(file, sentinelHash) {
+  const fresh = { version: CACHE_VERSION, sentinels: sentinelHash, installs: {}, syntaxOk: [] };
+  try {
+    const data = JSON.parse(readFileSync(file, 'utf-8'));
+    if (data.version !== CACHE_VERSION) return fresh;
+    if (Array.isArray(data.syntaxOk)) fresh.syntaxOk = data.syntaxOk;
+    if (data.sentinels === sentinelHash && data.installs) fresh.installs = data.installs;
+  } catch { /* missing or corrupt → start fresh */ }
+  return fresh;
+}
+
+export function saveCache(file, data) {
+  try {
+    mkdirSync(dirname(file), { recursive: true });
+    const tmp = `${file}.${process.pid}.tmp`;
+    writeFileSync(tmp, JSON.stringify(data));
+    renameSync(tmp, file);
+  } catch { /* cache is an optimisation only */ }
+}
+
+// CLI: read installs from stdin, report failures, exit 0/1
+const thisFile = resolve(__dirname, 'check-sentinels.mjs');
+if (process.argv[1] && resolve(process.argv[1]) === thisFile) {
+  const installs = readFileSync(0, 'utf-8').split('\n').filter(Boolean).map(parseInstall);
+  const patches = loadSentinels();
+  const file = cachePath();
+  const data = loadCache(file, patches.hash);
+  const { ok, failures, syntaxErrors } = await checkInstalls(installs, patches, data);
+
+  for (const { dir, failed } of failures) {
+    console.log(`[PATCHES] FAIL: ${dir} — ${failed[0]}`);
+  }
+  for (const { file: js, message } of syntaxErrors) {
+    console.log(`[PATCHES] SYNTAX ERROR: ${js}`);
+    process.stdout.write(message.endsWith('\n') ? message : `${message}\n`);
+  }
+
+  saveCache(file, data);
+  process.exit(ok ? 0 : 1);
+}
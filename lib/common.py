@@ -1,7 +1,8 @@
 # common.py — shared patch infrastructure
 # Extracted from apply-patches.sh. Provides patch()/patch_all() + path variables.
+# Target files are buffered in memory: each is read once and written once.
 
-import sys, os, re
+import sys, os, re, atexit, json, hashlib, time
 
 base = os.environ.get("BASE", "")
 if not base or base == "/dev/null":
@@ -13,27 +14,148 @@ memory = base + "/memory" if base else ""
 applied = 0
 skipped = 0
 
+# ── In-memory file buffer ──
+# Every target file is read once on first use, all ops for it are applied to
+# the in-memory copy in order, and each modified file is written once by
+# flush() (registered with atexit so standalone runs still persist).
+_buf_files = {}  # filepath -> current contents, or None if the file is missing
+_buf_dirty = {}  # filepath -> True, insertion-ordered set of modified files
+_buf_clean = set()   # files whose hash matches the manifest (ops skip them)
+_buf_failed = set()  # files with an ERROR op or failed write (never recorded)
+_buf_warns = {}      # filepath -> {label: message} of ops whose pattern was not found
+
+def _buf_load(filepath):
+    if filepath not in _buf_files:
+        try:
+            with open(filepath, 'r') as f:
+                _buf_files[filepath] = f.read()
+        except FileNotFoundError:
+            _buf_files[filepath] = None
+    return _buf_files[filepath]
+
+def read_file(filepath):
+    """Return the buffered contents of filepath (raises FileNotFoundError)."""
+    code = _buf_load(filepath)
+    if code is None:
+        raise FileNotFoundError(2, "No such file or directory", filepath)
+    return code
+
+def write_file(filepath, code):
+    """Replace the buffered contents of filepath; written to disk by flush()."""
+    _buf_files[filepath] = code
+    _buf_dirty[filepath] = True
+
+def _sha256(code):
+    return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+# ── Patch manifest ──
+# patch-all.sh exports CFP_PATCH_SET (a hash of common.py + the selected
+# fix.py files). After a run, every target file is recorded with its content
+# hash in <cli>/dist/.cfp-manifest.json, together with the ops against it whose
+# pattern was not found. On the next run with the same patch set, files whose
+# hash still matches are marked clean: each op against them is counted as
+# already present, or prints its recorded WARN again, without searching. Only
+# drifted or new files are re-patched. Files with an ERROR are not recorded.
+patch_set = os.environ.get("CFP_PATCH_SET", "")
+_manifest_path = os.path.join(os.path.dirname(base), ".cfp-manifest.json") if base and patch_set else ""
+_manifest_saved = False
+_manifest_warns = {}  # filepath -> {label: message} recorded for clean files
+
+def _manifest_load():
+    try:
+        with open(_manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return
+    if manifest.get("patchSet") != patch_set:
+        return
+    files = manifest.get("files", {})
+    warns = manifest.get("warnings", {})
+    unchanged = 0
+    for filepath, digest in files.items():
+        try:
+            code = read_file(filepath)
+        except OSError:
+            continue
+        if _sha256(code) == digest:
+            _buf_clean.add(filepath)
+            _manifest_warns[filepath] = warns.get(filepath, {})
+            unchanged += 1
+    print(f"  Manifest: {unchanged}/{len(files)} file(s) unchanged since last run")
+
+def _manifest_save():
+    global _manifest_saved
+    if not _manifest_path or _manifest_saved:
+        return
+    _manifest_saved = True
+    files = {}
+    warns = {}
+    for filepath, code in _buf_files.items():
+        if code is not None and filepath not in _buf_failed and filepath not in _buf_dirty:
+            files[filepath] = _sha256(code)
+            if filepath in _buf_warns:
+                warns[filepath] = _buf_warns[filepath]
+    tmp = _manifest_path + ".tmp"
+    try:
+        with open(tmp, 'w') as f:
+            json.dump({"patchSet": patch_set, "files": files, "warnings": warns}, f, indent=2, sort_keys=True)
+        os.replace(tmp, _manifest_path)
+    except OSError:
+        pass  # Manifest is an optimisation only; read-only installs just re-check
+
+def _buf_store(filepath):
+    with open(filepath, 'w') as f:
+        f.write(_buf_files[filepath])
+
+def flush():
+    """Write every modified file back to disk, once per file, then record the manifest."""
+    for filepath in list(_buf_dirty):
+        try:
+            _buf_store(filepath)
+            del _buf_dirty[filepath]
+        except Exception as e:
+            del _buf_dirty[filepath]
+            _buf_failed.add(filepath)
+            print(f"  ERROR: write {filepath} — {e}")
+    _manifest_save()
+
+atexit.register(flush)
+
+def _warn(label, filepath, message):
+    _buf_warns.setdefault(filepath, {})[label] = message
+    print(f"  WARN: {label} — {message}")
+
+def _clean_op(label, filepath):
+    """Op against a file unchanged since the manifest: replay its WARN or count it present."""
+    global skipped
+    message = _manifest_warns.get(filepath, {}).get(label)
+    if message is None:
+        skipped += 1
+    else:
+        _warn(label, filepath, message)
+
 def patch(label, filepath, old, new):
     global applied, skipped
     if not filepath:
         return  # Skip if path is empty (package not found)
     try:
-        with open(filepath, 'r') as f:
-            code = f.read()
+        if filepath in _buf_clean:
+            _clean_op(label, filepath)
+            return
+        code = _buf_load(filepath)
+        if code is None:
+            return  # Silently skip if file doesn't exist (package not installed)
         if new in code:
             skipped += 1
             return
         if old not in code:
-            print(f"  WARN: {label} — pattern not found (code may have changed)")
+            _warn(label, filepath, "pattern not found (code may have changed)")
             return
-        code = code.replace(old, new, 1)
-        with open(filepath, 'w') as f:
-            f.write(code)
+        write_file(filepath, code.replace(old, new, 1))
         print(f"  Applied: {label}")
         applied += 1
-    except FileNotFoundError:
-        pass  # Silently skip if file doesn't exist (package not installed)
     except Exception as e:
+        _buf_failed.add(filepath)
         print(f"  ERROR: {label} — {e}")
 
 def patch_all(label, filepath, old, new):
@@ -42,24 +164,234 @@ def patch_all(label, filepath, old, new):
     if not filepath:
         return  # Skip if path is empty (package not found)
     try:
-        with open(filepath, 'r') as f:
-            code = f.read()
+        if filepath in _buf_clean:
+            _clean_op(label, filepath)
+            return
+        code = _buf_load(filepath)
+        if code is None:
+            return  # Silently skip if file doesn't exist (package not installed)
         if new in code and old not in code:
             skipped += 1
             return
         if old not in code:
-            print(f"  WARN: {label} — pattern not found")
+            _warn(label, filepath, "pattern not found")
             return
-        code = code.replace(old, new)
-        with open(filepath, 'w') as f:
-            f.write(code)
+        write_file(filepath, code.replace(old, new))
         print(f"  Applied: {label}")
         applied += 1
-    except FileNotFoundError:
-        pass  # Silently skip if file doesn't exist (package not installed)
     except Exception as e:
+        _buf_failed.add(filepath)
         print(f"  ERROR: {label} — {e}")
 
+# ── `memory` subcommand extensions (commands/memory.js) ──
+# Ops that add flags to a `memory` subcommand, wrap its action or add a new
+# subcommand each append one block, guarded by its marker comment, that calls
+# _extendMemorySubcommand(). The JS helper is appended once, by whichever of
+# those ops runs first. `after` hooks run once the action and every `wrap` have
+# returned, so the order the ops are applied in does not change the output.
+_MEMORY_SUBCOMMAND_MARKER = "// _extendMemorySubcommand: shared by the `memory` subcommand ops"
+_MEMORY_SUBCOMMAND_HELPER = _MEMORY_SUBCOMMAND_MARKER + """
+// ext.options: flags added to the subcommand unless it already declares them
+// ext.action:  action of a subcommand added (with ext.description) when there is none
+// ext.wrap:    (ctx, inner) => result -- replaces the action, inner is the previous one
+// ext.after:   (ctx, result) => result -- extra output; errors leave the result as it is
+function _extendMemorySubcommand(name, ext = {}) {
+    if (typeof memoryCommand === 'undefined' || !Array.isArray(memoryCommand.subcommands)) return null;
+    let cmd = memoryCommand.subcommands.find(c => c && c.name === name);
+    const added = !cmd;
+    if (added) {
+        if (typeof ext.action !== 'function') return null;
+        cmd = { name, description: ext.description || '', options: [], action: ext.action };
+        memoryCommand.subcommands.push(cmd);
+    }
+    if (!cmd._extensions && typeof cmd.action === 'function') {
+        const state = { action: cmd.action, after: [] };
+        cmd._extensions = state;
+        cmd.action = async (ctx) => {
+            let result = await state.action(ctx);
+            for (const after of state.after) {
+                try { result = (await after(ctx, result)) ?? result; } catch { /* result stands */ }
+            }
+            return result;
+        };
+    }
+    const state = cmd._extensions;
+    if (state && !added && typeof ext.wrap === 'function') {
+        const inner = state.action;
+        state.action = (ctx) => ext.wrap(ctx, inner);
+    }
+    if (state && typeof ext.after === 'function') state.after.push(ext.after);
+    if (ext.options) {
+        const known = new Set((cmd.options || []).map(o => o.name));
+        cmd.options = [...(cmd.options || []), ...ext.options.filter(o => !known.has(o.name))];
+    }
+    return cmd;
+}
+"""
+
+def extend_memory_command(label, marker, block):
+    """Append block (starting with marker) to commands/memory.js once, plus the
+    _extendMemorySubcommand() helper it calls if no earlier op appended it."""
+    global applied, skipped
+    if not CLI_MEMORY:
+        return
+    if CLI_MEMORY in _buf_clean:
+        skipped += 1
+        return
+    try:
+        code = read_file(CLI_MEMORY)
+    except FileNotFoundError:
+        print(f"  WARN: {label} — commands/memory.js not found")
+        return
+    if marker in code:
+        skipped += 1
+        return
+    code = code.rstrip("\n") + "\n"
+    if _MEMORY_SUBCOMMAND_MARKER not in code:
+        code += _MEMORY_SUBCOMMAND_HELPER
+    write_file(CLI_MEMORY, code + marker + block)
+    print(f"  Applied: {label}")
+    applied += 1
+
+# ── Profiler ──
+# `patch-all.sh --profile <file>` sets CFP_PROFILE to a per-install JSON path.
+# Every patch()/patch_all() call is timed (wall, file load, search = the rest),
+# file loads and flush writes are counted per target file, and patch-loader.py
+# calls _prof_enter(<patch dir>) before each fix.py so raw code between ops is
+# charged to its directory too. At exit the JSON is written and the slowest
+# dirs/files/ops are printed.
+_prof_path = os.environ.get("CFP_PROFILE", "")
+_prof_t0 = time.perf_counter()
+_prof_ops = []     # one dict per op, in execution order
+_prof_files = {}   # filepath -> {"readBytes", "readMs", "writtenBytes", "writeMs"}
+_prof_dirs = {}    # patch dir -> wall ms (including non-op code)
+_prof_cur = {"dir": "", "since": _prof_t0, "readMs": 0.0}
+try:
+    _prof_startup_ms = (time.time() - float(os.environ.get("CFP_PROFILE_T0", ""))) * 1000
+except ValueError:
+    _prof_startup_ms = None  # bash < 5 has no $EPOCHREALTIME
+
+def _prof_ms(since):
+    return (time.perf_counter() - since) * 1000
+
+def _prof_enter(dirname):
+    """Charge the time since the previous call to the previous patch dir."""
+    now = time.perf_counter()
+    prev = _prof_cur["dir"]
+    _prof_dirs[prev] = _prof_dirs.get(prev, 0.0) + (now - _prof_cur["since"]) * 1000
+    _prof_cur["dir"], _prof_cur["since"] = dirname, now
+
+def _prof_file(filepath):
+    return _prof_files.setdefault(filepath, {"readBytes": 0, "readMs": 0.0, "writtenBytes": 0, "writeMs": 0.0})
+
+def _prof_load(fn):
+    def load(filepath):
+        if filepath in _buf_files:
+            return fn(filepath)
+        t = time.perf_counter()
+        code = fn(filepath)
+        ms = _prof_ms(t)
+        stats = _prof_file(filepath)
+        stats["readMs"] += ms
+        stats["readBytes"] += len(code.encode('utf-8')) if code is not None else 0
+        _prof_cur["readMs"] += ms
+        return code
+    return load
+
+def _prof_store(fn):
+    def store(filepath):
+        t = time.perf_counter()
+        fn(filepath)
+        stats = _prof_file(filepath)
+        stats["writeMs"] += _prof_ms(t)
+        stats["writtenBytes"] += len(_buf_files[filepath].encode('utf-8'))
+    return store
+
+def _prof_op(fn):
+    def op(label, filepath, old, new):
+        n_applied, n_skipped, read_ms = applied, skipped, _prof_cur["readMs"]
+        t = time.perf_counter()
+        fn(label, filepath, old, new)
+        wall = _prof_ms(t)
+        load = _prof_cur["readMs"] - read_ms
+        if applied > n_applied:
+            status = "applied"
+        elif skipped > n_skipped:
+            status = "clean" if filepath in _buf_clean else "present"
+        elif not filepath or _buf_files.get(filepath) is None:
+            status = "missing"
+        else:
+            status = "warn"
+        _prof_ops.append({
+            "label": label, "dir": _prof_cur["dir"], "file": filepath, "fn": fn.__name__,
+            "status": status, "wallMs": wall, "loadMs": load, "searchMs": max(wall - load, 0.0),
+        })
+    return op
+
+def _prof_dir_row(dirname, wall=0.0):
+    return {"dir": dirname, "wallMs": wall, "ops": 0, "opMs": 0.0, "searchMs": 0.0, "applied": 0, "warn": 0}
+
+def _prof_rows(rows, key, limit=10):
+    return sorted(rows, key=lambda r: r[key], reverse=True)[:limit]
+
+def _prof_report():
+    _prof_enter("")
+    total = _prof_ms(_prof_t0)
+    dirs = {d: _prof_dir_row(d, wall) for d, wall in _prof_dirs.items()}
+    files = {}
+    for filepath, stats in _prof_files.items():
+        files[filepath] = dict(stats, file=filepath, ops=0, searchMs=0.0)
+    for o in _prof_ops:
+        d = dirs.setdefault(o["dir"], _prof_dir_row(o["dir"]))
+        d["ops"] += 1
+        d["opMs"] += o["wallMs"]
+        d["searchMs"] += o["searchMs"]
+        d["applied"] += o["status"] == "applied"
+        d["warn"] += o["status"] == "warn"
+        if o["file"]:
+            f = files.setdefault(o["file"], dict(_prof_file(o["file"]), file=o["file"], ops=0, searchMs=0.0))
+            f["ops"] += 1
+            f["searchMs"] += o["searchMs"]
+    for f in files.values():
+        f["totalMs"] = f["readMs"] + f["searchMs"] + f["writeMs"]
+    report = {
+        "base": base,
+        "patchSet": patch_set,
+        "startupMs": _prof_startup_ms,
+        "totalMs": total,
+        "ops": sorted(_prof_ops, key=lambda o: o["wallMs"], reverse=True),
+        "dirs": sorted(dirs.values(), key=lambda d: d["wallMs"], reverse=True),
+        "files": sorted(files.values(), key=lambda f: f["totalMs"], reverse=True),
+    }
+    try:
+        with open(_prof_path, 'w') as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        print(f"  WARN: profile not written — {e}")
+
+    startup = f", startup {_prof_startup_ms:.1f} ms" if _prof_startup_ms is not None else ""
+    print(f"  Profile: {len(_prof_ops)} ops, {sum(1 for d in dirs if d)} patch dirs, {len(files)} files — {total:.1f} ms{startup}")
+    print(f"  {'wall ms':>9} {'search ms':>9} {'ops':>4}  patch dir")
+    for d in _prof_rows(report["dirs"], "wallMs"):
+        print(f"  {d['wallMs']:9.2f} {d['searchMs']:9.2f} {d['ops']:4d}  {d['dir'] or '(outside patch dirs)'}")
+    print(f"  {'total ms':>9} {'read KB':>9} {'write KB':>9} {'ops':>4}  file")
+    for f in _prof_rows(report["files"], "totalMs"):
+        print(f"  {f['totalMs']:9.2f} {f['readBytes'] / 1024:9.1f} {f['writtenBytes'] / 1024:9.1f} {f['ops']:4d}  {os.path.relpath(f['file'], base) if base else f['file']}")
+    print(f"  {'wall ms':>9} {'search ms':>9} {'status':>8}  op")
+    for o in _prof_rows(report["ops"], "wallMs"):
+        print(f"  {o['wallMs']:9.2f} {o['searchMs']:9.2f} {o['status']:>8}  {o['label']}")
+
+if _prof_path:
+    patch = _prof_op(patch)
+    patch_all = _prof_op(patch_all)
+    _buf_load = _prof_load(_buf_load)
+    _buf_store = _prof_store(_buf_store)
+    # atexit is LIFO: registered after flush, so it runs before it — re-flush first
+    atexit.register(lambda: (flush(), _prof_report()))
+
+if _manifest_path:
+    _manifest_load()
+
 # ── Target file paths ──
 # These may be empty strings if base is not set (no claude-flow/cli found)
 HWE = services + "/headless-worker-executor.js" if services else ""
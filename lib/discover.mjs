@@ -67,8 +67,10 @@ function parseReadme(readmePath, dirName) {
  *   grep "<pattern>" <file>  — pass if pattern found
  *   absent "<pattern>" <file> — pass if pattern NOT found
  *   none                     — skip verification
+ * Each grep/absent entry carries the package context in effect on its line
+ * (null = @claude-flow/cli).
  */
-function parseSentinels(sentinelPath) {
+export function parseSentinels(sentinelPath) {
   const text = readFileSync(sentinelPath, 'utf-8');
   const lines = text.split('\n');
 
@@ -86,12 +88,12 @@ function parseSentinels(sentinelPath) {
     } else {
       const absentMatch = trimmed.match(/^absent\s+"(.+)"\s+(.+)$/);
       if (absentMatch) {
-        sentinels.push({ type: 'absent', pattern: absentMatch[1], file: absentMatch[2] });
+        sentinels.push({ type: 'absent', pattern: absentMatch[1], file: absentMatch[2], package: pkg });
         continue;
       }
       const grepMatch = trimmed.match(/^grep\s+"(.+)"\s+(.+)$/);
       if (grepMatch) {
-        sentinels.push({ type: 'grep', pattern: grepMatch[1], file: grepMatch[2] });
+        sentinels.push({ type: 'grep', pattern: grepMatch[1], file: grepMatch[2], package: pkg });
       }
     }
   }
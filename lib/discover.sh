@@ -96,57 +96,157 @@ _cfp_probe_node_modules() {
   done
 }
 
+# ── Discovery cache ──
+# Global discovery results are persisted in $CFP_CACHE_DIR/discover.tsv
+# (default ~/.cache/claude-flow-patch), together with the npm prefix, so
+# check/patch/repair skip both the probe and `npm config get prefix` when
+# nothing was installed or removed. The key is built from the mtimes of the
+# _npx roots, each npx hash's node_modules/.package-lock.json (rewritten on
+# every install), the global node_modules dirs and ~/.npmrc, plus the env
+# that decides the prefix. Set CFP_NO_DISCOVER_CACHE=1 to bypass it.
+
+_cfp_discover_cache_file() {
+  local dir="${CFP_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/claude-flow-patch}"
+  echo "$dir/discover.tsv"
+}
+
+# Args: <npm_prefix> <npx_root>...
+# Sets _CFP_KEY to the cache key and _CFP_KEY_FRESH=1 if any input changed
+# within the last 2s (mtimes have 1s resolution, so such a key can't be trusted).
+_cfp_discover_key() {
+  local prefix="$1"; shift
+  local paths=() root lock
+  for root in "$@"; do
+    paths+=("$root")
+    for lock in "$root"/*/node_modules/.package-lock.json; do
+      [ -f "$lock" ] && paths+=("$lock")
+    done
+  done
+  [ -f "$HOME/.npmrc" ] && paths+=("$HOME/.npmrc")
+  if [ -n "$prefix" ]; then
+    for lock in "$prefix/lib/node_modules" "$prefix/node_modules"; do
+      [ -d "$lock" ] && paths+=("$lock")
+    done
+  fi
+
+  local stats=""
+  if [ ${#paths[@]} -gt 0 ]; then
+    # GNU stat, then BSD stat
+    stats="$(stat -c '%n %Y' "${paths[@]}" 2>/dev/null || stat -f '%N %m' "${paths[@]}" 2>/dev/null)" || true
+  fi
+  _CFP_KEY="v1|$HOME|${NPM_CONFIG_PREFIX:-}|${npm_config_prefix:-}|$(command -v npm)|$prefix|${stats//$'\n'/|}"
+
+  _CFP_KEY_FRESH=0
+  local now="${EPOCHSECONDS:-$(date +%s)}" line
+  while IFS= read -r line; do
+    [ -n "$line" ] || continue
+    [ $(( now - ${line##* } )) -lt 2 ] && { _CFP_KEY_FRESH=1; break; }
+  done <<< "$stats"
+  return 0
+}
+
+# Args: <node_modules_dir>
+# True if a @claude-flow/cli layout exists there (no forks).
+_cfp_has_cli() {
+  [ -f "$1/@claude-flow/cli/dist/src/memory/memory-initializer.js" ] ||
+    [ -f "$1/claude-flow/v3/@claude-flow/cli/dist/src/memory/memory-initializer.js" ]
+}
+
+# Args: <node_modules_dir>...
+# Probes each directory in parallel and prints the installs found, in
+# argument order, deduplicated by realpath (awk hash set).
+_cfp_probe_parallel() {
+  [ $# -gt 0 ] || return 0
+  local tmp i=0 nm
+  tmp="$(mktemp -d "${TMPDIR:-/tmp}/cfp-discover.XXXXXX")" || return 0
+  for nm in "$@"; do
+    (
+      _cfp_probe_node_modules "$nm" | while IFS= read -r line; do
+        [ -n "$line" ] || continue
+        ds="${line%%	*}"
+        printf '%s\t%s\n' "$(realpath "$ds" 2>/dev/null || echo "$ds")" "$line"
+      done
+    ) > "$tmp/$(printf '%05d' "$i")" &
+    i=$((i + 1))
+    [ $((i % 8)) -eq 0 ] && wait
+  done
+  wait
+  cat "$tmp"/* | awk -F'\t' '!seen[$1]++ { sub(/^[^\t]*\t/, ""); print }'
+  rm -rf "$tmp"
+}
+
 # ── Discover all global installs ──
 # Outputs tab-separated lines (same format as _cfp_probe_node_modules).
 
 discover_all_cf_installs() {
-  local _global_seen=()
+  local roots=() root
+  while IFS= read -r root; do
+    [ -n "$root" ] && roots+=("$root")
+  done < <(_cfp_npx_cache_roots)
+
+  local cache_file cached_key="" npm_prefix="" have_cache=0 cached_lines=""
+  cache_file="$(_cfp_discover_cache_file)"
 
-  # 1. npx cache directories
-  while IFS= read -r cache_root; do
-    [ -n "$cache_root" ] || continue
-    for hash_dir in "$cache_root"/*/; do
-      [ -d "$hash_dir/node_modules" ] || continue
+  # 1. Cache hit: same key, and every cached install is still there
+  if [ -z "${CFP_NO_DISCOVER_CACHE:-}" ] && [ -f "$cache_file" ]; then
+    local line
+    {
+      IFS= read -r line && cached_key="${line#key }"
+      IFS= read -r line && npm_prefix="${line#prefix }" && have_cache=1
       while IFS= read -r line; do
-        [ -n "$line" ] || continue
-        local ds="${line%%	*}"
-        local real
-        real="$(realpath "$ds" 2>/dev/null || echo "$ds")"
-        local dup=0
-        for s in "${_global_seen[@]}"; do
-          [ "$s" = "$real" ] && { dup=1; break; }
-        done
-        [ "$dup" -eq 1 ] && continue
-        _global_seen+=("$real")
-        echo "$line"
-      done < <(_cfp_probe_node_modules "$hash_dir/node_modules")
-    done
-  done < <(_cfp_npx_cache_roots)
+        [ -n "$line" ] && cached_lines+="$line"$'\n'
+      done
+    } < "$cache_file"
+  fi
+  if [ "$have_cache" -eq 1 ]; then
+    _cfp_discover_key "$npm_prefix" ${roots[@]+"${roots[@]}"}
+    if [ "$_CFP_KEY" = "$cached_key" ]; then
+      local out="" ok=1 ds version rv rs writable
+      while IFS=$'\t' read -r ds version rv rs writable; do
+        [ -n "$ds" ] || continue
+        [ -f "$ds/memory/memory-initializer.js" ] || { ok=0; break; }
+        writable="yes"
+        [ -w "$ds/memory/memory-initializer.js" ] || writable="no"
+        out+="$ds"$'\t'"$version"$'\t'"$rv"$'\t'"$rs"$'\t'"$writable"$'\n'
+      done <<< "$cached_lines"
+      if [ "$ok" -eq 1 ]; then
+        printf '%s' "$out"
+        return 0
+      fi
+    fi
+  fi
 
-  # 2. Global npm prefix
-  local npm_prefix
-  npm_prefix="$(npm config get prefix 2>/dev/null)" || true
+  # 2. Probe: npx hash dirs, then the global npm prefix
+  npm_prefix="$(npm config get prefix 2>/dev/null)" || npm_prefix=""
+  local candidates=() hash_dir pdir
+  for root in ${roots[@]+"${roots[@]}"}; do
+    for hash_dir in "$root"/*/; do
+      _cfp_has_cli "${hash_dir}node_modules" && candidates+=("${hash_dir}node_modules")
+    done
+  done
   if [ -n "$npm_prefix" ]; then
     # Linux/macOS: {prefix}/lib/node_modules
     # Windows: {prefix}/node_modules (no /lib/)
-    local prefix_dirs=("$npm_prefix/lib/node_modules" "$npm_prefix/node_modules")
-    for pdir in "${prefix_dirs[@]}"; do
-      [ -d "$pdir" ] || continue
-      while IFS= read -r line; do
-        [ -n "$line" ] || continue
-        local ds="${line%%	*}"
-        local real
-        real="$(realpath "$ds" 2>/dev/null || echo "$ds")"
-        local dup=0
-        for s in "${_global_seen[@]}"; do
-          [ "$s" = "$real" ] && { dup=1; break; }
-        done
-        [ "$dup" -eq 1 ] && continue
-        _global_seen+=("$real")
-        echo "$line"
-      done < <(_cfp_probe_node_modules "$pdir")
+    for pdir in "$npm_prefix/lib/node_modules" "$npm_prefix/node_modules"; do
+      _cfp_has_cli "$pdir" && candidates+=("$pdir")
     done
   fi
+
+  local found
+  found="$(_cfp_probe_parallel ${candidates[@]+"${candidates[@]}"})"
+  [ -n "$found" ] && printf '%s\n' "$found"
+
+  # 3. Persist (skipped while inputs are still settling)
+  [ -z "${CFP_NO_DISCOVER_CACHE:-}" ] || return 0
+  _cfp_discover_key "$npm_prefix" ${roots[@]+"${roots[@]}"}
+  [ "$_CFP_KEY_FRESH" -eq 0 ] || return 0
+  mkdir -p "$(dirname "$cache_file")" 2>/dev/null || return 0
+  if { printf 'key %s\nprefix %s\n' "$_CFP_KEY" "$npm_prefix"
+       if [ -n "$found" ]; then printf '%s\n' "$found"; fi
+     } > "$cache_file.$$" 2>/dev/null; then
+    mv -f "$cache_file.$$" "$cache_file" 2>/dev/null || rm -f "$cache_file.$$"
+  fi
+  return 0
 }
 
 # ── Discover installs in a --target directory ──
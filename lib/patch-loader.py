@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# patch-loader.py — run fix.py files as modules against a shared common context
+#
+# Usage: python3 lib/patch-loader.py [--label <scope>] <fix.py>...
+#
+# common.py is imported once (it reads BASE / RUVECTOR_CLI / RUV_SWARM_ROOT
+# from the environment and owns the file buffer and counters). Each fix.py is
+# then imported as its own module whose namespace is pre-seeded with common's
+# names. patch-all.sh passes them in numeric directory order, already
+# filtered by PATCH_INCLUDE / PATCH_EXCLUDE; lib/patch_plan.py then orders
+# them by their op-level dependencies and reports problems up front.
+#
+# Because every patch is a real module:
+#   - compiled bytecode is cached (under $CFP_CACHE_DIR/pycache, so read-only
+#     installs of this package still benefit) and reused while fix.py's
+#     mtime and size are unchanged;
+#   - a patch that fails to compile or raises is reported and skipped, and
+#     the remaining patches still run (exit status 1 at the end);
+#   - names a patch defines stay in that patch — no cross-file collisions.
+#
+# Chains the planner finds independent (disjoint target files) run
+# concurrently in forked workers, up to $CFP_CHAIN_JOBS (default: CPU count;
+# 1 runs everything in this process). A worker patches its own copy of the
+# buffer and sends back each patch's output and the files it touched; they
+# are merged here, printed in plan order and flushed once, so the output and
+# the files written match a sequential run. If two workers turn out to touch
+# the same file (targets the static analysis could not see), their results
+# are dropped and everything runs sequentially instead.
+
+import contextlib
+import hashlib
+import importlib.util
+import io
+import marshal
+import os
+import pickle
+import re
+import sys
+import traceback
+import types
+
+LIB_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _cache_dir():
+    return os.environ.get("CFP_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+        "claude-flow-patch")
+
+
+def _code(path, cache_dir):
+    """Compiled code for path, from the bytecode cache when still valid."""
+    st = os.stat(path)
+    header = importlib.util.MAGIC_NUMBER + f"{st.st_mtime_ns}:{st.st_size}\n".encode()
+    cfile = os.path.join(cache_dir, hashlib.sha256(path.encode()).hexdigest()[:24] + ".pyc")
+    try:
+        with open(cfile, "rb") as f:
+            data = f.read()
+        if data.startswith(header):
+            return marshal.loads(data[len(header):])
+    except (OSError, ValueError, EOFError, TypeError):
+        pass  # missing or stale cache entry → recompile
+
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    if not sys.dont_write_bytecode:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cfile}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(header + marshal.dumps(code))
+            os.replace(tmp, cfile)
+        except OSError:
+            pass  # cache is an optimisation only
+    return code
+
+
+def _context(common):
+    """Names every fix.py sees: all of common's globals except module dunders."""
+    return {k: v for k, v in vars(common).items() if not (k.startswith("__") and k.endswith("__"))}
+
+
+def run_patch(common, path, cache_dir):
+    """Import one fix.py as a module. Returns True on success."""
+    path = os.path.abspath(path)
+    dirname = os.path.basename(os.path.dirname(path))
+    module = types.ModuleType("cfp_patch_" + re.sub(r"\W", "_", dirname))
+    ns = module.__dict__
+    ns.update(_context(common))
+    ns["__file__"] = path
+    seeded = common.applied, common.skipped
+
+    common._prof_enter(dirname)
+    ok = True
+    try:
+        exec(_code(path, cache_dir), ns)
+    except Exception as e:
+        ok = False
+        lines = [f.lineno for f in traceback.extract_tb(e.__traceback__) if f.filename == path]
+        at = f" (fix.py line {lines[-1]})" if lines and not isinstance(e, SyntaxError) else ""
+        print(f"  ERROR: {dirname} — {type(e).__name__}: {e}{at}")
+
+    # Raw ops that bump the counters at module level (e.g. WM-011b-cleanup's
+    # `applied += 1`) rebind the module's copy; carry the delta over.
+    common.applied += ns.get("applied", seeded[0]) - seeded[0]
+    common.skipped += ns.get("skipped", seeded[1]) - seeded[1]
+    return ok
+
+
+def plan(common, paths, cache_dir):
+    """
+    Order paths by patch_plan's dependency DAG and print its findings (excluded
+    prerequisites, unprovided ops, forward dependencies, cycles) before
+    anything runs. Returns (ordered paths, chains as lists of paths in that
+    order). Paths outside the patch tree keep their place at the end, in one
+    chain; any planner failure falls back to the order given, as one chain.
+    """
+    paths = [os.path.abspath(p) for p in paths]
+    if not paths:
+        return paths, []
+    try:
+        import patch_plan
+        all_paths = patch_plan.all_fixes(os.path.dirname(os.path.dirname(paths[0])))
+        ctx = _context(common)
+
+        def content(target):
+            try:
+                return common.read_file(eval(target, dict(ctx)))
+            except Exception:
+                return None
+
+        result = patch_plan.schedule(patch_plan.analyze_cached(all_paths, cache_dir),
+                                     all_paths, paths, content)
+    except Exception as e:
+        print(f"  WARN: patch planner failed ({type(e).__name__}: {e}) — running in given order")
+        return paths, [paths]
+    for line in patch_plan.problems(result):
+        print(f"  PLAN: {line}")
+    by_dir = {os.path.basename(os.path.dirname(p)): p for p in paths}
+    ordered = [by_dir.pop(d) for d in result["order"] if d in by_dir]
+    rest = [p for p in paths if p in by_dir.values()]
+    position = {os.path.basename(os.path.dirname(p)): i for i, p in enumerate(ordered)}
+    chains = [[ordered[i] for i in sorted(position[d] for d in c if d in position)]
+              for c in result["chains"]]
+    chains = [c for c in chains if c] + ([rest] if rest else [])
+    return ordered + rest, sorted(chains, key=len, reverse=True)
+
+
+def _jobs(common):
+    """Concurrent chain workers: $CFP_CHAIN_JOBS or the CPU count; 1 when profiling or without fork."""
+    if not hasattr(os, "fork") or getattr(common, "_prof_path", ""):
+        return 1
+    try:
+        return max(1, int(os.environ.get("CFP_CHAIN_JOBS") or os.cpu_count() or 1))
+    except ValueError:
+        return 1
+
+
+def _run_chain(common, chain, cache_dir):
+    """Worker side: run one chain against this process's buffer copy and describe the result."""
+    touched, written = set(), set()
+    load, write = common._buf_load, common.write_file
+
+    def tracked_load(filepath):
+        touched.add(filepath)
+        return load(filepath)
+
+    def tracked_write(filepath, code):
+        touched.add(filepath)
+        written.add(filepath)
+        return write(filepath, code)
+
+    common._buf_load, common.write_file = tracked_load, tracked_write
+    seeded = common.applied, common.skipped
+    out, failed = {}, []
+    for path in chain:
+        with contextlib.redirect_stdout(io.StringIO()) as buf:
+            if not run_patch(common, path, cache_dir):
+                failed.append(path)
+        out[path] = buf.getvalue()
+    return {
+        "out": out,
+        "failed": failed,
+        "applied": common.applied - seeded[0],
+        "skipped": common.skipped - seeded[1],
+        "touched": touched,
+        "written": written,
+        "files": {f: common._buf_files.get(f) for f in touched},
+        "dirty": [f for f in touched if f in common._buf_dirty],
+        "failedFiles": common._buf_failed,
+        "warns": common._buf_warns,
+    }
+
+
+def _fork_chain(common, chain, cache_dir):
+    """Start a worker for chain; returns (pid, read end of its result pipe)."""
+    r, w = os.pipe()
+    sys.stdout.flush()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        status = 1
+        try:
+            data = pickle.dumps(_run_chain(common, chain, cache_dir))
+            with os.fdopen(w, "wb") as f:
+                f.write(data)
+            status = 0
+        finally:
+            os._exit(status)
+    os.close(w)
+    return pid, r
+
+
+def _collect(pid, r):
+    """Worker result, or None if it died or sent nothing usable."""
+    with os.fdopen(r, "rb") as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        return None
+    try:
+        return pickle.loads(data)
+    except Exception:
+        return None
+
+
+def run_chains(common, ordered, chains, cache_dir, jobs):
+    """
+    Run the chains in forked workers (at most jobs at a time) and merge their
+    results into common, printing each patch's output in plan order. Returns
+    the failed paths, or None when nothing was merged (a worker failed, or
+    two chains touched the same file) and the caller should run sequentially.
+    """
+    results, running = [], []
+    for chain in chains:
+        if len(running) >= jobs:
+            results.append(_collect(*running.pop(0)))
+        running.append(_fork_chain(common, chain, cache_dir))
+    results += [_collect(*job) for job in running]
+    if any(r is None for r in results):
+        return None
+    for i, a in enumerate(results):
+        for b in results[i + 1:]:
+            if a["written"] & b["touched"] or b["written"] & a["touched"]:
+                return None
+
+    out, failed = {}, []
+    for res in results:
+        out.update(res["out"])
+        failed += res["failed"]
+        common.applied += res["applied"]
+        common.skipped += res["skipped"]
+        common._buf_files.update(res["files"])
+        common._buf_dirty.update(dict.fromkeys(res["dirty"], True))
+        common._buf_failed.update(res["failedFiles"])
+        for filepath, labels in res["warns"].items():
+            common._buf_warns.setdefault(filepath, {}).update(labels)
+    for path in ordered:
+        sys.stdout.write(out.get(path, ""))
+    return [p for p in ordered if p in failed]
+
+
+def main(argv):
+    label = ""
+    if argv[:1] == ["--label"]:
+        label, argv = argv[1], argv[2:]
+
+    sys.path.insert(0, LIB_DIR)
+    import common
+
+    cache_dir = os.path.join(_cache_dir(), "pycache")
+    ordered, chains = plan(common, argv, cache_dir)
+    jobs = _jobs(common)
+    failed = run_chains(common, ordered, chains, cache_dir, jobs) if jobs > 1 and len(chains) > 1 else None
+    if failed is None:
+        failed = [path for path in ordered if not run_patch(common, path, cache_dir)]
+
+    common.flush()
+    if label:
+        print(f"[{label}] Done: {common.applied} applied, {common.skipped} already present")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# patch_plan.py — op-level dependency planner for patch/*/fix.py
+#
+# Usage: [BASE=<dist/src>] python3 lib/patch_plan.py [--json] [fix.py...]
+#        (default: every patch; with BASE the install's files are consulted)
+#
+# Every patch()/patch_all() call with static strings is extracted and grouped
+# by target (the target expression, e.g. MI or MCP_HOOKS). Op B *needs* op A
+# when a significant line of B's `old` is text that A introduces — present in
+# A's `new` but not in A's `old` (e.g. WM-011a3 matches code WM-009a inserts).
+# This static analysis is cached per set of fix.py files.
+#
+# schedule() turns it into a DAG over the selected patch directories. With
+# install contents available, an op whose `old` (or `new`) is already in the
+# file needs nothing; for the others it reports, before anything runs:
+#   - prerequisites excluded by PATCH_INCLUDE / PATCH_EXCLUDE;
+#   - ops no patch can satisfy (they would WARN "pattern not found");
+#   - providers numbered later, which are scheduled first (a provider that
+#     applies to the file counts only if applying it yields B's `old`);
+#   - cycles, which fall back to numeric order.
+# Patches also share code: an underscore helper one patch inserts (WM-015a's
+# _keywordSearch) may be called from text another patch inserts (WM-016a).
+# Each such cross-patch reference is listed; an unguarded one (no
+# `typeof _x === 'function'` check) is a dependency like an op edge, and one
+# whose provider is not selected — nor already defined in the file — is
+# reported as a missing prerequisite.
+#
+# Directories connected by a dependency or a shared target form a chain;
+# separate chains touch disjoint files (read_file / write_file and
+# extend_memory_command targets count too), so patch-loader.py can run them
+# concurrently.
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import sys
+
+MIN_LINE = 20  # shorter lines (`} catch {}`, `return result;`) are too generic to match on
+ANALYSIS_VERSION = 2
+
+_DEFINES = re.compile(r"(?:function\*?\s+|(?:const|let|var)\s+)(_[\w$]+)\s*"
+                      r"(?:\(|=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*=>|[\w$]+\s*=>))")
+_CALLS = re.compile(r"(?<![\w$.])(_[\w$]+)\s*\(")
+_TYPEOF = re.compile(r"typeof\s+(_[\w$]+)\s*[!=]==?\s*'function'")
+
+
+def _const(node):
+    """Fold a string literal (incl. + concatenation); None if not static."""
+    import ast
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = _const(node.left), _const(node.right)
+        if left is not None and right is not None:
+            return left + right
+    return None
+
+
+def _parse(path):
+    import ast  # only on a cache miss; the import costs more than a cached plan
+    with open(path) as f:
+        return ast.parse(f.read(), path)
+
+
+def _is_op(node):
+    import ast
+    return (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+            and node.func.id in ("patch", "patch_all") and len(node.args) == 4)
+
+
+def extract_ops(path):
+    """
+    Ops in one fix.py: [{label, target, old, new, line}] in source order.
+    Raw read_file() / write_file() calls and extend_memory_command() (which
+    targets CLI_MEMORY) are included with old=None, so they count for chains.
+    """
+    import ast
+    ops = []
+    for node in ast.walk(_parse(path)):
+        if _is_op(node):
+            label, target, old, new = node.args
+            ops.append({
+                "label": _const(label) or ast.unparse(label),
+                "target": ast.unparse(target),
+                "old": _const(old),
+                "new": _const(new),
+                "line": node.lineno,
+            })
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.args
+              and node.func.id in ("read_file", "write_file", "extend_memory_command")):
+            raw = node.func.id != "extend_memory_command"
+            ops.append({
+                "label": ast.unparse(node) if raw else _const(node.args[0]) or ast.unparse(node.args[0]),
+                "target": ast.unparse(node.args[0]) if raw else "CLI_MEMORY",
+                "old": None,
+                "new": None,
+                "line": node.lineno,
+            })
+    ops.sort(key=lambda o: o["line"])
+    return ops
+
+
+def extract_symbols(path):
+    """
+    Underscore helpers in the text one fix.py inserts (every string literal
+    except patch()'s `old`): {defines: [name], uses: {name: guarded}}, where
+    uses are calls or typeof checks of names it does not define itself.
+    """
+    import ast
+    tree = _parse(path)
+    olds = {id(n.args[2]) for n in ast.walk(tree) if _is_op(n)}
+    text = "\n".join(n.value for n in ast.walk(tree) if isinstance(n, ast.Constant)
+                     and isinstance(n.value, str) and id(n) not in olds)
+    defines = set(_DEFINES.findall(text))
+    guarded = set(_TYPEOF.findall(text))
+    uses = (set(_CALLS.findall(text)) | guarded) - defines
+    return {"defines": sorted(defines), "uses": {name: name in guarded for name in sorted(uses)}}
+
+
+def _lines(old):
+    """The lines of an `old` string specific enough to match on (none if it is too short)."""
+    lines = [l.strip() for l in old.splitlines() if len(l.strip()) >= MIN_LINE]
+    if not lines and len(old.strip()) >= MIN_LINE // 2:
+        lines = [old.strip()]
+    return lines
+
+
+def _needs(b, a):
+    """True if b's `old` matches on text that a introduces (in a.new, not in a.old)."""
+    return any(l in a["new"] and l not in (a["old"] or "") for l in _lines(b["old"]))
+
+
+def _provides(a, b, text, a_provided):
+    """
+    Whether a can supply b's `old`. With the file text known and a applicable
+    to it, apply a and look for b's `old`, which rules out line matches in
+    some other block; a provider that is itself provided is taken on trust.
+    """
+    if text is None or a["old"] is None:
+        return True
+    if a["old"] in text:
+        return b["old"] in text.replace(a["old"], a["new"])
+    return bool(a_provided)
+
+
+def analyze(paths):
+    """
+    Static analysis of every fix.py: {ops, providers, symbols}
+    (providers[i] = op indices; symbols[dir] = extract_symbols()).
+    """
+    ops, symbols = [], {}
+    for path in paths:
+        d = os.path.basename(os.path.dirname(path))
+        for op in extract_ops(path):
+            op["dir"] = d
+            ops.append(op)
+        symbols[d] = extract_symbols(path)
+    by_target = {}
+    for i, op in enumerate(ops):
+        by_target.setdefault(op["target"], []).append(i)
+    providers = [[] for _ in ops]
+    for idxs in by_target.values():
+        for i in idxs:
+            if ops[i]["old"] is None:
+                continue
+            providers[i] = [j for j in idxs if j != i and ops[j]["new"] is not None
+                            and _needs(ops[i], ops[j])]
+    return {"ops": ops, "providers": providers, "symbols": symbols}
+
+
+def analyze_cached(paths, cache_dir):
+    """analyze(), reused while every fix.py keeps its mtime and size."""
+    stamp = hashlib.sha256(json.dumps([ANALYSIS_VERSION] + [
+        (p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths]).encode()).hexdigest()
+    cfile = os.path.join(cache_dir, "plan.json")
+    try:
+        with open(cfile) as f:
+            cached = json.load(f)
+        if cached.get("stamp") == stamp:
+            return cached["analysis"]
+    except (OSError, ValueError):
+        pass
+    analysis = analyze(paths)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{cfile}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"stamp": stamp, "analysis": analysis}, f)
+        os.replace(tmp, cfile)
+    except OSError:
+        pass  # cache is an optimisation only
+    return analysis
+
+
+def schedule(analysis, paths, selected=None, content=None):
+    """
+    paths: every fix.py in numeric order; selected: the subset that runs.
+    content(target) -> current file text, or None when unknown (static mode).
+    Returns {order, edges, chains, cycles, missing, unprovided, calls, reordered}.
+    """
+    dirs = [os.path.basename(os.path.dirname(p)) for p in paths]
+    index = {d: i for i, d in enumerate(dirs)}
+    run = set(dirs) if selected is None else {os.path.basename(os.path.dirname(p)) for p in selected}
+    run &= set(dirs)
+    ops, providers = analysis["ops"], analysis["providers"]
+    texts = {}
+
+    edges = {d: set() for d in run}   # dir -> dirs that must run before it
+    missing, unprovided, forward = [], [], []
+    for i, b in enumerate(ops):
+        if b["dir"] not in run or b["old"] is None:
+            continue
+        text = None
+        if content is not None:
+            if b["target"] not in texts:
+                texts[b["target"]] = content(b["target"])
+            text = texts[b["target"]]
+            if text is not None and (b["old"] in text or (b["new"] or "\0") in text):
+                continue  # already applied, or matches the file as shipped
+        pos = (index[b["dir"]], b["line"])
+        provs = [ops[j] for j in providers[i] if _provides(ops[j], b, text, providers[j])]
+        earlier = [a for a in provs if a["dir"] in run and (index[a["dir"]], a["line"]) < pos]
+        if earlier:
+            edges[b["dir"]].update(a["dir"] for a in earlier if a["dir"] != b["dir"])
+            continue
+        if text is None:
+            continue  # without the file, a later provider may just duplicate shipped text
+        later = {a["dir"] for a in provs if a["dir"] in run and a["dir"] != b["dir"]}
+        entry = {"op": b["label"], "dir": b["dir"], "target": b["target"]}
+        if later:
+            forward.append(dict(entry, needs=sorted(later, key=index.get)))
+            edges[b["dir"]].update(later)
+        elif provs:
+            missing.append(dict(entry, needs=sorted({a["dir"] for a in provs}, key=index.get)))
+        elif _lines(b["old"]):
+            unprovided.append(entry)  # (too short an `old` could come from any patch)
+
+    calls = _calls(analysis["symbols"], run, index, ops, texts, content)
+    for c in calls:
+        entry = {"op": c["symbol"] + "()", "dir": c["dir"], "target": c["target"]}
+        if c["guarded"] or c["defined"]:
+            continue
+        chosen = [p for p in c["from"] if p in run]
+        if not chosen:
+            missing.append(dict(entry, needs=c["from"]))
+            continue
+        edges[c["dir"]].update(chosen)
+        later = [p for p in chosen if index[p] > index[c["dir"]]]
+        if later:
+            forward.append(dict(entry, needs=later))
+
+    cycles = _cycles(edges)
+    in_cycle = {d for c in cycles for d in c}
+
+    # Kahn's algorithm with numeric order as the tie-break: without forward
+    # edges this is exactly the numeric order. Edges inside a cycle are
+    # dropped so its members fall back to numeric order.
+    pending = {d: {p for p in ps if not (d in in_cycle and p in in_cycle)} for d, ps in edges.items()}
+    dependents = {d: [] for d in pending}
+    for d, ps in pending.items():
+        for p in ps:
+            dependents[p].append(d)
+    ready = [(index[d], d) for d, ps in pending.items() if not ps]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, d = heapq.heappop(ready)
+        order.append(d)
+        for n in dependents[d]:
+            pending[n].discard(d)
+            if not pending[n]:
+                heapq.heappush(ready, (index[n], n))
+
+    return {
+        "order": order,
+        "edges": {d: sorted(edges[d], key=index.get) for d in sorted(edges, key=index.get) if edges[d]},
+        "chains": _chains(sorted(run, key=index.get), edges, ops),
+        "cycles": cycles,
+        "missing": missing,
+        "unprovided": unprovided,
+        "calls": calls,
+        "reordered": [f for f in forward if not (f["dir"] in in_cycle and set(f["needs"]) & in_cycle)],
+    }
+
+
+def _calls(symbols, run, index, ops, texts, content):
+    """
+    Cross-patch helper references of the selected dirs: [{dir, symbol, from,
+    guarded, defined, target}], `from` being the other dirs that define it and
+    `defined` whether it is already in one of dir's target files.
+    """
+    definers = {}
+    for d, s in symbols.items():
+        for name in s["defines"]:
+            definers.setdefault(name, []).append(d)
+    targets = {}
+    for op in ops:
+        targets.setdefault(op["dir"], []).append(op["target"])
+    calls = []
+    for d in sorted(run, key=index.get):
+        for name, guarded in symbols.get(d, {}).get("uses", {}).items():
+            provs = sorted((p for p in definers.get(name, ()) if p != d), key=index.get)
+            if not provs:
+                continue  # shipped code, or a name no patch defines
+            defined = False
+            if content is not None:
+                found = re.compile(r"(?:function\*?\s+|(?:const|let|var)\s+)" + re.escape(name) + r"\s*[(=]")
+                for t in dict.fromkeys(targets.get(d, ())):
+                    if t not in texts:
+                        texts[t] = content(t)
+                    if texts[t] is not None and found.search(texts[t]):
+                        defined = True
+                        break
+            calls.append({"dir": d, "symbol": name, "from": provs, "guarded": guarded,
+                          "defined": defined, "target": (targets.get(d) or [""])[0]})
+    return calls
+
+
+def _cycles(graph):
+    """Strongly connected components with more than one node (Tarjan)."""
+    counter, stack, on_stack, low, num, out = [0], [], set(), {}, {}, []
+
+    def visit(v):
+        num[v] = low[v] = counter[0]
+        counter[0] += 1
+        stack.append(v)
+        on_stack.add(v)
+        for w in graph.get(v, ()):
+            if w not in num:
+                visit(w)
+                low[v] = min(low[v], low[w])
+            elif w in on_stack:
+                low[v] = min(low[v], num[w])
+        if low[v] == num[v]:
+            comp = []
+            while True:
+                w = stack.pop()
+                on_stack.discard(w)
+                comp.append(w)
+                if w == v:
+                    break
+            if len(comp) > 1:
+                out.append(sorted(comp))
+
+    for v in sorted(graph):
+        if v not in num:
+            visit(v)
+    return out
+
+
+def _chains(run, edges, ops):
+    """Independent groups of dirs: linked by a dependency or a shared target."""
+    parent = {d: d for d in run}
+
+    def find(d):
+        while parent[d] != d:
+            parent[d] = parent[parent[d]]
+            d = parent[d]
+        return d
+
+    for d in run:
+        for p in edges.get(d, ()):
+            parent[find(d)] = find(p)
+    first = {}
+    for op in ops:
+        if op["dir"] in parent:
+            parent[find(op["dir"])] = find(first.setdefault(op["target"], op["dir"]))
+    groups = {}
+    for d in run:
+        groups.setdefault(find(d), []).append(d)
+    return sorted(groups.values(), key=len, reverse=True)
+
+
+def problems(plan):
+    """One line per issue found before running."""
+    lines = []
+    for c in plan["cycles"]:
+        lines.append(f"cycle between {' <-> '.join(c)} — running them in numeric order")
+    for m in plan["missing"]:
+        lines.append(f"{m['op']} ({m['dir']}) needs {', '.join(m['needs'])}, which is not selected")
+    for u in plan["unprovided"]:
+        lines.append(f"{u['op']} ({u['dir']}) — pattern not in {u['target']} and no patch provides it")
+    for f in plan["reordered"]:
+        lines.append(f"{f['op']} ({f['dir']}) needs {', '.join(f['needs'])} — running it first")
+    return lines
+
+
+def all_fixes(patch_root):
+    """Every patch/*/fix.py under patch_root, in numeric directory order."""
+    return sorted(os.path.join(patch_root, d, "fix.py") for d in os.listdir(patch_root)
+                  if os.path.isfile(os.path.join(patch_root, d, "fix.py")))
+
+
+def main(argv):
+    as_json = "--json" in argv
+    selected = [os.path.abspath(a) for a in argv if a != "--json"] or None
+    root = os.path.dirname(os.path.dirname(selected[0])) if selected else \
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "patch")
+    paths = all_fixes(root)
+
+    content = None
+    if os.environ.get("BASE"):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import common
+        ctx = {k: v for k, v in vars(common).items() if not k.startswith("__")}
+
+        def content(target):
+            try:
+                return common.read_file(eval(target, dict(ctx)))
+            except Exception:
+                return None
+
+    plan = schedule(analyze(paths), paths, selected, content)
+    if as_json:
+        json.dump(plan, sys.stdout, indent=2)
+        print()
+    else:
+        print(f"{len(plan['order'])} patch dirs, {len(plan['chains'])} independent chain(s)")
+        for d in plan["order"]:
+            needs = plan["edges"].get(d)
+            print(f"  {d}" + (f"  <- {', '.join(needs)}" if needs else ""))
+        for c in plan["calls"]:
+            print(f"  uses: {c['dir']} calls {c['symbol']}() from {', '.join(c['from'])}"
+                  + (" (typeof-guarded)" if c["guarded"] else ""))
+        for line in problems(plan):
+            print(f"  PLAN: {line}")
+    return 1 if plan["cycles"] or plan["missing"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
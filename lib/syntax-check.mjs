@@ -0,0 +1,130 @@
+// lib/syntax-check.mjs — In-process JS syntax validation for check-sentinels.mjs
+// Replaces one `node --check` process per file with a small worker_threads
+// pool that compiles sources with node:vm (CommonJS via compileFunction, ESM
+// via SourceTextModule). Verdicts are keyed by content hash, so a file whose
+// bytes were already seen to parse is never compiled again.
+//
+// The pool only proves files OK. Anything it rejects is confirmed with a
+// single `node --check` so the reported message (and the final verdict) is
+// exactly what node itself says.
+
+import { spawnSync } from 'node:child_process';
+import { createHash } from 'node:crypto';
+import { readFileSync } from 'node:fs';
+import { availableParallelism } from 'node:os';
+import { dirname, extname, join } from 'node:path';
+import vm from 'node:vm';
+import { Worker, isMainThread, parentPort, workerData } from 'node:worker_threads';
+
+const CJS_PARAMS = ['exports', 'require', 'module', '__filename', '__dirname'];
+
+export function contentHash(text) {
+  return createHash('sha256').update(text).digest('hex');
+}
+
+/** Module format node would use for path: 'module' or 'commonjs'. */
+export function moduleType(path, pkgTypeCache = new Map()) {
+  const ext = extname(path);
+  if (ext === '.mjs') return 'module';
+  if (ext === '.cjs') return 'commonjs';
+  const seen = [];
+  let dir = dirname(path);
+  let type = 'commonjs';
+  for (;;) {
+    if (pkgTypeCache.has(dir)) { type = pkgTypeCache.get(dir); break; }
+    seen.push(dir);
+    let pkg = null;
+    try { pkg = JSON.parse(readFileSync(join(dir, 'package.json'), 'utf-8')); } catch { /* keep walking */ }
+    if (pkg) { type = pkg.type === 'module' ? 'module' : 'commonjs'; break; }
+    const parent = dirname(dir);
+    if (parent === dir) break;
+    dir = parent;
+  }
+  for (const d of seen) pkgTypeCache.set(d, type);
+  return type;
+}
+
+/** Compile source without running it. Returns true if it parses. */
+function parses(source, type, filename) {
+  // node strips a leading hashbang; keep line numbers stable
+  const code = source.startsWith('#!') ? '//' + source.slice(2) : source;
+  const asModule = () => { new vm.SourceTextModule(code, { identifier: filename }); return true; };
+  try {
+    if (type === 'module') return asModule();
+    vm.compileFunction(code, CJS_PARAMS, { filename });
+    return true;
+  } catch (err) {
+    if (!(err instanceof SyntaxError)) throw err;
+    // node's module-syntax detection: ambiguous .js with import/export parses as ESM
+    if (type === 'commonjs' && /\b(import|export)\b/.test(code)) {
+      try { return asModule(); } catch { return false; }
+    }
+    return false;
+  }
+}
+
+// ── Worker side ──
+if (!isMainThread && workerData?.cfpSyntaxWorker) {
+  parentPort.on('message', ({ id, source, type, filename }) => {
+    let ok;
+    try { ok = parses(source, type, filename); } catch { ok = false; }
+    parentPort.postMessage({ id, ok });
+  });
+}
+
+/** node --check fallback: null if the file parses, else node's message. */
+function nodeCheck(path) {
+  const r = spawnSync(process.execPath, ['--check', path], { encoding: 'utf-8' });
+  return r.status === 0 ? null : (r.stderr || `exit ${r.status}`);
+}
+
+/**
+ * Syntax-check items [{ path, text }].
+ * opts.okHashes: Set of content hashes already known to parse (updated in place).
+ * opts.jobs: worker count (default: available parallelism).
+ * Returns { errors: [{ file, message }], parsed: <files compiled> }.
+ */
+export async function checkSyntax(items, opts = {}) {
+  const okHashes = opts.okHashes || new Set();
+  const pkgTypeCache = new Map();
+  const queue = [];
+  for (const { path, text } of items) {
+    const hash = contentHash(text);
+    if (okHashes.has(hash)) continue;
+    queue.push({ path, text, hash, type: moduleType(path, pkgTypeCache) });
+  }
+
+  const rejected = [];
+  if (queue.length) {
+    const jobs = Math.max(1, Math.min(opts.jobs || availableParallelism(), queue.length));
+    const workers = Array.from({ length: jobs }, () => new Worker(new URL(import.meta.url), {
+      workerData: { cfpSyntaxWorker: true },
+      execArgv: ['--experimental-vm-modules', '--no-warnings'],
+    }));
+    let next = 0;
+    await Promise.all(workers.map(worker => new Promise((resolveWorker, rejectWorker) => {
+      const dispatch = () => {
+        if (next >= queue.length) { resolveWorker(); return; }
+        const id = next++;
+        const { path, text, type } = queue[id];
+        worker.postMessage({ id, source: text, type, filename: path });
+      };
+      worker.on('message', ({ id, ok }) => {
+        if (ok) okHashes.add(queue[id].hash);
+        else rejected.push(queue[id]);
+        dispatch();
+      });
+      worker.on('error', rejectWorker);
+      dispatch();
+    })));
+    await Promise.all(workers.map(w => w.terminate()));
+  }
+
+  const errors = [];
+  for (const item of rejected) {
+    const message = nodeCheck(item.path);
+    if (message) errors.push({ file: item.path, message });
+    else okHashes.add(item.hash);
+  }
+  return { errors, parsed: queue.length };
+}
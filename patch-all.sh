@@ -3,11 +3,12 @@
 # Safe to run multiple times. Each fix.py is idempotent via patch()/patch_all().
 #
 # Usage:
-#   bash patch-all.sh [--global] [--target <dir>]
+#   bash patch-all.sh [--global] [--target <dir>] [--jobs <n>]
 #
 # Options:
 #   --global             Patch all global installs (npx cache + npm global)
 #   --target <dir>       Patch node_modules inside <dir>
+#   --jobs <n>           Patch up to <n> installs concurrently (default: CPU count)
 #
 # If neither flag is given, --global is assumed.
 
@@ -16,6 +17,8 @@ set -euo pipefail
 # Parse arguments
 DO_GLOBAL=0
 TARGET_DIR=""
+JOBS=""
+PROFILE_OUT=""
 while [[ $# -gt 0 ]]; do
   case $1 in
     --global)
@@ -30,12 +33,30 @@ while [[ $# -gt 0 ]]; do
       fi
       shift 2
       ;;
+    -j|--jobs)
+      JOBS="${2:-}"
+      if ! [[ "$JOBS" =~ ^[1-9][0-9]*$ ]]; then
+        echo "Error: --jobs requires a positive integer"
+        exit 1
+      fi
+      shift 2
+      ;;
+    --profile)
+      PROFILE_OUT="${2:-}"
+      if [[ -z "$PROFILE_OUT" ]]; then
+        echo "Error: --profile requires an output file argument"
+        exit 1
+      fi
+      shift 2
+      ;;
     -h|--help)
-      echo "Usage: patch-all.sh [--global] [--target <dir>]"
+      echo "Usage: patch-all.sh [--global] [--target <dir>] [--jobs <n>] [--profile <file>]"
       echo ""
       echo "Options:"
       echo "  --global           Patch all global installs (npx cache + npm global)"
       echo "  --target <dir>     Patch node_modules inside <dir>"
+      echo "  --jobs <n>         Patch up to <n> installs concurrently (default: CPU count)"
+      echo "  --profile <file>   Time every op; write a JSON report to <file> and print the slowest"
       echo ""
       echo "If neither flag is given, --global is assumed."
       exit 0
@@ -52,6 +73,12 @@ if [[ $DO_GLOBAL -eq 0 && -z "$TARGET_DIR" ]]; then
   DO_GLOBAL=1
 fi
 
+# Default: one job per CPU core
+if [[ -z "$JOBS" ]]; then
+  JOBS="$(nproc 2>/dev/null || sysctl -n hw.ncpu 2>/dev/null || getconf _NPROCESSORS_ONLN 2>/dev/null || echo 1)"
+  [[ "$JOBS" =~ ^[1-9][0-9]*$ ]] || JOBS=1
+fi
+
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # ── Shared discovery ──
@@ -59,12 +86,27 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 
 # ── Collect installs ──
 # Each entry: "SCOPE\tdist_src\tversion\truvector_cli\truv_swarm_root\twritable"
+# Entries resolving to the same realpath are kept once: two concurrent jobs
+# must never patch the same files.
 
 INSTALLS=()
+_SEEN_REAL=$'\n'
+
+add_install() {
+  local scope="$1" line="$2"
+  local ds="${line%%	*}"
+  local real
+  real="$(realpath "$ds" 2>/dev/null || echo "$ds")"
+  case "$_SEEN_REAL" in
+    *$'\n'"$real"$'\n'*) return 0 ;;
+  esac
+  _SEEN_REAL+="$real"$'\n'
+  INSTALLS+=("$scope	$line")
+}
 
 if [[ $DO_GLOBAL -eq 1 ]]; then
   while IFS= read -r line; do
-    [ -n "$line" ] && INSTALLS+=("GLOBAL	$line")
+    [ -n "$line" ] && add_install GLOBAL "$line"
   done < <(discover_all_cf_installs)
 fi
 
@@ -75,7 +117,7 @@ if [[ -n "$TARGET_DIR" ]]; then
   fi
   TARGET_DIR="$(cd "$TARGET_DIR" && pwd)"
   while IFS= read -r line; do
-    [ -n "$line" ] && INSTALLS+=("TARGET	$line")
+    [ -n "$line" ] && add_install TARGET "$line"
   done < <(discover_target_installs "$TARGET_DIR")
 fi
 
@@ -117,6 +159,7 @@ done
 echo ""
 
 # ── Apply patches function ──
+# Returns non-zero if the Python patch run failed.
 
 apply_patches() {
   local base="$1"
@@ -136,32 +179,34 @@ apply_patches() {
     echo "[$label] Patching ruvector at: $ruvector_cli"
   fi
 
+  local rc=0
   export BASE="${base:-/dev/null}"
   export RUVECTOR_CLI="$ruvector_cli"
   export RUV_SWARM_ROOT="$ruv_swarm_root"
+  export CFP_PATCH_SET="$PATCH_SET"
 
-  # Dynamic discovery: concatenate common.py + all fix.py files sorted alphabetically.
-  # Alphabetical order preserves dependencies (e.g. NS-001 < NS-002 < NS-003).
+  # Dynamic discovery: every patch/*/fix.py in directory order (numeric
+  # prefixes preserve dependencies, e.g. NS-001 < NS-002 < NS-003), run by
+  # lib/patch-loader.py as modules sharing one common.py context. Ops are
+  # applied to in-memory copies; flush() writes each target file once.
   #
   # PATCH_INCLUDE / PATCH_EXCLUDE env vars filter by directory name regex.
-  python3 <(
-    cat "$SCRIPT_DIR/lib/common.py"
-
-    for fix in "$SCRIPT_DIR"/patch/*/fix.py; do
-      [ -f "$fix" ] || continue
-      dirname=$(basename "$(dirname "$fix")")
-      matchname="${dirname#[0-9][0-9][0-9]-}"   # strip NNN- prefix for pattern matching
-      if [ -n "${PATCH_INCLUDE:-}" ] && ! echo "$matchname" | grep -qE "$PATCH_INCLUDE"; then
-        continue
-      fi
-      if [ -n "${PATCH_EXCLUDE:-}" ] && echo "$matchname" | grep -qE "$PATCH_EXCLUDE"; then
-        continue
-      fi
-      cat "$fix"
-    done
+  local fixes=()
+  for fix in "$SCRIPT_DIR"/patch/*/fix.py; do
+    [ -f "$fix" ] || continue
+    dirname=$(basename "$(dirname "$fix")")
+    matchname="${dirname#[0-9][0-9][0-9]-}"   # strip NNN- prefix for pattern matching
+    if [ -n "${PATCH_INCLUDE:-}" ] && ! echo "$matchname" | grep -qE "$PATCH_INCLUDE"; then
+      continue
+    fi
+    if [ -n "${PATCH_EXCLUDE:-}" ] && echo "$matchname" | grep -qE "$PATCH_EXCLUDE"; then
+      continue
+    fi
+    fixes+=("$fix")
+  done
 
-    echo "print(f\"[$label] Done: {applied} applied, {skipped} already present\")"
-  )
+  export CFP_PROFILE_T0="${EPOCHREALTIME:-}"
+  python3 "$SCRIPT_DIR/lib/patch-loader.py" --label "$label" ${fixes[@]+"${fixes[@]}"} || rc=$?
 
   # Shell-based patches (e.g. EM-002: transformers cache permissions)
   for fix in "$SCRIPT_DIR"/patch/*/fix.sh; do
@@ -178,22 +223,116 @@ apply_patches() {
   done
 
   echo ""
+  return $rc
 }
 
+# ── Patch-set fingerprint ──
+# Hash of common.py + every fix.py + the include/exclude filters. common.py
+# records it in each install's .cfp-manifest.json; a later run with the same
+# fingerprint skips files whose content hash is unchanged.
+
+PATCH_SET="$(
+  {
+    cat "$SCRIPT_DIR/lib/common.py" "$SCRIPT_DIR"/patch/*/fix.py
+    echo "include=${PATCH_INCLUDE:-} exclude=${PATCH_EXCLUDE:-}"
+  } | { sha256sum 2>/dev/null || shasum -a 256; } | cut -d' ' -f1
+)"
+
 # ── Apply to each discovered install ──
+# Installs are independent, so up to $JOBS run at once, each in its own
+# subshell (BASE etc. are exported per job). Output is captured per install
+# and printed in discovery order once every job has finished.
 
-for entry in "${INSTALLS[@]}"; do
-  IFS=$'\t' read -r scope dist_src version rv_cli rs_root writable <<< "$entry"
+WORK_DIR="$(mktemp -d "${TMPDIR:-/tmp}/cfp-patch.XXXXXX")"
+trap 'rm -rf "$WORK_DIR"' EXIT
+
+PIDS=()
+STATUS=()
+RUNNING=()
+
+reap_job() {
+  local i="$1"
+  if wait "${PIDS[$i]}"; then
+    STATUS[$i]=0
+  else
+    STATUS[$i]=$?
+  fi
+}
+
+for i in "${!INSTALLS[@]}"; do
+  IFS=$'\t' read -r scope dist_src version rv_cli rs_root writable <<< "${INSTALLS[$i]}"
   [ "$rv_cli" = "-" ] && rv_cli=""
   [ "$rs_root" = "-" ] && rs_root=""
 
   if [ "$writable" = "no" ]; then
-    echo "[$scope] SKIP: $dist_src not writable (re-run with sudo)"
-    echo ""
+    printf '[%s] SKIP: %s not writable (re-run with sudo)\n\n' "$scope" "$dist_src" > "$WORK_DIR/$i.out"
+    STATUS[$i]=skip
     continue
   fi
 
-  apply_patches "$dist_src" "$rv_cli" "$rs_root" "$scope"
+  # Pool full: wait for the oldest running job before starting another
+  if [ ${#RUNNING[@]} -ge "$JOBS" ]; then
+    reap_job "${RUNNING[0]}"
+    RUNNING=("${RUNNING[@]:1}")
+  fi
+
+  if [ -n "$PROFILE_OUT" ]; then
+    export CFP_PROFILE="$WORK_DIR/$i.profile.json"
+  fi
+  apply_patches "$dist_src" "$rv_cli" "$rs_root" "$scope" > "$WORK_DIR/$i.out" 2>&1 &
+  PIDS[$i]=$!
+  RUNNING+=("$i")
+done
+
+for i in ${RUNNING[@]+"${RUNNING[@]}"}; do
+  reap_job "$i"
 done
 
+# ── Collected output + combined summary ──
+
+n_patched=0; n_failed=0; n_skipped=0; total_applied=0; total_present=0
+for i in "${!INSTALLS[@]}"; do
+  cat "$WORK_DIR/$i.out"
+  case "${STATUS[$i]}" in
+    skip) n_skipped=$((n_skipped + 1)); continue ;;
+    0)    n_patched=$((n_patched + 1)) ;;
+    *)
+      n_failed=$((n_failed + 1))
+      IFS=$'\t' read -r scope dist_src _ <<< "${INSTALLS[$i]}"
+      echo "[$scope] FAILED (exit ${STATUS[$i]}): $dist_src"
+      echo ""
+      ;;
+  esac
+  done_line="$(grep -E '\] Done: [0-9]+ applied, [0-9]+ already present' "$WORK_DIR/$i.out" | tail -1 || true)"
+  if [[ "$done_line" =~ Done:\ ([0-9]+)\ applied,\ ([0-9]+)\ already ]]; then
+    total_applied=$((total_applied + BASH_REMATCH[1]))
+    total_present=$((total_present + BASH_REMATCH[2]))
+  fi
+done
+
+# ── Profile report: one JSON document covering every patched install ──
+
+if [ -n "$PROFILE_OUT" ]; then
+  PROFILES=()
+  for i in "${!INSTALLS[@]}"; do
+    [ -f "$WORK_DIR/$i.profile.json" ] && PROFILES+=("$WORK_DIR/$i.profile.json")
+  done
+  python3 - "$PROFILE_OUT" ${PROFILES[@]+"${PROFILES[@]}"} <<'PY' || echo "[PATCHES] WARN: profile report not written to $PROFILE_OUT"
+import json, sys
+installs = []
+for path in sys.argv[2:]:
+    try:
+        with open(path) as f:
+            installs.append(json.load(f))
+    except (OSError, ValueError):
+        pass
+with open(sys.argv[1], "w") as f:
+    json.dump({"installs": installs}, f, indent=2)
+print(f"[PATCHES] Profile: {len(installs)} install(s) written to {sys.argv[1]}")
+PY
+fi
+
+echo "[PATCHES] Summary: ${#INSTALLS[@]} install(s), $n_patched patched, $n_failed failed, $n_skipped skipped (jobs: $JOBS) — $total_applied applied, $total_present already present"
 echo "[PATCHES] Complete"
+
+[ "$n_failed" -eq 0 ]
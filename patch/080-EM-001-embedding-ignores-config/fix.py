@@ -1,6 +1,28 @@
 # EM-001: Embedding system ignores project config (model + HNSW dims)
 # Merged from old patches 8 (config-driven model) + 9 (HNSW dimension fix)
 
+# --- Old Patch 8, upgrade: micro-batched pipeline (EM-003) ---
+# Patch 8 now hands the pipeline to EM-003's _batchEmbedder() when it exists.
+# Installs patched before that carry the plain `model: embedder,` line, which
+# this rewrites in place.
+_EM001_MODEL_OLD = """            const embedder = await pipeline('feature-extraction', xenovaModel);
+            embeddingModelState = {
+                loaded: true,
+                model: embedder,"""
+_EM001_MODEL_NEW = """            const embedder = await pipeline('feature-extraction', xenovaModel);
+            embeddingModelState = {
+                loaded: true,
+                model: typeof _batchEmbedder === 'function' ? _batchEmbedder(embedder) : embedder, // EM-003b: batched forward passes"""
+if MI:
+    try:
+        _code = read_file(MI)
+        if _EM001_MODEL_OLD in _code:
+            write_file(MI, _code.replace(_EM001_MODEL_OLD, _EM001_MODEL_NEW, 1))
+            print("  Applied: 8a: batched embedding pipeline")
+            applied += 1
+    except FileNotFoundError:
+        pass
+
 # --- Old Patch 8: Config-driven embedding model loader ---
 patch("8: config-driven model",
     MI,
@@ -50,7 +72,7 @@ patch("8: config-driven model",
             const embedder = await pipeline('feature-extraction', xenovaModel);
             embeddingModelState = {
                 loaded: true,
-                model: embedder,
+                model: typeof _batchEmbedder === 'function' ? _batchEmbedder(embedder) : embedder, // EM-003b: batched forward passes
                 tokenizer: null,
                 dimensions: modelDimensions
             };
@@ -1,17 +1,16 @@
 # GV-001: Remove HNSW ghost vectors on memory delete
 # GitHub: #1122
-# After SQLite soft-delete, remove entry from persisted HNSW metadata file
-# and in-memory map. Each CLI invocation is a fresh process so hnswIndex is
-# usually null — the file-based cleanup is the primary path.
+# After SQLite soft-delete, log the entry id in the HNSW tombstone log (GV-002)
+# and remove it from the in-memory map. Each CLI invocation is a fresh process
+# so hnswIndex is usually null — the tombstone log is the primary path.
+# Without GV-002 the id is filtered out of hnsw.metadata.json instead.
 # 1 op
 
-patch("GV-001: remove HNSW entry on delete",
-    MI,
-    """        // Get remaining count
-        const countResult = db.exec(`SELECT COUNT(*) FROM memory_entries WHERE status = 'active'`);
-        const remainingEntries = countResult[0]?.values?.[0]?.[0] || 0;
-        // Save updated database""",
-    """        // Remove ghost vector from HNSW metadata file
+# ── Op A0: upgrade the delete block of an earlier GV-001 ──
+# GV-001 used to rewrite hnsw.metadata.json on every delete. Its block is
+# inserted above stock text that stays in the file, so a changed block would be
+# inserted a second time; this rewrites the old form in place first.
+_GV001_OLD = """        // Remove ghost vector from HNSW metadata file
         const entryId = String(checkResult[0].values[0][0]);
         try {
             const swarmDir = path.join(process.cwd(), '.swarm');
@@ -23,7 +22,42 @@ patch("GV-001: remove HNSW entry on delete",
                     fs.writeFileSync(metadataPath, JSON.stringify(filtered));
                 }
             }
-        } catch { /* best-effort */ }
+        } catch { /* best-effort */ }"""
+_GV001_NEW = """        // Remove ghost vector from HNSW metadata: logged as a tombstone (GV-002),
+        // or filtered out of the metadata file when the log is not available
+        const entryId = String(checkResult[0].values[0][0]);
+        if (typeof _appendTombstone === 'function') {
+            _appendTombstone(entryId);
+        } else {
+            try {
+                const swarmDir = path.join(process.cwd(), '.swarm');
+                const metadataPath = path.join(swarmDir, 'hnsw.metadata.json');
+                if (fs.existsSync(metadataPath)) {
+                    const metadata = JSON.parse(fs.readFileSync(metadataPath, 'utf-8'));
+                    const filtered = metadata.filter(([id]) => id !== entryId);
+                    if (filtered.length < metadata.length) {
+                        fs.writeFileSync(metadataPath, JSON.stringify(filtered));
+                    }
+                }
+            } catch { /* best-effort */ }
+        }"""
+if MI:
+    try:
+        _code = read_file(MI)
+        if _GV001_OLD in _code:
+            write_file(MI, _code.replace(_GV001_OLD, _GV001_NEW, 1))
+            print("  Applied: GV-001a0: tombstone append for the earlier delete block")
+            applied += 1
+    except FileNotFoundError:
+        pass
+
+patch("GV-001: remove HNSW entry on delete",
+    MI,
+    """        // Get remaining count
+        const countResult = db.exec(`SELECT COUNT(*) FROM memory_entries WHERE status = 'active'`);
+        const remainingEntries = countResult[0]?.values?.[0]?.[0] || 0;
+        // Save updated database""",
+    _GV001_NEW + """
         // Also clear in-memory index if loaded
         if (hnswIndex?.entries?.has(entryId)) {
             hnswIndex.entries.delete(entryId);
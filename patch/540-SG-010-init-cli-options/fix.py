@@ -350,8 +350,7 @@ patch("SG-010h: add CLI examples for topology and hooks options",
 # MUST run before ops i1-i3 so defaultScope is added to the single surviving block.
 import re as _re
 try:
-    with open(INIT_CMD, 'r') as _f:
-        _c = _f.read()
+    _c = read_file(INIT_CMD)
     _sig = '    // SG-010b: Wire CLI flags into options.runtime/options.mcp\n'
     _n = _c.count(_sig)
     if _n > 1:
@@ -361,8 +360,7 @@ try:
         _dedup_pat = _re.compile(r'(' + _block + r')(?:' + _block + r')+')
         _new_c = _dedup_pat.sub(r'\1', _c)
         if _new_c != _c:
-            with open(INIT_CMD, 'w') as _f:
-                _f.write(_new_c)
+            write_file(INIT_CMD, _new_c)
             _n2 = _new_c.count(_sig)
             print(f"  Applied: SG-010j: deduplicate SG-010b wiring ({_n} → {_n2})")
         else:
@@ -160,11 +160,15 @@ patch("WM-008g2: replace v2 agentdb config with v3 RVF + learning config",
                     dbPath: agentDbPath,
                     vectorDimension: modelDimensions,
                     vectorBackend: 'rvf',
+                    namespaceIndexes: agentdbCfg.namespaceIndexes === true, // WM-021a: per-namespace sub-indexes
                     enableLearning: agentdbCfg.enableLearning !== false,
                     learningPositiveThreshold: agentdbCfg.learningPositiveThreshold ?? 0.7,
                     learningNegativeThreshold: agentdbCfg.learningNegativeThreshold ?? 0.3,
                     learningBatchSize: agentdbCfg.learningBatchSize ?? 32,
                     learningTickInterval: agentdbCfg.learningTickInterval ?? 30000,
+                    // WM-020a: Stored-vector quantization; search re-ranks rerankFactor x k candidates
+                    quantization: ['int8', 'pq', 'binary'].includes(agentdbCfg.quantization) ? agentdbCfg.quantization : 'none',
+                    rerankFactor: Number.isFinite(agentdbCfg.rerankFactor) && agentdbCfg.rerankFactor >= 1 ? agentdbCfg.rerankFactor : 4,
                 };
             }""")
 
@@ -185,11 +189,15 @@ patch("WM-008h: add agentdb v3 config subsection to config.json template",
             // WM-008h: AgentDB v3 self-learning config
             agentdb: {
                 vectorBackend: 'rvf',
+                namespaceIndexes: !!(options.runtime.agentdbNamespaceIndexes ?? false), // WM-021b
                 enableLearning: !!(options.runtime.enableAgentdbLearning ?? true),
                 learningPositiveThreshold: options.runtime.agentdbPositiveThreshold ?? 0.7,
                 learningNegativeThreshold: options.runtime.agentdbNegativeThreshold ?? 0.3,
                 learningBatchSize: options.runtime.agentdbBatchSize ?? 32,
                 learningTickInterval: options.runtime.agentdbTickInterval ?? 30000,
+                // WM-020b: 'none' | 'int8' (4x) | 'pq' (8-16x) | 'binary' (32x)
+                quantization: options.runtime.agentdbQuantization ?? 'none',
+                rerankFactor: options.runtime.agentdbRerankFactor ?? 4,
             },
         },
         neural: {""")
@@ -76,8 +76,7 @@ export async function recordSearchFeedback(entryId, quality) {""")
 # We use raw Python with re.sub to collapse duplicate blocks.
 if MCP_HOOKS:
     try:
-        with open(MCP_HOOKS, 'r') as _f:
-            _hooks_code = _f.read()
+        _hooks_code = read_file(MCP_HOOKS)
         _dirty = False
 
         # Case 1: Remove old null-based WM-011b block (from pre-fix patch version)
@@ -126,8 +125,7 @@ async function getReasoningBankInstance() {
             print(f"  Applied: WM-011b-cleanup2: collapsed {_count} duplicate ReasoningBank blocks to 1")
 
         if _dirty:
-            with open(MCP_HOOKS, 'w') as _f:
-                _f.write(_hooks_code)
+            write_file(MCP_HOOKS, _hooks_code)
             applied += 1
     except FileNotFoundError:
         pass
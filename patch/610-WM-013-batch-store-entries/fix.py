@@ -0,0 +1,166 @@
+# WM-013: Batched storeEntries API for the HybridBackend adapter
+# 2 ops: storeEntries() in memory-initializer.js + memory_store_batch MCP tool
+
+# ── Op A: storeEntries() next to the WM-001b storeEntry adapter ──
+# Inserted just above searchEntries (its signature line is stock upstream text).
+# Embeddings for the whole batch are requested in one pass (_embedBatch), then
+# the entries go to HybridBackend.bulkInsert() -- one SQLite transaction and a
+# bulk AgentDB/HNSW insert -- instead of one store() round trip per entry.
+patch("WM-013a: storeEntries batched HybridBackend adapter",
+    MI,
+    """export async function searchEntries(options) {
+    const { query, namespace = 'all', limit = 10, threshold = 0.3, dbPath: customPath } = options;""",
+    """// WM-013a: Embed a batch of texts in one pass (null where embedding failed;
+// the backend's own embeddingGenerator then covers that entry)
+async function _embedBatch(texts) {
+    return Promise.all(texts.map(text => generateEmbedding(text).then(
+        r => (r && r.embedding ? new Float32Array(r.embedding) : null),
+        () => null)));
+}
+// WM-013a: Batched store -- one embedding pass, one transaction, bulk HNSW insert.
+// entries: [{ key, value, namespace, tags, ttl, upsert }] (same shape as storeEntry)
+// Returns { success, stored, results } with one { success, id, error? } per entry.
+export async function storeEntries(entries) {
+    if (!Array.isArray(entries)) throw new Error('storeEntries: entries must be an array');
+    const results = new Array(entries.length);
+    const fail = (e) => ({ success: false, id: '', error: e instanceof Error ? e.message : String(e) });
+    const summary = () => {
+        const stored = results.filter(r => r.success).length;
+        return { success: stored === results.length, stored, results };
+    };
+    if (!_hybridBackend || !_createDefaultEntry) {
+        // sql.js / memory backends have no bulk path
+        for (let i = 0; i < entries.length; i++) {
+            try { results[i] = await storeEntry(entries[i]); } catch (e) { results[i] = fail(e); }
+        }
+        return summary();
+    }
+    const pending = [];
+    for (let i = 0; i < entries.length; i++) {
+        const { key, value, namespace, tags = [], ttl, upsert = false } = entries[i] || {};
+        if (!key) { results[i] = fail('storeEntries: key is required'); continue; }
+        if (!namespace || namespace === 'all') {
+            results[i] = fail('storeEntries: namespace is required (cannot be "all")');
+            continue;
+        }
+        try {
+            if (upsert) {
+                const existing = await _hybridBackend.getByKey(namespace, key);
+                if (existing) {
+                    existing.content = value;
+                    existing.tags = tags || [];
+                    existing.updatedAt = new Date().toISOString();
+                    await _hybridBackend.update(existing.id, existing);
+                    results[i] = { success: true, id: existing.id };
+                    continue;
+                }
+            }
+            const entry = _createDefaultEntry();
+            entry.namespace = namespace;
+            entry.key = key;
+            entry.content = value;
+            entry.tags = tags || [];
+            entry.metadata = {};
+            entry.references = [];
+            if (ttl) entry.expiresAt = new Date(Date.now() + ttl * 1000).toISOString();
+            pending.push({ index: i, entry });
+        } catch (e) {
+            results[i] = fail(e);
+        }
+    }
+    if (pending.length === 0) return summary();
+    const vectors = await _embedBatch(pending.map(p => String(p.entry.content ?? '')));
+    vectors.forEach((v, j) => { if (v) pending[j].entry.embedding = v; });
+    if (typeof _hybridBackend.bulkInsert === 'function') {
+        try {
+            await _hybridBackend.bulkInsert(pending.map(p => p.entry));
+            for (const p of pending) results[p.index] = { success: true, id: p.entry.id };
+        } catch (e) {
+            // SQLite rolls the whole transaction back -- nothing in this batch was stored
+            for (const p of pending) results[p.index] = fail(e);
+        }
+    } else {
+        for (const p of pending) {
+            try {
+                await _hybridBackend.store(p.entry);
+                results[p.index] = { success: true, id: p.entry.id };
+            } catch (e) {
+                results[p.index] = fail(e);
+            }
+        }
+    }
+    return summary();
+}
+export async function searchEntries(options) {
+    const { query, namespace = 'all', limit = 10, threshold = 0.3, dbPath: customPath } = options;""")
+
+# ── Op B: memory_store_batch MCP tool ──
+# Registered first in memoryTools; entries are validated per item, so one bad
+# entry is reported in its result instead of failing the whole call.
+patch("WM-013b: memory_store_batch MCP tool",
+    MCP_MEMORY,
+    """export const memoryTools = [""",
+    """export const memoryTools = [
+    // WM-013b: Batch variant of memory_store (one embedding pass, one transaction)
+    {
+        name: 'memory_store_batch',
+        description: 'Store many entries in one call (batched embeddings, single transaction)',
+        category: 'memory',
+        inputSchema: {
+            type: 'object',
+            properties: {
+                entries: {
+                    type: 'array',
+                    description: 'Entries to store',
+                    items: {
+                        type: 'object',
+                        properties: {
+                            key: { type: 'string', description: 'Memory key' },
+                            value: { description: 'Value to store (string or JSON)' },
+                            namespace: { type: 'string', description: 'Namespace (e.g. "patterns", "solutions", "tasks")' },
+                            tags: { type: 'array', items: { type: 'string' }, description: 'Optional tags' },
+                            ttl: { type: 'number', description: 'Time to live in seconds' },
+                            upsert: { type: 'boolean', description: 'Update the entry if the key already exists' },
+                        },
+                        required: ['key', 'value', 'namespace'],
+                    },
+                },
+            },
+            required: ['entries'],
+        },
+        handler: async (input) => {
+            await ensureInitialized();
+            const { storeEntries } = await import('../memory/memory-initializer.js');
+            const entries = (Array.isArray(input.entries) ? input.entries : []).map(e => ({
+                key: e?.key,
+                namespace: e?.namespace,
+                value: typeof e?.value === 'string' ? e.value : JSON.stringify(e?.value),
+                tags: e?.tags || [],
+                ttl: e?.ttl,
+                upsert: e?.upsert === true,
+            }));
+            const startTime = performance.now();
+            try {
+                const result = await storeEntries(entries);
+                return {
+                    success: result.success,
+                    stored: result.stored,
+                    total: entries.length,
+                    results: result.results.map((r, i) => ({
+                        key: entries[i].key,
+                        namespace: entries[i].namespace,
+                        ...r,
+                    })),
+                    duration: `${(performance.now() - startTime).toFixed(2)}ms`,
+                };
+            }
+            catch (error) {
+                return {
+                    success: false,
+                    stored: 0,
+                    total: entries.length,
+                    error: error instanceof Error ? error.message : 'Unknown error',
+                };
+            }
+        },
+    },""")
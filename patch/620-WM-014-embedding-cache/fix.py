@@ -0,0 +1,190 @@
+# WM-014: Persistent content-addressed embedding cache
+# 2 ops: cache in front of generateEmbedding() + counters in `memory stats`
+
+# ── Op A: wrap generateEmbedding() with an LRU + SQLite cache ──
+# The stock function is renamed to _generateEmbeddingUncached() (only its
+# signature line is matched, so any body -- EM-001 patched or not -- works).
+# Every embedding in memory-initializer.js goes through generateEmbedding():
+# the HybridBackend embeddingGenerator (WM-001), the sql.js searchEntries path,
+# hook / ReasoningBank-fallback stores and WM-013's _embedBatch.
+# Vectors are only persisted while the ONNX model is loaded, so hash-fallback
+# vectors never shadow real ones after @xenova/transformers becomes available.
+patch("WM-014a: content-addressed embedding cache in front of generateEmbedding",
+    MI,
+    """export async function generateEmbedding(text) {""",
+    """// WM-014a: Content-addressed embedding cache -- in-process LRU backed by
+// .swarm/embedding-cache.db, keyed by sha256(model, dimension, text)
+const _EMB_CACHE_LRU_MAX = 2000;
+const _EMB_CACHE_DISK_MAX = 200000;
+const _embCacheLru = new Map();
+const _embCacheSession = { memoryHits: 0, diskHits: 0, misses: 0 };
+const _embCacheUnflushed = { hits: 0, misses: 0 };
+let _embCacheModelKey = null;
+let _embCacheDisk = null;
+let _embCacheHash = null;
+let _embCachePuts = 0;
+function _embCacheModel() {
+    if (_embCacheModelKey) return _embCacheModelKey;
+    // Same source as EM-001's loadEmbeddingModel
+    let modelName = 'all-MiniLM-L6-v2';
+    let dimensions = 384;
+    try {
+        const embConfigPath = path.join(process.cwd(), '.claude-flow', 'embeddings.json');
+        if (fs.existsSync(embConfigPath)) {
+            const embConfig = JSON.parse(fs.readFileSync(embConfigPath, 'utf-8'));
+            if (embConfig.model) {
+                modelName = embConfig.model;
+                dimensions = embConfig.dimension || 768;
+            }
+        }
+    } catch { /* use defaults */ }
+    _embCacheModelKey = `${modelName}:${dimensions}`;
+    return _embCacheModelKey;
+}
+async function _embCacheKey(text) {
+    if (!_embCacheHash) {
+        const { createHash } = await import('node:crypto');
+        _embCacheHash = (s) => createHash('sha256').update(s).digest('hex');
+    }
+    return _embCacheHash(`${_embCacheModel()}\\0${text}`);
+}
+function _embCacheFlush(c) {
+    if (!_embCacheUnflushed.hits && !_embCacheUnflushed.misses) return;
+    try {
+        c.db.transaction(() => {
+            c.bump.run('hits', _embCacheUnflushed.hits);
+            c.bump.run('misses', _embCacheUnflushed.misses);
+        })();
+        _embCacheUnflushed.hits = 0;
+        _embCacheUnflushed.misses = 0;
+    } catch { /* counters are best-effort */ }
+}
+function _embCacheOpen() {
+    // better-sqlite3 ships with @claude-flow/memory; without it only the LRU tier is used
+    if (!_embCacheDisk) {
+        _embCacheDisk = (async () => {
+            try {
+                const { default: Database } = await import('better-sqlite3');
+                const swarmDir = path.join(process.cwd(), '.swarm');
+                if (!fs.existsSync(swarmDir)) fs.mkdirSync(swarmDir, { recursive: true });
+                const db = new Database(path.join(swarmDir, 'embedding-cache.db'));
+                db.pragma('journal_mode = WAL');
+                db.pragma('busy_timeout = 5000');
+                db.exec(`CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY, model TEXT NOT NULL, dims INTEGER NOT NULL,
+                    vector BLOB NOT NULL, created_at INTEGER NOT NULL);
+                    CREATE INDEX IF NOT EXISTS embeddings_created ON embeddings(created_at);
+                    CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)`);
+                const c = {
+                    db,
+                    get: db.prepare('SELECT model, dims, vector FROM embeddings WHERE key = ?'),
+                    put: db.prepare('INSERT OR REPLACE INTO embeddings (key, model, dims, vector, created_at) VALUES (?, ?, ?, ?, ?)'),
+                    bump: db.prepare('INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value'),
+                };
+                process.on('exit', () => { _embCacheFlush(c); try { db.close(); } catch {} });
+                return c;
+            } catch {
+                return null;
+            }
+        })();
+    }
+    return _embCacheDisk;
+}
+function _embCacheRemember(key, value) {
+    _embCacheLru.delete(key);
+    _embCacheLru.set(key, value);
+    if (_embCacheLru.size > _EMB_CACHE_LRU_MAX) _embCacheLru.delete(_embCacheLru.keys().next().value);
+}
+export async function generateEmbedding(text) {
+    const key = await _embCacheKey(String(text ?? ''));
+    const cached = _embCacheLru.get(key);
+    if (cached) {
+        _embCacheSession.memoryHits++;
+        _embCacheUnflushed.hits++;
+        _embCacheRemember(key, cached);
+        return { embedding: Array.from(cached.vector), dimensions: cached.vector.length, model: cached.model };
+    }
+    const disk = await _embCacheOpen();
+    if (disk) {
+        try {
+            const row = disk.get.get(key);
+            if (row) {
+                const vector = new Float32Array(row.vector.buffer.slice(row.vector.byteOffset, row.vector.byteOffset + row.dims * 4));
+                _embCacheSession.diskHits++;
+                _embCacheUnflushed.hits++;
+                _embCacheRemember(key, { vector, model: row.model });
+                return { embedding: Array.from(vector), dimensions: row.dims, model: row.model };
+            }
+        } catch { /* fall through to the model */ }
+    }
+    _embCacheSession.misses++;
+    _embCacheUnflushed.misses++;
+    const result = await _generateEmbeddingUncached(text);
+    if (result && result.embedding && result.embedding.length && embeddingModelState && embeddingModelState.model) {
+        const vector = Float32Array.from(result.embedding);
+        const model = result.model || _embCacheModel();
+        _embCacheRemember(key, { vector, model });
+        if (disk) {
+            try {
+                disk.put.run(key, model, vector.length, Buffer.from(vector.buffer), Date.now());
+                if (_embCachePuts++ % 500 === 0) {
+                    const { n } = disk.db.prepare('SELECT COUNT(*) AS n FROM embeddings').get();
+                    if (n > _EMB_CACHE_DISK_MAX) {
+                        disk.db.prepare('DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY created_at LIMIT ?)')
+                            .run(n - _EMB_CACHE_DISK_MAX);
+                    }
+                }
+            } catch { /* cache write is best-effort */ }
+        }
+    }
+    return result;
+}
+// WM-014a: Cache counters for `memory stats` (totals persist across processes)
+export async function getEmbeddingCacheStats() {
+    const session = { ..._embCacheSession };
+    const stats = {
+        model: _embCacheModel(),
+        memoryEntries: _embCacheLru.size,
+        diskEntries: null,
+        session,
+        hits: session.memoryHits + session.diskHits,
+        misses: session.misses,
+    };
+    const disk = await _embCacheOpen();
+    if (disk) {
+        try {
+            _embCacheFlush(disk);
+            stats.diskEntries = disk.db.prepare('SELECT COUNT(*) AS n FROM embeddings').get().n;
+            const counters = Object.fromEntries(disk.db.prepare('SELECT name, value FROM counters').all().map(r => [r.name, r.value]));
+            stats.hits = counters.hits || 0;
+            stats.misses = counters.misses || 0;
+        } catch { /* report session counters only */ }
+    }
+    const lookups = stats.hits + stats.misses;
+    stats.hitRate = lookups ? stats.hits / lookups : 0;
+    return stats;
+}
+async function _generateEmbeddingUncached(text) {""")
+
+# ── Op B: show the counters in `memory stats` ──
+# An `after` hook on the stats subcommand (lib/common.py extend_memory_command),
+# so its own output is left untouched; with --format json the counters are
+# added to the returned data instead of printed.
+extend_memory_command("WM-014b: embedding cache counters in memory stats",
+    "// WM-014b: Embedding cache counters in `memory stats`",
+    """
+_extendMemorySubcommand('stats', {
+    after: async (ctx, result) => {
+        const { getEmbeddingCacheStats } = await import('../memory/memory-initializer.js');
+        if (typeof getEmbeddingCacheStats !== 'function') return result;
+        const s = await getEmbeddingCacheStats();
+        if (ctx.flags?.format === 'json') {
+            if (result && typeof result === 'object') result.data = { ...(result.data || {}), embeddingCache: s };
+        } else {
+            output.printInfo(`Embedding cache (${s.model}): ${s.hits} hits, ${s.misses} misses `
+                + `(${(s.hitRate * 100).toFixed(1)}% hit rate), ${s.diskEntries ?? 0} vectors on disk`);
+        }
+        return result;
+    },
+});
+""")
@@ -0,0 +1,68 @@
+# EM-003: Batched transformer inference in the loadEmbeddingModel pipeline
+# 1 op: micro-batching wrapper. EM-001's config-driven loader hands its
+#       pipeline to _batchEmbedder() when this op has been applied (EM-003b).
+
+# ── Op A: _batchEmbedder() helper above loadEmbeddingModel ──
+# Wraps a feature-extraction pipeline. Single-string calls arriving within
+# batchWindowMs (default 5) share one forward pass of up to batchSize (default
+# 32) texts; each caller gets its own pooled row. Both knobs come from
+# .claude-flow/embeddings.json. Anything else (arrays, non-strings) and a lone
+# queued text go straight to the pipeline, so results are unchanged.
+patch("EM-003a: micro-batching wrapper for the embedding pipeline",
+    MI,
+    """export async function loadEmbeddingModel(options) {""",
+    """// EM-003a: Micro-batch concurrent single-text calls into one forward pass
+function _batchEmbedder(embedder) {
+    let windowMs = 5;
+    let maxBatch = 32;
+    try {
+        const embConfigPath = path.join(process.cwd(), '.claude-flow', 'embeddings.json');
+        if (fs.existsSync(embConfigPath)) {
+            const embConfig = JSON.parse(fs.readFileSync(embConfigPath, 'utf-8'));
+            if (Number.isFinite(embConfig.batchWindowMs)) windowMs = Math.max(0, embConfig.batchWindowMs);
+            if (Number.isInteger(embConfig.batchSize) && embConfig.batchSize > 0) maxBatch = embConfig.batchSize;
+        }
+    } catch { /* use defaults */ }
+    const queues = new Map(); // JSON(options) -> { items, timer }
+    const single = async (item, options) => {
+        try { item.resolve(await embedder(item.text, options)); } catch (e) { item.reject(e); }
+    };
+    const flush = async (optKey, options) => {
+        const q = queues.get(optKey);
+        if (!q) return;
+        queues.delete(optKey);
+        clearTimeout(q.timer);
+        if (q.items.length === 1) return single(q.items[0], options);
+        try {
+            // Pooled output for n inputs is one [n, dim] tensor
+            const output = await embedder(q.items.map(i => i.text), options);
+            const dim = output.dims[output.dims.length - 1];
+            q.items.forEach((item, i) => item.resolve({
+                data: output.data.slice(i * dim, (i + 1) * dim),
+                dims: [1, dim],
+                type: output.type,
+                size: dim,
+            }));
+        } catch {
+            // Retry one by one so a bad input only fails its own caller
+            for (const item of q.items) await single(item, options);
+        }
+    };
+    const batched = (input, options) => {
+        if (typeof input !== 'string' || maxBatch <= 1) return embedder(input, options);
+        const optKey = JSON.stringify(options || {});
+        return new Promise((resolve, reject) => {
+            let q = queues.get(optKey);
+            if (!q) {
+                q = { items: [], timer: setTimeout(() => flush(optKey, options), windowMs) };
+                queues.set(optKey, q);
+            }
+            q.items.push({ text: input, resolve, reject });
+            if (q.items.length >= maxBatch) flush(optKey, options);
+        });
+    };
+    // Pipeline properties (tokenizer, model, dispose) stay reachable
+    Object.setPrototypeOf(batched, embedder);
+    return batched;
+}
+export async function loadEmbeddingModel(options) {""")
@@ -0,0 +1,119 @@
+# WM-015: SQLite FTS5 keyword index for the HybridBackend searchEntries adapter
+# 3 ops: index + BM25 query helpers, index setup at init, keyword path in searchEntries
+
+# ── Op A: _ensureKeywordIndex() / _keywordSearch() above the storeEntry adapter ──
+# memory_entries_fts is an external-content FTS5 table over memory_entries
+# (key, content) in hybrid-memory.db. Triggers keep it in step with every
+# insert, update and delete in the same transaction as the row change, so it
+# is never rebuilt after the first backfill. Queries join back to
+# memory_entries by rowid, so a result always reflects the current row.
+patch("WM-015a: FTS5 keyword index and BM25 search helpers",
+    MI,
+    """export async function storeEntry(options) {""",
+    """// WM-015a: FTS5 keyword index over hybrid-memory.db (external content on
+// memory_entries, kept in sync by triggers) and a BM25-ranked lookup
+let _keywordIndexDb = null;
+const _keywordStmts = new Map();
+function _ensureKeywordIndex(db) {
+    try {
+        const hasEntries = db.prepare("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_entries'").get();
+        if (!hasEntries) return false;
+        // INSERT OR REPLACE only fires the delete trigger with recursive_triggers on;
+        // without it the index would keep the replaced row's text
+        db.pragma('recursive_triggers = ON');
+        db.transaction(() => {
+            const exists = db.prepare("SELECT 1 FROM sqlite_master WHERE name = 'memory_entries_fts'").get();
+            db.exec(`CREATE VIRTUAL TABLE IF NOT EXISTS memory_entries_fts USING fts5(
+                    key, content, content='memory_entries', content_rowid='rowid');
+                CREATE TRIGGER IF NOT EXISTS memory_entries_fts_ai AFTER INSERT ON memory_entries BEGIN
+                    INSERT INTO memory_entries_fts(rowid, key, content) VALUES (new.rowid, new.key, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS memory_entries_fts_ad AFTER DELETE ON memory_entries BEGIN
+                    INSERT INTO memory_entries_fts(memory_entries_fts, rowid, key, content) VALUES ('delete', old.rowid, old.key, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS memory_entries_fts_au AFTER UPDATE OF key, content ON memory_entries BEGIN
+                    INSERT INTO memory_entries_fts(memory_entries_fts, rowid, key, content) VALUES ('delete', old.rowid, old.key, old.content);
+                    INSERT INTO memory_entries_fts(rowid, key, content) VALUES (new.rowid, new.key, new.content);
+                END`);
+            // One-time backfill of rows written before the index existed
+            if (!exists) db.exec("INSERT INTO memory_entries_fts(memory_entries_fts) VALUES ('rebuild')");
+        })();
+        _keywordIndexDb = db;
+        _keywordStmts.clear();
+        return true;
+    } catch {
+        // SQLite built without FTS5 (or a foreign schema) -- searchEntries keeps its scan fallback
+        _keywordIndexDb = null;
+        return false;
+    }
+}
+// Returns null when the index is unavailable, else results shaped like searchEntries'
+// but with full ids (callers shorten them for output). Rows come back in BM25 order;
+// score keeps the old fallback's scale (0.5 x share of query words present) so the
+// caller's threshold means the same thing.
+function _keywordSearch(query, ns, limit, threshold) {
+    if (!_keywordIndexDb) return null;
+    const words = [...new Set(String(query || '').toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || [])];
+    if (words.length === 0) return [];
+    const sqlKey = ns ? 'ns' : 'all';
+    let stmt = _keywordStmts.get(sqlKey);
+    try {
+        if (!stmt) {
+            stmt = _keywordIndexDb.prepare(`SELECT e.id, e.key, e.content, e.namespace
+                FROM memory_entries_fts JOIN memory_entries e ON e.rowid = memory_entries_fts.rowid
+                WHERE memory_entries_fts MATCH ?${ns ? ' AND e.namespace = ?' : ''}
+                ORDER BY bm25(memory_entries_fts) LIMIT ?`);
+            _keywordStmts.set(sqlKey, stmt);
+        }
+        // Each word is a quoted phrase, so FTS5 query syntax in user input is inert
+        const match = words.map(w => `"${w}"`).join(' OR ');
+        const rows = ns ? stmt.all(match, ns, limit * 4) : stmt.all(match, limit * 4);
+        return rows.map(r => {
+            const text = `${r.key || ''} ${r.content || ''}`.toLowerCase();
+            const matchCount = words.filter(w => text.includes(w)).length;
+            return {
+                id: r.id || '',
+                key: r.key || (r.id || '').substring(0, 15),
+                content: (r.content || '').substring(0, 60) + ((r.content || '').length > 60 ? '...' : ''),
+                score: matchCount / words.length * 0.5,
+                namespace: r.namespace || 'default'
+            };
+        }).filter(r => r.score >= threshold);
+    } catch {
+        return null;
+    }
+}
+export async function storeEntry(options) {""")
+
+# ── Op B: create / attach the index when the HybridBackend starts ──
+# Runs in every process that opens hybrid-memory.db through initializeMemoryDatabase,
+# so recursive_triggers is on for each connection that writes entries.
+patch("WM-015b: attach FTS5 keyword index at HybridBackend init",
+    MI,
+    """                    sqliteBackend.db.pragma('busy_timeout = 5000');
+                }
+            } catch {}""",
+    """                    sqliteBackend.db.pragma('busy_timeout = 5000');
+                    _ensureKeywordIndex(sqliteBackend.db); // WM-015b
+                }
+            } catch {}""")
+
+# ── Op C: query the index instead of scanning for the keyword fallback ──
+# The structured-query scan (first `limit` rows of the namespace, substring
+# filtered in JS) now only runs when the index could not be set up.
+patch("WM-015c: BM25 keyword fallback in searchEntries",
+    MI,
+    """            // Keyword fallback if semantic returns nothing
+            if (results.length === 0) {
+                try {
+                    const structured = await _hybridBackend.query({""",
+    """            // WM-015c: Keyword fallback via the FTS5 index (BM25 ranked)
+            let keywordResults = null;
+            if (results.length === 0) {
+                keywordResults = _keywordSearch(query, ns, limit, threshold);
+                if (keywordResults) results = keywordResults.map(r => ({ ...r, id: r.id.substring(0, 12) }));
+            }
+            // Keyword fallback if semantic returns nothing (no FTS5 index)
+            if (results.length === 0 && !keywordResults) {
+                try {
+                    const structured = await _hybridBackend.query({""")
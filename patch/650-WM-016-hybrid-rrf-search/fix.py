@@ -0,0 +1,128 @@
+# WM-016: mode 'hybrid' for searchEntries / memory_search (reciprocal-rank fusion)
+# 4 ops: fusion helpers + searchEntries branch (memory-initializer.js),
+#        pass mode through + advertise it in the memory_search schema (memory-tools.js)
+
+# ── Op A: _hybridSearch() next to WM-015's keyword index helpers ──
+# Inserted above the WM-015a block (it calls _keywordSearch). The HNSW query is
+# started first; the synchronous FTS5 query runs while the query embedding is
+# being computed, then both ranked lists are fused:
+#   score(d) = sum over lists of weight / (rrfK + rank(d))
+# Weights, k and candidate depth come from .claude-flow/config.json
+# memory.hybridSearch and are normalised so first place in every list scores 1.
+# The HNSW leg asks for `depth` hits (k) filtered to the namespace, and drops
+# any hit from another namespace in case the vector index ignores the filter.
+# Both lists are merged on full entry ids; ids are shortened for output only.
+patch("WM-016a: reciprocal-rank fusion of HNSW and FTS5 results",
+    MI,
+    """// WM-015a: FTS5 keyword index over hybrid-memory.db (external content on""",
+    """// WM-016a: Hybrid search -- HNSW and FTS5 keyword queries run concurrently
+// and are merged with weighted reciprocal-rank fusion (memory.hybridSearch)
+let _hybridSearchCfg = null;
+function _hybridSearchConfig() {
+    if (_hybridSearchCfg) return _hybridSearchCfg;
+    const cfg = { semanticWeight: 1, keywordWeight: 1, rrfK: 60, candidateMultiplier: 4 };
+    try {
+        const cfgPath = path.join(process.cwd(), '.claude-flow', 'config.json');
+        if (fs.existsSync(cfgPath)) {
+            const hs = JSON.parse(fs.readFileSync(cfgPath, 'utf-8')).memory?.hybridSearch || {};
+            for (const k of Object.keys(cfg)) {
+                if (Number.isFinite(hs[k]) && hs[k] >= 0) cfg[k] = hs[k];
+            }
+        }
+    } catch { /* use defaults */ }
+    _hybridSearchCfg = cfg;
+    return cfg;
+}
+async function _hybridSearch(query, ns, limit, threshold) {
+    const { semanticWeight, keywordWeight, rrfK, candidateMultiplier } = _hybridSearchConfig();
+    const depth = Math.max(limit, Math.ceil(limit * candidateMultiplier));
+    const semanticQuery = semanticWeight > 0
+        ? _hybridBackend.querySemantic({
+            content: query, k: depth, threshold, filters: ns ? { namespace: ns } : undefined
+        }).catch(() => [])
+        : Promise.resolve([]);
+    const keyword = keywordWeight > 0 ? (_keywordSearch(query, ns, depth, threshold) || []) : [];
+    // The vector index may not apply the namespace filter; hits from other namespaces are dropped
+    const semantic = (await semanticQuery || []).filter(r => !ns || (r.namespace || 'default') === ns).map(r => ({
+        id: r.id || '',
+        key: r.key || (r.id || '').substring(0, 15),
+        content: (r.content || '').substring(0, 60) + ((r.content || '').length > 60 ? '...' : ''),
+        namespace: r.namespace || 'default'
+    }));
+    // Keyed on full ids: generated ids share long prefixes, so only the output is shortened
+    const fused = new Map();
+    const add = (list, weight) => list.forEach((r, rank) => {
+        const hit = fused.get(r.id) || { ...r, score: 0 };
+        hit.score += weight / (rrfK + rank + 1);
+        fused.set(r.id, hit);
+    });
+    add(semantic, semanticWeight);
+    add(keyword, keywordWeight);
+    const best = (semanticWeight + keywordWeight) / (rrfK + 1);
+    return [...fused.values()]
+        .sort((a, b) => b.score - a.score)
+        .slice(0, limit)
+        .map(r => ({ ...r, id: r.id.substring(0, 12), score: best > 0 ? r.score / best : 0 }));
+}
+// WM-015a: FTS5 keyword index over hybrid-memory.db (external content on""")
+
+# ── Op B: searchEntries({ mode: 'hybrid' }) takes the fusion path ──
+# Any other mode keeps the semantic-then-keyword-fallback behaviour.
+patch("WM-016b: searchEntries mode 'hybrid'",
+    MI,
+    """            const ns = namespace === 'all' ? undefined : namespace;
+            // Try semantic search first""",
+    """            const ns = namespace === 'all' ? undefined : namespace;
+            // WM-016b: mode 'hybrid' -- one concurrent HNSW + keyword pass, RRF merged
+            if (options.mode === 'hybrid') {
+                const fusedResults = await _hybridSearch(query, ns, limit, threshold);
+                return { success: true, results: fusedResults, searchTime: Date.now() - startTime, mode: 'hybrid' };
+            }
+            // Try semantic search first""")
+
+# ── Op C: memory_search passes `mode` through ──
+patch("WM-016c: memory_search forwards mode to searchEntries",
+    MCP_MEMORY,
+    """                const result = await searchEntries({
+                    query,
+                    namespace,
+                    limit,
+                    threshold,
+                });""",
+    """                const result = await searchEntries({
+                    query,
+                    namespace,
+                    limit,
+                    threshold,
+                    mode: input.mode, // WM-016c
+                });""")
+
+# ── Op D: add `mode` to the memory_search input schema ──
+# Raw op: appended once, guarded by its marker comment (the schema text itself
+# is left alone so other patches matching it are unaffected).
+_WM016D_MARKER = "// WM-016d: memory_search `mode` input"
+_WM016D_BLOCK = _WM016D_MARKER + """
+{
+    const _searchTool = memoryTools.find(t => t && t.name === 'memory_search');
+    if (_searchTool) {
+        _searchTool.inputSchema = _searchTool.inputSchema || { type: 'object', properties: {} };
+        _searchTool.inputSchema.properties = _searchTool.inputSchema.properties || {};
+        _searchTool.inputSchema.properties.mode = {
+            type: 'string',
+            enum: ['semantic', 'hybrid'],
+            description: 'semantic (default): vector search, keyword fallback. hybrid: vector + keyword search merged by reciprocal-rank fusion',
+        };
+    }
+}
+"""
+if MCP_MEMORY:
+    try:
+        _code = read_file(MCP_MEMORY)
+        if _WM016D_MARKER in _code:
+            skipped += 1
+        else:
+            write_file(MCP_MEMORY, _code.rstrip("\n") + "\n" + _WM016D_BLOCK)
+            print("  Applied: WM-016d: memory_search mode in input schema")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: WM-016d: mcp-tools/memory-tools.js not found")
@@ -0,0 +1,187 @@
+# WM-017: Per-namespace entry counts maintained in hybrid-memory.db
+# 6 ops: counter table + cache, set up at init, listEntries / deleteEntry totals,
+#        doStatus total, recursive_triggers on hook connections, `memory stats`
+
+# ── Op A: counter table, cache and getNamespaceCounts() above listEntries ──
+# memory_namespace_counts(namespace, entries) is maintained by triggers on
+# memory_entries, so every store / delete / namespace move updates it in the
+# same transaction -- including bulkInsert and the auto-memory bridge.
+# The in-process copy is reloaded only when PRAGMA data_version (another
+# connection committed) or total_changes() (this connection wrote) moves.
+patch("WM-017a: per-namespace counter table and cache",
+    MI,
+    """export async function listEntries(options) {""",
+    """// WM-017a: Per-namespace entry counts kept by triggers in hybrid-memory.db
+// (memory_namespace_counts) plus an in-process cache -- O(1) totals
+let _nsCounts = null;
+function _ensureNamespaceCounts(db) {
+    try {
+        const hasEntries = db.prepare("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memory_entries'").get();
+        if (!hasEntries) return false;
+        // INSERT OR REPLACE only fires the delete trigger with recursive_triggers on;
+        // without it a replaced row would be counted twice
+        db.pragma('recursive_triggers = ON');
+        db.transaction(() => {
+            const exists = db.prepare("SELECT 1 FROM sqlite_master WHERE name = 'memory_namespace_counts'").get();
+            db.exec(`CREATE TABLE IF NOT EXISTS memory_namespace_counts (
+                    namespace TEXT PRIMARY KEY, entries INTEGER NOT NULL DEFAULT 0);
+                CREATE TRIGGER IF NOT EXISTS memory_namespace_counts_ai AFTER INSERT ON memory_entries BEGIN
+                    INSERT INTO memory_namespace_counts (namespace, entries) VALUES (new.namespace, 1)
+                        ON CONFLICT(namespace) DO UPDATE SET entries = entries + 1;
+                END;
+                CREATE TRIGGER IF NOT EXISTS memory_namespace_counts_ad AFTER DELETE ON memory_entries BEGIN
+                    UPDATE memory_namespace_counts SET entries = entries - 1 WHERE namespace = old.namespace;
+                END;
+                CREATE TRIGGER IF NOT EXISTS memory_namespace_counts_au AFTER UPDATE OF namespace ON memory_entries
+                    WHEN old.namespace IS NOT new.namespace BEGIN
+                    UPDATE memory_namespace_counts SET entries = entries - 1 WHERE namespace = old.namespace;
+                    INSERT INTO memory_namespace_counts (namespace, entries) VALUES (new.namespace, 1)
+                        ON CONFLICT(namespace) DO UPDATE SET entries = entries + 1;
+                END`);
+            // One-time backfill of rows written before the table existed
+            if (!exists) {
+                db.exec(`INSERT INTO memory_namespace_counts (namespace, entries)
+                    SELECT namespace, COUNT(*) FROM memory_entries GROUP BY namespace`);
+            }
+        })();
+        _nsCounts = {
+            db,
+            cache: null,
+            stamp: null,
+            changes: db.prepare('SELECT total_changes() AS n'),
+            all: db.prepare('SELECT namespace, entries FROM memory_namespace_counts WHERE entries > 0 ORDER BY namespace'),
+        };
+        return true;
+    } catch {
+        // Foreign schema or read-only database -- callers fall back to count()
+        _nsCounts = null;
+        return false;
+    }
+}
+// namespace -> entries, or null when the counter table is unavailable
+function _namespaceCounts() {
+    const c = _nsCounts;
+    if (!c) return null;
+    try {
+        const stamp = `${c.db.pragma('data_version', { simple: true })}:${c.changes.get().n}`;
+        if (stamp !== c.stamp) {
+            c.cache = new Map(c.all.all().map(r => [r.namespace, r.entries]));
+            c.stamp = stamp;
+        }
+        return c.cache;
+    } catch {
+        return null;
+    }
+}
+function _namespaceCount(ns) {
+    const counts = _namespaceCounts();
+    if (!counts) return null;
+    if (ns) return counts.get(ns) || 0;
+    let total = 0;
+    for (const n of counts.values()) total += n;
+    return total;
+}
+// WM-017a: Entry totals for `memory stats` -- reads the counter table directly
+// when the HybridBackend was not initialised in this process
+export async function getNamespaceCounts() {
+    let counts = _namespaceCounts();
+    if (!counts) {
+        try {
+            const dbPath = path.join(process.cwd(), '.swarm', 'hybrid-memory.db');
+            if (!fs.existsSync(dbPath)) return null;
+            const { default: Database } = await import('better-sqlite3');
+            const db = new Database(dbPath, { readonly: true, fileMustExist: true });
+            try {
+                if (!db.prepare("SELECT 1 FROM sqlite_master WHERE name = 'memory_namespace_counts'").get()) return null;
+                counts = new Map(db.prepare('SELECT namespace, entries FROM memory_namespace_counts WHERE entries > 0 ORDER BY namespace')
+                    .all().map(r => [r.namespace, r.entries]));
+            } finally {
+                db.close();
+            }
+        } catch {
+            return null;
+        }
+    }
+    let total = 0;
+    for (const n of counts.values()) total += n;
+    return { total, namespaces: Object.fromEntries(counts) };
+}
+export async function listEntries(options) {""")
+
+# ── Op B: create / attach the counter table when the HybridBackend starts ──
+patch("WM-017b: attach namespace counters at HybridBackend init",
+    MI,
+    """                    sqliteBackend.db.pragma('busy_timeout = 5000');
+""",
+    """                    sqliteBackend.db.pragma('busy_timeout = 5000');
+                    _ensureNamespaceCounts(sqliteBackend.db); // WM-017b
+""")
+
+# ── Op C: listEntries total from the counters ──
+patch("WM-017c: listEntries total from namespace counters",
+    MI,
+    """            const count = await _hybridBackend.count(ns);""",
+    """            const count = _namespaceCount(ns) ?? await _hybridBackend.count(ns); // WM-017c""")
+
+# ── Op D: deleteEntry remainingEntries from the counters (both branches) ──
+patch_all("WM-017d: deleteEntry remaining count from namespace counters",
+    MI,
+    """const count = await _hybridBackend.count(namespace);""",
+    """const count = _namespaceCount(namespace) ?? await _hybridBackend.count(namespace); // WM-017d""")
+
+# ── Op E: auto-memory doStatus() total from the counters ──
+# Targets WM-003c's generated doStatus(); falls back to count() on databases
+# created before WM-017.
+patch("WM-017e: doStatus entry total from namespace counters",
+    HELPERS_GEN,
+    """        const count = await backend.count();
+        bridgeInfo = { entries: count || 0 };""",
+    """        const sqlBe = backend.getSQLiteBackend?.();
+        const counted = sqlBe?.db?.prepare("SELECT 1 FROM sqlite_master WHERE name = 'memory_namespace_counts'").get()
+          ? sqlBe.db.prepare('SELECT COALESCE(SUM(entries), 0) AS n FROM memory_namespace_counts').get().n
+          : null;
+        const count = counted ?? await backend.count(); // WM-017e
+        bridgeInfo = { entries: count || 0 };""")
+
+# ── Op F: recursive_triggers on the auto-memory hook's connections ──
+# The hook writes hybrid-memory.db through its own HybridBackend; its REPLACE
+# upserts must fire the delete triggers too (also keeps WM-015's index exact).
+patch_all("WM-017f: recursive_triggers on generated hook connections",
+    HELPERS_GEN,
+    """if (sqlBe && sqlBe.db) sqlBe.db.pragma('busy_timeout = 5000');""",
+    """if (sqlBe && sqlBe.db) { sqlBe.db.pragma('busy_timeout = 5000'); sqlBe.db.pragma('recursive_triggers = ON'); }""")
+patch_all("WM-017f: recursive_triggers on source hook connections",
+    SRC_AUTO_MEMORY_HOOK,
+    """if (sqlBe?.db) sqlBe.db.pragma('busy_timeout = 5000');""",
+    """if (sqlBe?.db) { sqlBe.db.pragma('busy_timeout = 5000'); sqlBe.db.pragma('recursive_triggers = ON'); }""")
+patch_all("WM-017f: recursive_triggers on source hook connections (createBackend variant)",
+    SRC_AUTO_MEMORY_HOOK,
+    """if (sb?.db) sb.db.pragma('busy_timeout = 5000');""",
+    """if (sb?.db) { sb.db.pragma('busy_timeout = 5000'); sb.db.pragma('recursive_triggers = ON'); }""")
+
+# ── Op G: `memory stats` totals from the counter table ──
+# Wraps the stats subcommand (lib/common.py extend_memory_command): the totals
+# come from memory_namespace_counts and the stock action, which counts every
+# row, only runs when the table is not available.
+extend_memory_command("WM-017g: memory stats from per-namespace counts",
+    "// WM-017g: Per-namespace entry counts in `memory stats`",
+    """
+_extendMemorySubcommand('stats', {
+    wrap: async (ctx, stats) => {
+        let counts = null;
+        try {
+            const { getNamespaceCounts } = await import('../memory/memory-initializer.js');
+            if (typeof getNamespaceCounts === 'function') counts = await getNamespaceCounts();
+        } catch { /* stock stats */ }
+        if (!counts) return stats(ctx);
+        const data = { totalEntries: counts.total, namespaces: counts.namespaces, source: 'memory_namespace_counts' };
+        if (ctx.flags?.format === 'json') {
+            output.writeln(JSON.stringify(data, null, 2));
+        } else {
+            output.writeln(`Entries: ${counts.total}`);
+            for (const [ns, n] of Object.entries(counts.namespaces)) output.writeln(`  ${ns}: ${n}`);
+        }
+        return { success: true, data };
+    },
+});
+""")
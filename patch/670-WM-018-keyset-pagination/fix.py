@@ -0,0 +1,216 @@
+# WM-018: Keyset-pagination cursors for listEntries, memory_list and `memory list`
+# 7 ops: keyset helpers, listEntries adapter (2), memory_list handler + schema,
+#        CLI list branch + flags
+
+# ── Op A: keyset page helpers + listEntriesPage() above getEntry ──
+# Pages are read from memory_entries in (updated_at, id) descending order,
+# within one namespace or across all of them; the next page starts strictly
+# after the last row's key, so each page is one index range scan of
+# `limit + 1` rows however deep it is. The indexes are created on first use.
+# Column names are taken from PRAGMA table_info, so both snake_case and
+# camelCase SQLiteBackend schemas work.
+patch("WM-018a: keyset pagination helpers",
+    MI,
+    """export async function getEntry(options) {""",
+    """// WM-018a: Keyset pagination over memory_entries by (updated_at, id), within one
+// namespace or across all. Cursors are opaque base64url tokens: [scope namespace, updated_at, id]
+let _keyset = null;
+function _keysetState(db, createIndex) {
+    const cols = new Set(db.prepare('PRAGMA table_info(memory_entries)').all().map(c => c.name));
+    const pick = (...names) => names.find(n => cols.has(n));
+    const updated = pick('updated_at', 'updatedAt');
+    if (!updated || !cols.has('id') || !cols.has('namespace') || !cols.has('key')) return null;
+    if (createIndex) {
+        db.exec(`CREATE INDEX IF NOT EXISTS memory_entries_ns_updated_id ON memory_entries(namespace, "${updated}", id)`);
+        db.exec(`CREATE INDEX IF NOT EXISTS memory_entries_updated_id ON memory_entries("${updated}", id)`);
+    }
+    const created = pick('created_at', 'createdAt');
+    const access = pick('access_count', 'accessCount');
+    const select = `SELECT id, key, namespace, content, "${updated}" AS updated_at`
+        + (created ? `, "${created}" AS created_at` : '')
+        + (access ? `, "${access}" AS access_count` : '')
+        + (cols.has('embedding') ? ', embedding IS NOT NULL AS has_embedding' : '')
+        + ' FROM memory_entries';
+    return {
+        ns: db.prepare(`${select} WHERE namespace = ? ORDER BY "${updated}" DESC, id DESC LIMIT ?`),
+        nsAfter: db.prepare(`${select} WHERE namespace = ? AND ("${updated}", id) < (?, ?) ORDER BY "${updated}" DESC, id DESC LIMIT ?`),
+        all: db.prepare(`${select} ORDER BY "${updated}" DESC, id DESC LIMIT ?`),
+        allAfter: db.prepare(`${select} WHERE ("${updated}", id) < (?, ?) ORDER BY "${updated}" DESC, id DESC LIMIT ?`),
+    };
+}
+function _keysetTime(v) {
+    if (v === null || v === undefined) return undefined;
+    const d = new Date(typeof v === 'string' && /^\\d+$/.test(v) ? Number(v) : v);
+    return isNaN(d.getTime()) ? String(v) : d.toISOString();
+}
+// Returns { rows, nextCursor } (rows shaped like MemoryEntry), or null when the
+// SQLite table is not reachable. Throws on a malformed or foreign cursor.
+function _keysetPage(stmts, ns, limit, cursor) {
+    let after = null;
+    if (cursor) {
+        try { after = JSON.parse(Buffer.from(String(cursor), 'base64url').toString('utf-8')); } catch {}
+        if (!Array.isArray(after) || after.length !== 3 || after[0] !== (ns || null)) {
+            throw new Error(`Invalid cursor for namespace '${ns || 'all'}'`);
+        }
+    }
+    const rows = ns
+        ? (after ? stmts.nsAfter.all(ns, after[1], after[2], limit + 1) : stmts.ns.all(ns, limit + 1))
+        : (after ? stmts.allAfter.all(after[1], after[2], limit + 1) : stmts.all.all(limit + 1));
+    const more = rows.length > limit;
+    if (more) rows.pop();
+    const last = rows[rows.length - 1];
+    return {
+        rows: rows.map(r => ({
+            id: r.id,
+            key: r.key,
+            namespace: r.namespace,
+            content: r.content,
+            accessCount: r.access_count || 0,
+            createdAt: _keysetTime(r.created_at),
+            updatedAt: _keysetTime(r.updated_at),
+            embedding: r.has_embedding ? true : undefined,
+        })),
+        nextCursor: more
+            ? Buffer.from(JSON.stringify([ns || null, last.updated_at, last.id])).toString('base64url')
+            : null,
+    };
+}
+function _hybridKeysetPage(ns, limit, cursor) {
+    if (!_keyset) {
+        try {
+            const db = _hybridBackend?.getSQLiteBackend?.()?.db;
+            _keyset = db ? _keysetState(db, true) : null;
+        } catch {
+            _keyset = null;
+        }
+        if (!_keyset) return null;
+    }
+    return _keysetPage(_keyset, ns, limit, cursor);
+}
+// WM-018a: One keyset page of hybrid-memory.db for the CLI; opens the database
+// read-only when the HybridBackend was not initialised in this process.
+export async function listEntriesPage(options = {}) {
+    const { namespace = 'all', limit = 20, cursor = null } = options;
+    const ns = namespace === 'all' ? undefined : namespace;
+    try {
+        let page = _hybridBackend ? _hybridKeysetPage(ns, limit, cursor) : null;
+        if (!page) {
+            const dbPath = path.join(process.cwd(), '.swarm', 'hybrid-memory.db');
+            if (!fs.existsSync(dbPath)) return { success: false, entries: [], nextCursor: null, error: 'hybrid-memory.db not found' };
+            const { default: Database } = await import('better-sqlite3');
+            const db = new Database(dbPath, { readonly: true, fileMustExist: true });
+            try {
+                const stmts = _keysetState(db, false);
+                if (!stmts) return { success: false, entries: [], nextCursor: null, error: 'memory_entries has no updated_at column' };
+                page = _keysetPage(stmts, ns, limit, cursor);
+            } finally {
+                db.close();
+            }
+        }
+        return { success: true, entries: page.rows, nextCursor: page.nextCursor };
+    } catch (e) {
+        return { success: false, entries: [], nextCursor: null, error: e instanceof Error ? e.message : String(e) };
+    }
+}
+export async function getEntry(options) {""")
+
+# ── Op B: listEntries adapter reads keyset pages ──
+# Used when a cursor is passed or `paged` is set; `limit`/`offset` calls keep
+# the old structured query, so offset pages are never mixed with keyset order.
+patch("WM-018b: listEntries keyset page",
+    MI,
+    """            // MUST pass type: 'structured' to force SQLite routing (offset works correctly)
+            const entries = await _hybridBackend.query({
+                namespace: ns, limit, offset, type: 'structured'
+            });""",
+    """            // WM-018b: Keyset page on (updated_at, id) -- O(limit) at any depth, for callers
+            // that page by cursor; offset pages keep the structured query so they do not mix orders
+            const page = (options.cursor || options.paged) ? _hybridKeysetPage(ns, limit, options.cursor) : null;
+            // MUST pass type: 'structured' to force SQLite routing (offset works correctly)
+            const entries = page ? page.rows : await _hybridBackend.query({
+                namespace: ns, limit, offset, type: 'structured'
+            });""")
+
+# ── Op C: listEntries returns the cursor for the next page ──
+patch("WM-018c: listEntries nextCursor",
+    MI,
+    """                total: count || 0
+            };""",
+    """                total: count || 0,
+                ...(page ? { nextCursor: page.nextCursor } : {}) // WM-018c
+            };""")
+
+# ── Op D: memory_list takes `paged` / `cursor` and returns nextCursor ──
+# Targets NS-001 (21d) handler text. Without the HybridBackend listEntries
+# returns no nextCursor and the offset listing below answers the call.
+patch("WM-018d: memory_list cursor pagination",
+    MCP_MEMORY,
+    """const { listEntries } = await getMemoryFunctions();
+            const namespace = input.namespace || 'all';
+            const limit = input.limit || 50;""",
+    """const { listEntries } = await getMemoryFunctions();
+            const namespace = input.namespace || 'all';
+            const limit = input.limit || 50;
+            // WM-018d: Keyset pages -- `paged: true` starts, the returned nextCursor continues as `cursor`
+            if (input.cursor || input.paged) {
+                const page = await listEntries({ namespace, limit, cursor: input.cursor || undefined, paged: true });
+                // An invalid cursor is reported, not answered with an offset listing
+                if (page && !page.success) throw new Error(page.error || 'memory_list failed');
+                if (page && page.nextCursor !== undefined) {
+                    return { entries: page.entries, total: page.total, limit, nextCursor: page.nextCursor };
+                }
+            }""")
+
+# ── Op E: advertise `cursor` and `paged` in the memory_list schema ──
+# Targets NS-001 (21c) schema text.
+patch("WM-018e: memory_list cursor input",
+    MCP_MEMORY,
+    """namespace: { type: 'string', description: 'Namespace to list (default: "all" = all namespaces)' },""",
+    """namespace: { type: 'string', description: 'Namespace to list (default: "all" = all namespaces)' },
+                cursor: { type: 'string', description: 'nextCursor from the previous page (keyset pagination)' },
+                paged: { type: 'boolean', description: 'Return the first keyset page and its nextCursor' },""")
+
+# ── Op F: `memory list --paged` / `--cursor <c>` ──
+# Targets NS-001 (21g) action text. Without either flag the sql.js listing is unchanged.
+patch("WM-018f: memory list keyset pages",
+    CLI_MEMORY,
+    """        const namespace = ctx.flags.namespace || 'all';
+        const limit = ctx.flags.limit;
+        // Use sql.js directly for consistent data access""",
+    """        const namespace = ctx.flags.namespace || 'all';
+        const limit = ctx.flags.limit;
+        // WM-018f: Keyset pages of hybrid-memory.db (--paged starts, --cursor continues)
+        if (ctx.flags.paged || ctx.flags.cursor) {
+            const { listEntriesPage } = await import('../memory/memory-initializer.js');
+            const page = await listEntriesPage({ namespace, limit: limit || 20, cursor: ctx.flags.cursor || null });
+            if (!page.success) {
+                output.printError(`Failed to list: ${page.error}`);
+                return { success: false, exitCode: 1, error: page.error };
+            }
+            if (ctx.flags.format === 'json') {
+                output.writeln(JSON.stringify(page, null, 2));
+                return { success: true, data: page };
+            }
+            for (const e of page.entries) {
+                output.writeln(`  ${e.namespace}/${e.key}  ${output.dim(`${(e.content || '').length}B  ${e.updatedAt || ''}`)}`);
+            }
+            output.writeln();
+            output.writeln(page.nextCursor
+                ? output.dim(`Next page: memory list --namespace ${namespace} --cursor ${page.nextCursor}`)
+                : output.dim(`${page.entries.length} entries (last page)`));
+            return { success: true, data: page };
+        }
+        // Use sql.js directly for consistent data access""")
+
+# ── Op G: declare --paged / --cursor on `memory list` ──
+# Flags added through the shared subcommand helper (lib/common.py extend_memory_command).
+extend_memory_command("WM-018g: memory list --paged / --cursor flags",
+    "// WM-018g: `memory list` keyset flags",
+    """
+_extendMemorySubcommand('list', {
+    options: [
+        { name: 'paged', description: 'Page through entries with a keyset cursor', type: 'boolean', default: false },
+        { name: 'cursor', description: 'Cursor printed by the previous --paged page', type: 'string' },
+    ],
+});
+""")
@@ -0,0 +1,253 @@
+# WM-019: Streaming NDJSON export / import for the HybridBackend memory store
+# 2 ops: exportEntries() / importEntries() in memory-initializer.js,
+#        `memory export` / `memory import` NDJSON commands in commands/memory.js
+
+# ── Op A: exportEntries() / importEntries() above the deleteEntry adapter ──
+# Export pages memory_entries by rowid (batchSize rows in memory at a time) and
+# yields one plain object per entry: columns in camelCase, tags / metadata /
+# references parsed, and with includeEmbeddings the vector as base64 float32.
+# Import takes any (async) iterable of those objects, skips ids already
+# present, embeds records without a usable vector in one pass per batch
+# (WM-013a's _embedBatch; one generateEmbedding() per record without WM-013),
+# and commits each batch with bulkInsert() -- one SQLite transaction plus a bulk
+# AgentDB/HNSW insert. onBatch() runs after every commit (resume checkpoints).
+patch("WM-019a: exportEntries / importEntries on the HybridBackend",
+    MI,
+    """export async function deleteEntry(options) {""",
+    """// WM-019a: Streaming NDJSON-ready export / batched import of hybrid-memory.db entries
+function _exportVector(v) {
+    if (v instanceof Uint8Array) {
+        if (v.byteLength % 4) return null;
+        return new Float32Array(new Uint8Array(v).buffer);
+    }
+    if (typeof v === 'string') {
+        try {
+            const a = JSON.parse(v);
+            return Array.isArray(a) ? Float32Array.from(a) : null;
+        } catch {
+            return null;
+        }
+    }
+    return null;
+}
+export async function* exportEntries(options = {}) {
+    const { namespace = 'all', includeEmbeddings = false, batchSize = 500 } = options;
+    const db = _hybridBackend?.getSQLiteBackend?.()?.db;
+    if (!db) throw new Error('exportEntries: HybridBackend SQLite store is not initialized');
+    const ns = namespace === 'all' ? undefined : namespace;
+    const stmt = db.prepare(`SELECT rowid AS _rowid, * FROM memory_entries WHERE rowid > ?${ns ? ' AND namespace = ?' : ''} ORDER BY rowid LIMIT ?`);
+    let after = 0;
+    for (;;) {
+        const rows = ns ? stmt.all(after, ns, batchSize) : stmt.all(after, batchSize);
+        if (rows.length === 0) return;
+        after = rows[rows.length - 1]._rowid;
+        for (const row of rows) {
+            const rec = {};
+            for (const [col, v] of Object.entries(row)) {
+                if (col === '_rowid' || v === null || v === undefined) continue;
+                const name = col.replace(/_([a-z])/g, (_, c) => c.toUpperCase());
+                if (name === 'embedding') {
+                    const vec = includeEmbeddings ? _exportVector(v) : null;
+                    if (vec) {
+                        rec.embedding = Buffer.from(vec.buffer, vec.byteOffset, vec.byteLength).toString('base64');
+                        rec.embeddingDimensions = vec.length;
+                    }
+                    continue;
+                }
+                if (typeof v === 'string' && (name === 'tags' || name === 'metadata' || name === 'references')) {
+                    try { rec[name] = JSON.parse(v); continue; } catch { /* keep raw text */ }
+                }
+                rec[name] = v instanceof Uint8Array ? Buffer.from(v).toString('base64') : v;
+            }
+            yield rec;
+        }
+    }
+}
+// records: (async) iterable of exportEntries() objects; null items are ignored.
+// Returns { imported, skipped, failed, consumed } (consumed = items read).
+export async function importEntries(records, options = {}) {
+    const { batchSize = 500, namespace, onBatch } = options;
+    if (!_hybridBackend || !_createDefaultEntry) throw new Error('importEntries: HybridBackend is not initialized');
+    const db = _hybridBackend.getSQLiteBackend?.()?.db;
+    const exists = db ? db.prepare('SELECT 1 FROM memory_entries WHERE id = ?') : null;
+    const dims = (embeddingModelState && embeddingModelState.dimensions) || null;
+    const stats = { imported: 0, skipped: 0, failed: 0, consumed: 0 };
+    let seen = 0;
+    let batch = [];
+    const flush = async () => {
+        if (batch.length > 0) {
+            const missing = batch.filter(e => !e.embedding);
+            const texts = missing.map(e => String(e.content ?? ''));
+            // One pass with WM-013a's _embedBatch; without WM-013 each entry is embedded on its own
+            let vectors;
+            if (typeof _embedBatch === 'function') {
+                vectors = await _embedBatch(texts);
+            } else {
+                vectors = [];
+                for (const text of texts) {
+                    const r = await generateEmbedding(text).catch(() => null);
+                    vectors.push(r && r.embedding ? new Float32Array(r.embedding) : null);
+                }
+            }
+            vectors.forEach((v, i) => { if (v) missing[i].embedding = v; });
+            try {
+                await _hybridBackend.bulkInsert(batch);
+                stats.imported += batch.length;
+            } catch {
+                // One bad entry rolls the transaction back -- store the batch one by one
+                for (const e of batch) {
+                    try { await _hybridBackend.store(e); stats.imported++; } catch { stats.failed++; }
+                }
+            }
+            batch = [];
+        }
+        stats.consumed = seen;
+        if (onBatch) await onBatch({ ...stats });
+    };
+    for await (const rec of records) {
+        seen++;
+        if (rec === null || rec === undefined) continue;
+        if (typeof rec !== 'object' || !rec.key || !(namespace || rec.namespace)) { stats.failed++; continue; }
+        if (rec.id && exists && exists.get(rec.id)) { stats.skipped++; continue; }
+        const entry = _createDefaultEntry();
+        for (const [k, v] of Object.entries(rec)) {
+            if (k !== 'embedding' && k !== 'embeddingDimensions' && v !== undefined) entry[k] = v;
+        }
+        if (namespace) entry.namespace = namespace;
+        entry.tags = entry.tags || [];
+        entry.metadata = entry.metadata || {};
+        entry.references = entry.references || [];
+        delete entry.embedding;
+        if (typeof rec.embedding === 'string') {
+            const buf = Buffer.from(rec.embedding, 'base64');
+            const vec = buf.byteLength % 4 ? null : new Float32Array(new Uint8Array(buf).buffer);
+            // Vectors from another model / dimension are re-embedded instead
+            if (vec && (!dims || vec.length === dims)) entry.embedding = vec;
+        }
+        batch.push(entry);
+        if (batch.length >= batchSize) await flush();
+    }
+    await flush();
+    return stats;
+}
+export async function deleteEntry(options) {""")
+
+# ── Op B: `memory export` / `memory import` NDJSON commands ──
+# Registered through the shared subcommand helper (lib/common.py
+# extend_memory_command). An existing export / import subcommand keeps its own
+# format and only hands over for `--format ndjson` or a *.ndjson file;
+# otherwise the subcommands are added.
+extend_memory_command("WM-019b: NDJSON memory export / import",
+    "// WM-019b: NDJSON `memory export` / `memory import`",
+    """
+{
+    const _isNdjson = (ctx, file) => ctx.flags?.format === 'ndjson' || /\\.ndjson$/i.test(String(file || ''));
+    const _initHybrid = async () => {
+        const mi = await import('../memory/memory-initializer.js');
+        const init = await mi.initializeMemoryDatabase({});
+        if (!init || !init.success) throw new Error(init?.error || 'memory initialization failed');
+        if (typeof mi.exportEntries !== 'function') throw new Error('memory-initializer has no NDJSON support');
+        return mi;
+    };
+    const _exportFile = (ctx) => ctx.flags.output || ctx.args?.[0];
+    const _importFile = (ctx) => ctx.args?.[0] || ctx.flags.input || ctx.flags.file;
+    const _ndjsonExport = async (ctx) => {
+        const file = _exportFile(ctx);
+        const fs = await import('node:fs');
+        const { once } = await import('node:events');
+        let out = null;
+        let exported = 0;
+        try {
+            const { exportEntries } = await _initHybrid();
+            out = file ? fs.createWriteStream(file) : process.stdout;
+            const records = exportEntries({
+                namespace: ctx.flags.namespace || 'all',
+                includeEmbeddings: !!ctx.flags.embeddings,
+            });
+            for await (const rec of records) {
+                if (!out.write(JSON.stringify(rec) + '\\n')) await once(out, 'drain');
+                exported++;
+            }
+        } catch (e) {
+            output.printError(`Export failed: ${e instanceof Error ? e.message : String(e)}`);
+            return { success: false, exitCode: 1 };
+        } finally {
+            if (file && out) await new Promise(resolve => out.end(resolve));
+        }
+        if (file) output.printSuccess(`Exported ${exported} entries to ${file}`);
+        return { success: true, data: { exported, file: file || null } };
+    };
+    const _ndjsonImport = async (ctx) => {
+        const file = _importFile(ctx);
+        if (!file) {
+            output.printError('Usage: memory import <file.ndjson> [--resume] [--batch-size <n>] [--namespace <ns>]');
+            return { success: false, exitCode: 1 };
+        }
+        const fs = await import('node:fs');
+        const readline = await import('node:readline');
+        if (!fs.existsSync(file)) {
+            output.printError(`File not found: ${file}`);
+            return { success: false, exitCode: 1 };
+        }
+        // Resume state: input lines committed so far, valid while the file size is unchanged
+        const statePath = `${file}.import-state.json`;
+        const size = fs.statSync(file).size;
+        let skip = 0;
+        if (ctx.flags.resume && fs.existsSync(statePath)) {
+            try {
+                const state = JSON.parse(fs.readFileSync(statePath, 'utf-8'));
+                if (state.size === size) skip = state.consumed || 0;
+            } catch { /* start over */ }
+        }
+        const batchSize = Number(ctx.flags['batch-size'] ?? ctx.flags.batchSize) || 500;
+        let stats;
+        try {
+            const { importEntries } = await _initHybrid();
+            const lines = readline.createInterface({ input: fs.createReadStream(file, { encoding: 'utf-8' }), crlfDelay: Infinity });
+            const records = (async function* () {
+                let n = 0;
+                for await (const line of lines) {
+                    if (++n <= skip) continue;
+                    if (!line.trim()) { yield null; continue; }
+                    try { yield JSON.parse(line); } catch { yield 'invalid'; }
+                }
+            })();
+            if (skip) output.printInfo(`Resuming after line ${skip}`);
+            stats = await importEntries(records, {
+                batchSize,
+                namespace: ctx.flags.namespace || undefined,
+                onBatch: (s) => fs.writeFileSync(statePath, JSON.stringify({ size, consumed: skip + s.consumed })),
+            });
+        } catch (e) {
+            output.printError(`Import failed: ${e instanceof Error ? e.message : String(e)}`);
+            output.printInfo('Re-run with --resume to continue from the last committed batch');
+            return { success: false, exitCode: 1 };
+        }
+        try { fs.unlinkSync(statePath); } catch { /* no checkpoint written */ }
+        output.printSuccess(`Imported ${stats.imported} entries (${stats.skipped} already present, ${stats.failed} failed)`);
+        return { success: stats.failed === 0, data: stats };
+    };
+    _extendMemorySubcommand('export', {
+        description: 'Stream entries to NDJSON (one entry per line)',
+        options: [
+            { name: 'output', short: 'o', description: 'Output file (default: stdout)', type: 'string' },
+            { name: 'namespace', short: 'n', description: 'Namespace to export (default: all)', type: 'string' },
+            { name: 'embeddings', description: 'Include embeddings (base64 float32)', type: 'boolean', default: false },
+            { name: 'format', description: 'Export format (ndjson)', type: 'string' },
+        ],
+        action: _ndjsonExport,
+        wrap: (ctx, exportAction) => (_isNdjson(ctx, _exportFile(ctx)) ? _ndjsonExport(ctx) : exportAction(ctx)),
+    });
+    _extendMemorySubcommand('import', {
+        description: 'Import entries from an NDJSON export in batched transactions',
+        options: [
+            { name: 'resume', description: 'Continue from the last committed batch', type: 'boolean', default: false },
+            { name: 'batch-size', description: 'Entries per transaction (default: 500)', type: 'number' },
+            { name: 'namespace', short: 'n', description: 'Import every entry into this namespace', type: 'string' },
+            { name: 'format', description: 'Import format (ndjson)', type: 'string' },
+        ],
+        action: _ndjsonImport,
+        wrap: (ctx, importAction) => (_isNdjson(ctx, _importFile(ctx)) ? _ndjsonImport(ctx) : importAction(ctx)),
+    });
+}
+""")
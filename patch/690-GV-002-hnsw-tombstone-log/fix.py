@@ -0,0 +1,186 @@
+# GV-002: Append-only tombstone log for HNSW ghost-vector removal
+# 5 ops: tombstone log helpers + compaction, log append in the HybridBackend
+#        delete path (GV-001 appends in the sql.js one), tombstone filter around
+#        searchHNSWIndex / saveHNSWMetadata, compaction from the consolidate worker
+
+# ── Op A: tombstone log helpers + compactHNSWTombstones() ──
+# Deletes append their id to .swarm/hnsw.tombstones.log (O(1) instead of
+# GV-001's read-filter-rewrite of hnsw.metadata.json on every delete). A loaded
+# index drops newly logged ids from its entries Map before each search -- the
+# search loop already skips ids missing from the Map -- reading only the bytes
+# appended since the last search. Compaction renames the log aside (later
+# deletes start a fresh log), filters hnsw.metadata.json once and removes it;
+# a process that sees its log compacted re-checks its Map against that file.
+# Inserted above the stock embedding-model state, which no other op inserts at.
+patch("GV-002a: HNSW tombstone log helpers and compaction",
+    MI,
+    """let embeddingModelState = null;""",
+    """// GV-002a: Append-only tombstone log for HNSW deletes (.swarm/hnsw.tombstones.log)
+const _tombstoneApplied = new WeakMap(); // loaded HNSW index -> { ino, offset } of the log applied
+function _tombstonePath() {
+    return path.join(process.cwd(), '.swarm', 'hnsw.tombstones.log');
+}
+function _appendTombstone(id) {
+    try {
+        const swarmDir = path.join(process.cwd(), '.swarm');
+        if (!fs.existsSync(swarmDir)) fs.mkdirSync(swarmDir, { recursive: true });
+        fs.appendFileSync(_tombstonePath(), `${id}\\n`);
+    } catch { /* best-effort */ }
+}
+// Ids logged at or after byte `from`; a torn trailing line is left for the next read
+function _readTombstones(file, from = 0) {
+    let fd;
+    try { fd = fs.openSync(file, 'r'); } catch { return { ids: [], end: 0 }; }
+    try {
+        const size = fs.fstatSync(fd).size;
+        if (size <= from) return { ids: [], end: size };
+        const buf = Buffer.alloc(size - from);
+        fs.readSync(fd, buf, 0, buf.length, from);
+        const cut = buf.lastIndexOf(10) + 1;
+        return { ids: buf.toString('utf-8', 0, cut).split('\\n').filter(Boolean), end: from + cut };
+    } finally {
+        fs.closeSync(fd);
+    }
+}
+function _applyHNSWTombstones(index) {
+    if (!index?.entries) return;
+    const file = _tombstonePath();
+    let st = null;
+    try { st = fs.statSync(file); } catch { /* no deletes logged */ }
+    const ino = st ? st.ino : 0;
+    let state = _tombstoneApplied.get(index);
+    if (!state || ino !== state.ino || (st && st.size < state.offset)) {
+        if (state && state.ino) {
+            // The log this index was reading got compacted: ids it had not applied yet
+            // are only reflected in the rewritten metadata file (once per compaction)
+            try {
+                const metadataPath = path.join(process.cwd(), '.swarm', 'hnsw.metadata.json');
+                const kept = new Set(JSON.parse(fs.readFileSync(metadataPath, 'utf-8')).map(([id]) => id));
+                for (const id of [...index.entries.keys()]) if (!kept.has(id)) index.entries.delete(id);
+            } catch { /* keep the loaded entries */ }
+        }
+        // New index or a new log: replay it, plus a compaction still in flight
+        for (const id of _readTombstones(`${file}.compacting`).ids) index.entries.delete(id);
+        state = { ino, offset: 0 };
+    }
+    if (st && st.size > state.offset) {
+        const { ids, end } = _readTombstones(file, state.offset);
+        for (const id of ids) index.entries.delete(id);
+        state.offset = end;
+    }
+    _tombstoneApplied.set(index, state);
+}
+// Fold the log into hnsw.metadata.json once logged deletes reach `ratio` of the
+// indexed entries (config.json memory.tombstoneCompactRatio, default 0.1).
+export function compactHNSWTombstones(options = {}) {
+    const swarmDir = path.join(process.cwd(), '.swarm');
+    const file = _tombstonePath();
+    const work = `${file}.compacting`;
+    const metadataPath = path.join(swarmDir, 'hnsw.metadata.json');
+    let ratio = options.ratio;
+    if (!Number.isFinite(ratio)) {
+        ratio = 0.1;
+        try {
+            const cfgPath = path.join(process.cwd(), '.claude-flow', 'config.json');
+            if (fs.existsSync(cfgPath)) {
+                const r = JSON.parse(fs.readFileSync(cfgPath, 'utf-8')).memory?.tombstoneCompactRatio;
+                if (Number.isFinite(r) && r >= 0) ratio = r;
+            }
+        } catch { /* use default */ }
+    }
+    const result = { compacted: false, tombstones: 0, indexed: 0, ratio: 0, threshold: ratio };
+    try {
+        result.tombstones = _readTombstones(file).ids.length + _readTombstones(work).ids.length;
+        if (result.tombstones === 0) return result;
+        const metadata = fs.existsSync(metadataPath) ? JSON.parse(fs.readFileSync(metadataPath, 'utf-8')) : [];
+        result.indexed = metadata.length;
+        result.ratio = metadata.length ? result.tombstones / metadata.length : 1;
+        if (!options.force && result.ratio < ratio) return result;
+        _applyHNSWTombstones(hnswIndex);
+        // Deletes logged from here on go to a fresh log
+        if (!fs.existsSync(work) && fs.existsSync(file)) fs.renameSync(file, work);
+        const dead = new Set(_readTombstones(work).ids);
+        const filtered = metadata.filter(([id]) => !dead.has(id));
+        if (filtered.length < metadata.length) {
+            const tmp = `${metadataPath}.${process.pid}.tmp`;
+            fs.writeFileSync(tmp, JSON.stringify(filtered));
+            fs.renameSync(tmp, metadataPath);
+        }
+        fs.unlinkSync(work);
+        result.compacted = true;
+        result.removed = metadata.length - filtered.length;
+    } catch (e) {
+        result.error = e instanceof Error ? e.message : String(e);
+    }
+    return result;
+}
+let embeddingModelState = null;""")
+
+# ── Op C: HybridBackend delete path ──
+# Entries indexed before the switch to HybridBackend still sit in the
+# hnsw.metadata.json index used by searchHNSWIndex. The append is guarded so a
+# missing GV-002a cannot turn a completed delete into success: false.
+patch("GV-002c: log HybridBackend deletes as HNSW tombstones",
+    MI,
+    """            await _hybridBackend.delete(entry.id);
+""",
+    """            await _hybridBackend.delete(entry.id);
+            if (typeof _appendTombstone === 'function') _appendTombstone(entry.id); // GV-002c
+""")
+
+# ── Op D: filter searchHNSWIndex against the log ──
+# Raw op: the stock function is renamed to _searchHNSWIndexUnfiltered() (only
+# its signature is matched) and a wrapper that applies pending tombstones to
+# the loaded index takes its name, so every caller is covered.
+_GV002D_MARKER = "async function _searchHNSWIndexUnfiltered("
+if MI:
+    try:
+        _code = read_file(MI)
+        _m = re.search(r"^export async function searchHNSWIndex\(", _code, re.M)
+        if _GV002D_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: GV-002d: searchHNSWIndex not found")
+        else:
+            _wrapper = """// GV-002d: Drop tombstoned ids from the loaded index before searching
+export async function searchHNSWIndex(...args) {
+    if (!hnswIndex?.entries) await getHNSWIndex().catch(() => null);
+    _applyHNSWTombstones(hnswIndex);
+    return _searchHNSWIndexUnfiltered(...args);
+}
+""" + _GV002D_MARKER
+            write_file(MI, _code[:_m.start()] + _wrapper + _code[_m.end():])
+            print("  Applied: GV-002d: tombstone filter for searchHNSWIndex")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: GV-002d: memory-initializer.js not found")
+
+# ── Op E: apply tombstones before saveHNSWMetadata() dumps the Map ──
+# Otherwise an add in a process with an older Map would write ids deleted
+# elsewhere back into hnsw.metadata.json after they were compacted away.
+_GV002E_MARKER = "_applyHNSWTombstones(hnswIndex); // GV-002e"
+if MI:
+    try:
+        _code = read_file(MI)
+        _m = re.search(r"^(async )?function saveHNSWMetadata\([^)]*\)\s*\{\n", _code, re.M)
+        if _GV002E_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: GV-002e: saveHNSWMetadata not found")
+        else:
+            write_file(MI, _code[:_m.end()] + "    " + _GV002E_MARKER + "\n" + _code[_m.end():])
+            print("  Applied: GV-002e: apply tombstones before saving HNSW metadata")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: GV-002e: memory-initializer.js not found")
+
+# ── Op F: compaction from the consolidate worker ──
+# Targets DM-004's runConsolidateWorker; the result lands in consolidation.json.
+patch("GV-002f: compact HNSW tombstones in consolidate worker",
+    WD,
+    """            // 2. Rebuild HNSW index with current data
+""",
+    """            // GV-002f: Fold the tombstone log into hnsw.metadata.json past the ratio threshold
+            if (typeof mi.compactHNSWTombstones === 'function') result.tombstones = mi.compactHNSWTombstones();
+            // 2. Rebuild HNSW index with current data
+""")
@@ -0,0 +1,187 @@
+# DM-007: Incremental HNSW maintenance in the consolidate worker
+# 2 ops: syncHNSWIndex() in memory-initializer.js + use it in runConsolidateWorker
+
+# ── Op A: syncHNSWIndex() ──
+# A checkpoint next to the index metadata (.swarm/hnsw.checkpoint.json) holds
+# the (updated_at, id) high-water mark of memory.db rows already indexed. Each
+# run applies the tombstone log (GV-002), then only rows changed past the mark:
+# inactive rows leave the Map, new rows and rows whose content changed are
+# inserted. A graph-quality probe follows -- sampled active rows must be found
+# among their own nearest neighbours, and the share of vectors without
+# metadata (deleted / replaced) must stay low. Only when a probe crosses its
+# threshold (config.json memory.hnswMaintenance), or there is no usable
+# checkpoint, is the index rebuilt from memory.db as before.
+# Inserted above GV-002a's tombstone helpers (stable text after GV-002).
+patch("DM-007a: incremental syncHNSWIndex with quality-gated rebuild",
+    MI,
+    """// GV-002a: Append-only tombstone log for HNSW deletes (.swarm/hnsw.tombstones.log)""",
+    """// DM-007a: Incremental HNSW maintenance -- pending changes since the checkpoint,
+// full rebuild only when the graph-quality probe degrades
+function _hnswMaintenanceConfig() {
+    const cfg = { maxUnreachable: 0.05, maxDeadFraction: 0.25, probeSample: 32, batchSize: 500 };
+    try {
+        const cfgPath = path.join(process.cwd(), '.claude-flow', 'config.json');
+        if (fs.existsSync(cfgPath)) {
+            const hm = JSON.parse(fs.readFileSync(cfgPath, 'utf-8')).memory?.hnswMaintenance || {};
+            for (const k of Object.keys(cfg)) {
+                if (Number.isFinite(hm[k]) && hm[k] >= 0) cfg[k] = hm[k];
+            }
+        }
+    } catch { /* use defaults */ }
+    return cfg;
+}
+function _sqlRows(sqlDb, sql, params) {
+    const stmt = sqlDb.prepare(sql);
+    try {
+        stmt.bind(params);
+        const rows = [];
+        while (stmt.step()) rows.push(stmt.getAsObject());
+        return rows;
+    } finally {
+        stmt.free();
+    }
+}
+// memory.db embedding column -> Float32Array (JSON array text or a float32 blob)
+function _hnswRowVector(v) {
+    if (v instanceof Uint8Array) {
+        return v.byteLength % 4 ? null : new Float32Array(new Uint8Array(v).buffer);
+    }
+    if (typeof v === 'string') {
+        try {
+            const a = JSON.parse(v);
+            return Array.isArray(a) ? Float32Array.from(a) : null;
+        } catch {
+            return null;
+        }
+    }
+    return null;
+}
+async function _hnswQuality(index, sqlDb, sample) {
+    const quality = { vectors: null, deadFraction: 0, probed: 0, unreachable: 0, unreachableFraction: 0 };
+    try {
+        const vectors = await index.db.len();
+        quality.vectors = vectors;
+        if (vectors > index.entries.size) quality.deadFraction = (vectors - index.entries.size) / vectors;
+    } catch { /* length unavailable */ }
+    if (!sqlDb || !sample) return quality;
+    const probes = _sqlRows(sqlDb, `SELECT id, embedding FROM memory_entries
+        WHERE status = 'active' AND embedding IS NOT NULL ORDER BY RANDOM() LIMIT ?`, [sample]);
+    for (const row of probes) {
+        const vector = _hnswRowVector(row.embedding);
+        if (!vector || vector.length !== index.dimensions) continue;
+        const id = String(row.id);
+        quality.probed++;
+        // An active row must be in the Map and reachable from its own vector
+        let found = false;
+        if (index.entries.has(id)) {
+            try {
+                found = (await index.db.search({ vector, k: 10 })).some(r => String(r.id) === id);
+            } catch { /* counts as unreachable */ }
+        }
+        if (!found) quality.unreachable++;
+    }
+    quality.unreachableFraction = quality.probed ? quality.unreachable / quality.probed : 0;
+    return quality;
+}
+export async function syncHNSWIndex(options = {}) {
+    const cfg = _hnswMaintenanceConfig();
+    const swarmDir = path.join(process.cwd(), '.swarm');
+    const checkpointPath = path.join(swarmDir, 'hnsw.checkpoint.json');
+    const dbPath = options.dbPath || path.join(swarmDir, 'memory.db');
+    const result = { mode: 'incremental', inserted: 0, updated: 0, deleted: 0, indexed: 0 };
+    let checkpoint = null;
+    try { checkpoint = JSON.parse(fs.readFileSync(checkpointPath, 'utf-8')); } catch { /* first run */ }
+    let sqlDb = null;
+    try {
+        if (fs.existsSync(dbPath)) {
+            const initSqlJs = (await import('sql.js')).default;
+            const SQL = await initSqlJs();
+            sqlDb = new SQL.Database(fs.readFileSync(dbPath));
+        }
+        let index = await getHNSWIndex();
+        if (!index) return { ...result, mode: 'unavailable' };
+        let hw = checkpoint?.highWater || { updatedAt: 0, id: '' };
+        let rebuild = options.force ? 'forced'
+            : !checkpoint ? 'no checkpoint'
+            : checkpoint.dimensions !== index.dimensions ? 'dimensions changed'
+            : null;
+        if (!rebuild) {
+            const before = index.entries.size;
+            _applyHNSWTombstones(index);
+            result.deleted += before - index.entries.size;
+            for (let more = !!sqlDb; more;) {
+                const rows = _sqlRows(sqlDb, `SELECT id, key, namespace, content, embedding, status,
+                    COALESCE(updated_at, created_at, 0) AS hw FROM memory_entries
+                    WHERE COALESCE(updated_at, created_at, 0) > ? OR (COALESCE(updated_at, created_at, 0) = ? AND id > ?)
+                    ORDER BY hw, id LIMIT ?`, [hw.updatedAt, hw.updatedAt, hw.id, cfg.batchSize]);
+                more = rows.length === cfg.batchSize;
+                for (const row of rows) {
+                    const id = String(row.id);
+                    hw = { updatedAt: row.hw, id };
+                    if (row.status !== 'active') {
+                        if (index.entries.delete(id)) result.deleted++;
+                        continue;
+                    }
+                    const prev = index.entries.get(id);
+                    // Already indexed by the writing process (addToHNSWIndex)
+                    if (prev && prev.content === row.content) continue;
+                    const vector = _hnswRowVector(row.embedding);
+                    if (!vector || vector.length !== index.dimensions) continue;
+                    await index.db.insert({ id, vector });
+                    index.entries.set(id, { id, key: row.key || id, namespace: row.namespace || 'default', content: row.content || '' });
+                    if (prev) result.updated++;
+                    else result.inserted++;
+                }
+            }
+            if ((result.inserted || result.updated || result.deleted) && typeof saveHNSWMetadata === 'function') {
+                saveHNSWMetadata();
+            }
+            result.quality = await _hnswQuality(index, sqlDb, cfg.probeSample);
+            if (result.quality.unreachableFraction > cfg.maxUnreachable) rebuild = 'unreachable nodes';
+            else if (result.quality.deadFraction > cfg.maxDeadFraction) rebuild = 'dead vectors';
+        }
+        if (rebuild) {
+            clearHNSWIndex();
+            index = await getHNSWIndex({ forceRebuild: true });
+            if (!index) return { ...result, mode: 'unavailable', reason: rebuild };
+            result.mode = 'rebuild';
+            result.reason = rebuild;
+            // The rebuilt index reflects every delete logged so far
+            compactHNSWTombstones({ force: true });
+            const [last] = sqlDb ? _sqlRows(sqlDb, `SELECT id, COALESCE(updated_at, created_at, 0) AS hw
+                FROM memory_entries ORDER BY hw DESC, id DESC LIMIT 1`, []) : [];
+            hw = last ? { updatedAt: last.hw, id: String(last.id) } : { updatedAt: 0, id: '' };
+        }
+        result.indexed = index.entries.size;
+        result.highWater = hw;
+        const tmp = `${checkpointPath}.${process.pid}.tmp`;
+        fs.writeFileSync(tmp, JSON.stringify({
+            highWater: hw,
+            dimensions: index.dimensions,
+            indexed: result.indexed,
+            lastRebuild: rebuild ? new Date().toISOString() : checkpoint?.lastRebuild || null,
+            updatedAt: new Date().toISOString(),
+        }));
+        fs.renameSync(tmp, checkpointPath);
+    } catch (e) {
+        result.error = e instanceof Error ? e.message : String(e);
+    } finally {
+        if (sqlDb) sqlDb.close();
+    }
+    return result;
+}
+// GV-002a: Append-only tombstone log for HNSW deletes (.swarm/hnsw.tombstones.log)""")
+
+# ── Op B: consolidate worker -- sync instead of clear + forced rebuild ──
+# Targets DM-004's runConsolidateWorker (after GV-002f's compaction step).
+patch("DM-007b: incremental HNSW sync in consolidate worker",
+    WD,
+    """            // 2. Rebuild HNSW index with current data
+            mi.clearHNSWIndex();
+            const hnsw = await mi.getHNSWIndex({ forceRebuild: true });
+            if (hnsw) result.hnswRebuilt = hnsw.entries?.size ?? 0;""",
+    """            // 2. DM-007b: Bring the HNSW index up to date -- pending changes only,
+            // full rebuild when its quality probe degrades
+            const hnsw = await mi.syncHNSWIndex();
+            result.hnsw = hnsw;
+            if (hnsw.mode === 'rebuild') result.hnswRebuilt = hnsw.indexed;""")
@@ -0,0 +1,244 @@
+# EM-004: Binary load image for the HNSW metadata (.swarm/hnsw.metadata.bin)
+# 3 ops: binary image reader / writer, load through it in getHNSWIndex,
+#        write it whenever saveHNSWMetadata() writes the JSON
+
+# ── Op A: _HNSWMetadataView + image reader / writer ──
+# The image is read with one readFileSync into an (off-heap) Buffer. Ids sit in
+# a sorted fixed-width table, so lookups are a binary search over the buffer
+# and an entry's JSON is only parsed when that entry is accessed. The view
+# implements the Map API used on hnswIndex.entries (get / has / set / delete /
+# size / iteration); changes live in an overlay until the next save.
+# hnsw.metadata.json stays the file that is written (GV-002 compaction and the
+# GV-001 tooling read it); the header records its size, mtime and inode and an
+# image that no longer matches is rebuilt from it on the next load.
+# Inserted above DM-007a's maintenance helpers (stable text after DM-007).
+patch("EM-004a: binary HNSW metadata image",
+    MI,
+    """// DM-007a: Incremental HNSW maintenance -- pending changes since the checkpoint,""",
+    """// EM-004a: Binary load image of hnsw.metadata.json (.swarm/hnsw.metadata.bin).
+// Layout (little-endian): 64-byte header | id table [count x (u32 idOff, u32 idLen,
+// u32 entryOff, u32 entryLen)] sorted by id bytes | utf-8 heap of ids and entry JSON
+const _HNSW_BIN_MAGIC = 0x4e484643; // 'CFHN'
+const _HNSW_BIN_VERSION = 1;
+const _HNSW_BIN_HEADER = 64;
+class _HNSWMetadataView {
+    constructor(buf) {
+        this.buf = buf;
+        this.count = buf.readUInt32LE(8);
+        this.table = buf.readUInt32LE(12);
+        this.heap = buf.readUInt32LE(16);
+        this.overlay = new Map(); // entries set since load
+        this.removed = new Set(); // image ids deleted since load
+        this.decoded = new Map(); // slot -> parsed entry
+        this._size = this.count;
+    }
+    _field(slot, i) {
+        return this.buf.readUInt32LE(this.table + slot * 16 + i * 4);
+    }
+    _bytes(slot, i) {
+        const start = this.heap + this._field(slot, i);
+        return this.buf.subarray(start, start + this._field(slot, i + 1));
+    }
+    _slot(id) {
+        const key = Buffer.from(String(id));
+        let lo = 0;
+        let hi = this.count - 1;
+        while (lo <= hi) {
+            const mid = (lo + hi) >>> 1;
+            const c = Buffer.compare(this._bytes(mid, 0), key);
+            if (c === 0) return mid;
+            if (c < 0) lo = mid + 1;
+            else hi = mid - 1;
+        }
+        return -1;
+    }
+    _entry(slot) {
+        let value = this.decoded.get(slot);
+        if (value === undefined) {
+            value = JSON.parse(this._bytes(slot, 2).toString('utf-8'));
+            this.decoded.set(slot, value);
+        }
+        return value;
+    }
+    get size() {
+        return this._size;
+    }
+    has(id) {
+        return this.overlay.has(id) || (!this.removed.has(id) && this._slot(id) >= 0);
+    }
+    get(id) {
+        if (this.overlay.has(id)) return this.overlay.get(id);
+        if (this.removed.has(id)) return undefined;
+        const slot = this._slot(id);
+        return slot >= 0 ? this._entry(slot) : undefined;
+    }
+    set(id, value) {
+        if (!this.has(id)) this._size++;
+        this.overlay.set(id, value);
+        return this;
+    }
+    delete(id) {
+        if (!this.has(id)) return false;
+        this._size--;
+        this.overlay.delete(id);
+        if (this._slot(id) >= 0) this.removed.add(id);
+        return true;
+    }
+    clear() {
+        this.count = 0;
+        this.overlay.clear();
+        this.removed.clear();
+        this.decoded.clear();
+        this._size = 0;
+    }
+    // Image slots still current: [slot, id]
+    *_slots() {
+        for (let slot = 0; slot < this.count; slot++) {
+            const id = this._bytes(slot, 0).toString('utf-8');
+            if (!this.removed.has(id) && !this.overlay.has(id)) yield [slot, id];
+        }
+    }
+    *entries() {
+        for (const [slot, id] of this._slots()) yield [id, this._entry(slot)];
+        yield* this.overlay.entries();
+    }
+    *keys() {
+        for (const [id] of this.entries()) yield id;
+    }
+    *values() {
+        for (const [, value] of this.entries()) yield value;
+    }
+    [Symbol.iterator]() {
+        return this.entries();
+    }
+    forEach(fn, thisArg) {
+        for (const [id, value] of this.entries()) fn.call(thisArg, value, id, this);
+    }
+}
+function _hnswBinPath(metadataPath) {
+    return metadataPath.replace(/\\.json$/, '') + '.bin';
+}
+function _writeHNSWMetadataBin(metadataPath, entries) {
+    try {
+        const src = fs.statSync(metadataPath);
+        const rows = [];
+        if (entries instanceof _HNSWMetadataView) {
+            // Unchanged entries are copied as stored, without a parse / stringify round trip
+            for (const [slot] of entries._slots()) rows.push([entries._bytes(slot, 0), entries._bytes(slot, 2)]);
+            for (const [id, value] of entries.overlay) rows.push([Buffer.from(String(id)), Buffer.from(JSON.stringify(value))]);
+        } else {
+            for (const [id, value] of entries) rows.push([Buffer.from(String(id)), Buffer.from(JSON.stringify(value))]);
+        }
+        rows.sort((a, b) => Buffer.compare(a[0], b[0]));
+        const table = _HNSW_BIN_HEADER;
+        const heap = table + rows.length * 16;
+        const buf = Buffer.alloc(heap + rows.reduce((n, [id, entry]) => n + id.length + entry.length, 0));
+        buf.writeUInt32LE(_HNSW_BIN_MAGIC, 0);
+        buf.writeUInt16LE(_HNSW_BIN_VERSION, 4);
+        buf.writeUInt32LE(rows.length, 8);
+        buf.writeUInt32LE(table, 12);
+        buf.writeUInt32LE(heap, 16);
+        buf.writeDoubleLE(src.size, 24);
+        buf.writeDoubleLE(src.mtimeMs, 32);
+        buf.writeDoubleLE(src.ino, 40);
+        let at = 0;
+        rows.forEach(([id, entry], slot) => {
+            const t = table + slot * 16;
+            buf.writeUInt32LE(at, t);
+            buf.writeUInt32LE(id.length, t + 4);
+            at += id.copy(buf, heap + at);
+            buf.writeUInt32LE(at, t + 8);
+            buf.writeUInt32LE(entry.length, t + 12);
+            at += entry.copy(buf, heap + at);
+        });
+        const binPath = _hnswBinPath(metadataPath);
+        const tmp = `${binPath}.${process.pid}.tmp`;
+        fs.writeFileSync(tmp, buf);
+        fs.renameSync(tmp, binPath);
+    } catch { /* the JSON file stays authoritative */ }
+}
+// Entries of hnsw.metadata.json: a view over a current image, else the parsed
+// JSON (writing a fresh image for the next process); null without metadata
+function _openHNSWMetadataBin(metadataPath) {
+    try {
+        const src = fs.statSync(metadataPath);
+        const binPath = _hnswBinPath(metadataPath);
+        if (fs.existsSync(binPath)) {
+            const buf = fs.readFileSync(binPath);
+            if (buf.length >= _HNSW_BIN_HEADER
+                && buf.readUInt32LE(0) === _HNSW_BIN_MAGIC
+                && buf.readUInt16LE(4) === _HNSW_BIN_VERSION
+                && buf.readDoubleLE(24) === src.size
+                && buf.readDoubleLE(32) === src.mtimeMs
+                && buf.readDoubleLE(40) === src.ino) {
+                return new _HNSWMetadataView(buf);
+            }
+        }
+        const entries = new Map(JSON.parse(fs.readFileSync(metadataPath, 'utf-8')));
+        _writeHNSWMetadataBin(metadataPath, entries);
+        return entries;
+    } catch {
+        return null;
+    }
+}
+// DM-007a: Incremental HNSW maintenance -- pending changes since the checkpoint,""")
+
+# ── Op B: getHNSWIndex loads its entries through the image ──
+# Raw op: the Map the loader fills from hnsw.metadata.json (`const entries =
+# new Map();` followed by the metadata guard, EM-001 form or stock) starts out
+# as the image instead, and the guarded JSON parse only runs when that came
+# back empty.
+_EM004B_MARKER = "_openHNSWMetadataBin(metadataPath)) || new Map(); // EM-004b"
+if MI:
+    try:
+        _code = read_file(MI)
+        _m = re.search(
+            r"^([ \t]*)const entries = new Map\(\);(\n(?:[ \t]*//[^\n]*\n)*[ \t]*if \()"
+            r"((?:!options\?\.forceRebuild && )?fs\.existsSync\(metadataPath\)\) \{)",
+            _code, re.M)
+        if _EM004B_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: EM-004b: getHNSWIndex metadata load not found")
+        else:
+            # The guard line itself (EM-001 text) is left as it is
+            _new = (_m.group(1) + "const entries = (!options?.forceRebuild && " + _EM004B_MARKER + "\n"
+                    + _m.group(1) + "if (!entries.size) // EM-004b: parse the JSON only without a usable image"
+                    + _m.group(2) + _m.group(3))
+            write_file(MI, _code[:_m.start()] + _new + _code[_m.end():])
+            print("  Applied: EM-004b: load HNSW metadata through the binary image")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: EM-004b: memory-initializer.js not found")
+
+# ── Op C: refresh the image whenever the JSON metadata is saved ──
+# Raw op: the stock saveHNSWMetadata() is renamed (only its signature is
+# matched) and a wrapper writes the image right after it.
+_EM004C_MARKER = "function _saveHNSWMetadataJson("
+if MI:
+    try:
+        _code = read_file(MI)
+        _m = re.search(r"^(async )?function saveHNSWMetadata\(", _code, re.M)
+        if _EM004C_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: EM-004c: saveHNSWMetadata not found")
+        else:
+            _wrapper = """// EM-004c: Keep hnsw.metadata.bin in step with every metadata save
+function saveHNSWMetadata(...args) {
+    const done = () => {
+        if (hnswIndex?.entries) {
+            _writeHNSWMetadataBin(path.join(process.cwd(), '.swarm', 'hnsw.metadata.json'), hnswIndex.entries);
+        }
+    };
+    const result = _saveHNSWMetadataJson(...args);
+    if (result && typeof result.then === 'function') return result.then(v => { done(); return v; });
+    done();
+    return result;
+}
+""" + (_m.group(1) or "") + _EM004C_MARKER
+            write_file(MI, _code[:_m.start()] + _wrapper + _code[_m.end():])
+            print("  Applied: EM-004c: write binary image on saveHNSWMetadata")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: EM-004c: memory-initializer.js not found")
@@ -0,0 +1,156 @@
+# WM-020: AgentDB vector quantization (memory.agentdb.quantization) + full-precision re-rank
+# 6 ops: config plumbing (memory-initializer, executor), AgentDBBackend config,
+# HybridBackend re-rank of over-fetched candidates against the SQLite vectors
+
+# ── Op A: memory-initializer.js — quantization in the WM-008g agentdb config ──
+# Fresh installs get these lines from WM-008g2 itself; this upgrades a block
+# written by an earlier WM-008g2.
+patch("WM-020a: memory.agentdb.quantization + rerankFactor in HybridBackend agentdb config",
+    MI,
+    """                    learningTickInterval: agentdbCfg.learningTickInterval ?? 30000,
+                };""",
+    """                    learningTickInterval: agentdbCfg.learningTickInterval ?? 30000,
+                    // WM-020a: Stored-vector quantization; search re-ranks rerankFactor x k candidates
+                    quantization: ['int8', 'pq', 'binary'].includes(agentdbCfg.quantization) ? agentdbCfg.quantization : 'none',
+                    rerankFactor: Number.isFinite(agentdbCfg.rerankFactor) && agentdbCfg.rerankFactor >= 1 ? agentdbCfg.rerankFactor : 4,
+                };""")
+
+# ── Op B: executor.js — quantization in the WM-008h config.json template ──
+patch("WM-020b: agentdb quantization + rerankFactor in config.json template",
+    EXECUTOR,
+    """                learningTickInterval: options.runtime.agentdbTickInterval ?? 30000,
+            },""",
+    """                learningTickInterval: options.runtime.agentdbTickInterval ?? 30000,
+                // WM-020b: 'none' | 'int8' (4x) | 'pq' (8-16x) | 'binary' (32x)
+                quantization: options.runtime.agentdbQuantization ?? 'none',
+                rerankFactor: options.runtime.agentdbRerankFactor ?? 4,
+            },""")
+
+# ── Op C: agentdb-backend.js — DEFAULT_CONFIG keys + agentdb quantization types ──
+patch("WM-020c: quantization + rerankFactor in AgentDBBackend DEFAULT_CONFIG",
+    AGENTDB_BACKEND,
+    """    maxEntries: 1000000,
+};""",
+    """    maxEntries: 1000000,
+    // WM-020c: Stored-vector quantization ('none' | 'int8' | 'pq' | 'binary');
+    // HybridBackend re-ranks rerankFactor x k candidates at full precision
+    quantization: 'none',
+    rerankFactor: 4,
+};
+// WM-020c: memory.agentdb.quantization -> agentdb quantization type
+const QUANTIZATION_TYPES = { int8: 'scalar', pq: 'product', binary: 'binary' };""")
+
+# ── Op D: agentdb-backend.js — hand the quantization type to AgentDB ──
+# The .rvf store keeps compressed vectors only; the full-precision copy is the
+# one HybridBackend already writes to hybrid-memory.db.
+patch("WM-020d: pass quantization type to AgentDB",
+    AGENTDB_BACKEND,
+    """            this.agentdb = new AgentDB({
+                dbPath: this.config.dbPath || ':memory:',
+            });""",
+    """            this.agentdb = new AgentDB({
+                dbPath: this.config.dbPath || ':memory:',
+                // WM-020d: Compressed vectors in the .rvf store
+                ...(QUANTIZATION_TYPES[this.config.quantization]
+                    ? { quantization: QUANTIZATION_TYPES[this.config.quantization] }
+                    : {}),
+            });""")
+
+# ── Op E: hybrid-backend.js — vector decoding + cosine helpers ──
+patch("WM-020e: full-precision re-rank helpers in hybrid-backend.js",
+    HYBRID_BACKEND,
+    """export class HybridBackend extends EventEmitter {""",
+    """// WM-020e: Full-precision vectors from memory_entries.embedding (BLOB or JSON)
+function _fullPrecisionVector(v) {
+    if (v instanceof Float32Array) return v;
+    if (v instanceof Uint8Array) {
+        if (v.byteLength % 4) return null;
+        return new Float32Array(new Uint8Array(v).buffer);
+    }
+    if (Array.isArray(v)) return Float32Array.from(v);
+    if (typeof v === 'string') {
+        try {
+            const a = JSON.parse(v);
+            return Array.isArray(a) ? Float32Array.from(a) : null;
+        } catch {
+            return null;
+        }
+    }
+    return null;
+}
+function _cosineSimilarity(a, b) {
+    if (!a || !b || a.length !== b.length) return null;
+    let dot = 0, na = 0, nb = 0;
+    for (let i = 0; i < a.length; i++) {
+        dot += a[i] * b[i];
+        na += a[i] * a[i];
+        nb += b[i] * b[i];
+    }
+    return na && nb ? dot / Math.sqrt(na * nb) : 0;
+}
+export class HybridBackend extends EventEmitter {""")
+
+# ── Op F: hybrid-backend.js — re-rank wrapper around querySemantic ──
+# Raw op: the stock method is renamed to _querySemanticCandidates and a
+# wrapper takes its name. Unquantized stores go straight through.
+_WM020F_MARKER = "    async _querySemanticCandidates(query) { // WM-020f"
+if HYBRID_BACKEND:
+    try:
+        _code = read_file(HYBRID_BACKEND)
+        _m = re.search(r"^    async querySemantic\(query\) \{", _code, re.M)
+        if _WM020F_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: WM-020f: HybridBackend.querySemantic not found")
+        else:
+            _wrapper = """    // WM-020f: Quantized AgentDB scores are approximate -- fetch rerankFactor x k
+    // candidates and re-rank them against the full-precision vectors in SQLite
+    async querySemantic(query) {
+        const cfg = this.agentdb?.config || {};
+        const factor = Math.floor(Number(cfg.rerankFactor) || 1);
+        const db = this.sqlite?.db;
+        if (!query || !cfg.quantization || cfg.quantization === 'none' || factor <= 1 || !db) {
+            return this._querySemanticCandidates(query);
+        }
+        let embedding = query.embedding;
+        if (!embedding && query.content && this.config.embeddingGenerator) {
+            embedding = await this.config.embeddingGenerator(query.content);
+        }
+        const target = _fullPrecisionVector(embedding);
+        if (!target) return this._querySemanticCandidates(query);
+        const k = query.k || query.limit || 10;
+        const candidates = await this._querySemanticCandidates({
+            ...query, embedding, k: k * factor, limit: k * factor, threshold: 0,
+        });
+        if (!Array.isArray(candidates) || candidates.length === 0) return candidates;
+        const vectors = new Map();
+        try {
+            const ids = candidates.map(c => (c.entry || c).id).filter(Boolean);
+            for (let i = 0; i < ids.length; i += 500) {
+                const chunk = ids.slice(i, i + 500);
+                const rows = db.prepare(`SELECT id, embedding FROM memory_entries WHERE id IN (${chunk.map(() => '?').join(', ')})`).all(...chunk);
+                for (const row of rows) {
+                    const v = _fullPrecisionVector(row.embedding);
+                    if (v) vectors.set(row.id, v);
+                }
+            }
+        } catch { /* keep the approximate order */ }
+        // No SQLite copies (e.g. dualWrite off): approximate order it is
+        if (vectors.size === 0) return candidates.slice(0, k);
+        const threshold = query.threshold ?? 0;
+        return candidates
+            .map((c, rank) => {
+                const exact = _cosineSimilarity(target, vectors.get((c.entry || c).id));
+                return { c, rank, score: exact ?? c.score ?? c.similarity ?? 0 };
+            })
+            .filter(r => r.score >= threshold)
+            .sort((a, b) => b.score - a.score || a.rank - b.rank)
+            .slice(0, k)
+            .map(r => ({ ...r.c, score: r.score }));
+    }
+""" + _WM020F_MARKER
+            write_file(HYBRID_BACKEND, _code[:_m.start()] + _wrapper + _code[_m.end():])
+            print("  Applied: WM-020f: full-precision re-rank for quantized querySemantic")
+            applied += 1
+    except FileNotFoundError:
+        pass  # @claude-flow/memory not installed
@@ -0,0 +1,233 @@
+# WM-021: Per-namespace vector sub-indexes (memory.agentdb.namespaceIndexes)
+# 4 ops: config plumbing (memory-initializer, executor), sub-index lifecycle in
+# HybridBackend, candidate routing + shutdown hook
+
+# ── Op A: memory-initializer.js — namespaceIndexes in the WM-008g agentdb config ──
+# Fresh installs get this line from WM-008g2 itself; this upgrades a block
+# written by an earlier WM-008g2.
+patch("WM-021a: memory.agentdb.namespaceIndexes in HybridBackend agentdb config",
+    MI,
+    """                    vectorBackend: 'rvf',
+                    enableLearning: agentdbCfg.enableLearning !== false,""",
+    """                    vectorBackend: 'rvf',
+                    namespaceIndexes: agentdbCfg.namespaceIndexes === true, // WM-021a: per-namespace sub-indexes
+                    enableLearning: agentdbCfg.enableLearning !== false,""")
+
+# ── Op B: executor.js — namespaceIndexes in the WM-008h config.json template ──
+patch("WM-021b: agentdb namespaceIndexes in config.json template",
+    EXECUTOR,
+    """                vectorBackend: 'rvf',
+                enableLearning: !!(options.runtime.enableAgentdbLearning ?? true),""",
+    """                vectorBackend: 'rvf',
+                namespaceIndexes: !!(options.runtime.agentdbNamespaceIndexes ?? false), // WM-021b
+                enableLearning: !!(options.runtime.enableAgentdbLearning ?? true),""")
+
+# ── Op C: hybrid-backend.js — sub-index lifecycle ──
+# One AgentDBBackend per namespace (same config as the main store, learning
+# off) on <dir>/<name>.ns/<namespace>.rvf next to the main .rvf. A sub-index
+# is opened on the first query that needs it and brought up to date from
+# memory_entries before every search: rows past its (updated_at, id) mark are
+# upserted, ids no longer in the namespace are deleted. <namespace>.json,
+# written at shutdown, records the indexed ids, the mark and the .rvf size /
+# mtime it describes; if the .rvf does not match (crash, another process
+# saved it later) the sub-index is rebuilt from SQLite.
+patch("WM-021c: per-namespace sub-index lifecycle in HybridBackend",
+    HYBRID_BACKEND,
+    """    getSQLiteBackend() {""",
+    """    // WM-021c: Per-namespace vector sub-indexes (memory.agentdb.namespaceIndexes)
+    _namespaceIndexesEnabled() {
+        const cfg = this.agentdb?.config;
+        return !!(cfg?.namespaceIndexes && cfg.dbPath && cfg.dbPath !== ':memory:' && this.sqlite?.db);
+    }
+    _namespaceSchema() {
+        if (this._nsSchema !== undefined) return this._nsSchema;
+        const db = this.sqlite.db;
+        const cols = new Set(db.prepare('PRAGMA table_info(memory_entries)').all().map(c => c.name));
+        const updated = ['updated_at', 'updatedAt'].find(n => cols.has(n));
+        this._nsSchema = null;
+        if (updated && cols.has('id') && cols.has('namespace') && cols.has('embedding')) {
+            db.exec(`CREATE INDEX IF NOT EXISTS memory_entries_ns_updated_id ON memory_entries(namespace, "${updated}", id)`);
+            this._nsSchema = {
+                updated,
+                namespaces: db.prepare('SELECT DISTINCT namespace FROM memory_entries WHERE embedding IS NOT NULL'),
+                signature: db.prepare(`SELECT COUNT(*) AS n, MAX("${updated}") AS t FROM memory_entries WHERE namespace = ? AND embedding IS NOT NULL`),
+                page: db.prepare(`SELECT * FROM memory_entries WHERE namespace = ? AND embedding IS NOT NULL
+                    AND ("${updated}", id) > (?, ?) ORDER BY "${updated}", id LIMIT 500`),
+                ids: db.prepare('SELECT id FROM memory_entries WHERE namespace = ? AND embedding IS NOT NULL'),
+            };
+        }
+        return this._nsSchema;
+    }
+    _namespaceIndexEntry(row) {
+        const entry = {};
+        for (const [col, v] of Object.entries(row)) {
+            if (v === null || v === undefined) continue;
+            const name = col.replace(/_([a-z])/g, (_, c) => c.toUpperCase());
+            if (typeof v === 'string' && (name === 'tags' || name === 'metadata' || name === 'references')) {
+                try { entry[name] = JSON.parse(v); continue; } catch { /* keep raw text */ }
+            }
+            entry[name] = name === 'embedding' ? _fullPrecisionVector(v) : v;
+        }
+        return entry;
+    }
+    _namespaceIndex(ns) {
+        if (!this._nsIndexes) this._nsIndexes = new Map();
+        let slot = this._nsIndexes.get(ns);
+        if (!slot) {
+            slot = this._openNamespaceIndex(ns).catch(() => null);
+            this._nsIndexes.set(ns, slot);
+        }
+        return slot;
+    }
+    async _openNamespaceIndex(ns) {
+        const fs = await import('node:fs');
+        const path = await import('node:path');
+        const dir = this.agentdb.config.dbPath.replace(/\\.rvf$/, '') + '.ns';
+        fs.mkdirSync(dir, { recursive: true });
+        const file = path.join(dir, encodeURIComponent(ns) + '.rvf');
+        const stateFile = path.join(dir, encodeURIComponent(ns) + '.json');
+        let state = null;
+        try {
+            state = JSON.parse(fs.readFileSync(stateFile, 'utf-8'));
+            const st = fs.statSync(file);
+            if (state.size !== st.size || state.mtimeMs !== st.mtimeMs) state = null;
+        } catch {
+            state = null;
+        }
+        if (!state) {
+            fs.rmSync(file, { force: true, recursive: true });
+            fs.rmSync(stateFile, { force: true });
+        }
+        const index = new this.agentdb.constructor({
+            ...this.agentdb.config, dbPath: file, namespace: ns, enableLearning: false, namespaceIndexes: false,
+        });
+        await index.initialize();
+        if (typeof index.isAvailable === 'function' && !index.isAvailable()) return null;
+        return {
+            ns, file, stateFile, index, busy: Promise.resolve(),
+            t: state?.t ?? null, id: state?.id ?? '', ids: new Set(state?.ids || []),
+        };
+    }
+    async _syncNamespaceIndex(sub) {
+        const q = this._namespaceSchema();
+        const sig = q.signature.get(sub.ns);
+        if (sig.n === sub.ids.size && sig.t === sub.t) return;
+        let t = sub.t ?? -Infinity;
+        let id = sub.id;
+        for (;;) {
+            const rows = q.page.all(sub.ns, t, id);
+            if (rows.length === 0) break;
+            const batch = [];
+            for (const row of rows) {
+                const entry = this._namespaceIndexEntry(row);
+                if (entry.embedding) {
+                    if (sub.ids.has(entry.id)) await sub.index.delete(entry.id).catch(() => {});
+                    batch.push(entry);
+                }
+                t = row[q.updated];
+                id = row.id;
+            }
+            if (typeof sub.index.bulkInsert === 'function') await sub.index.bulkInsert(batch);
+            else for (const entry of batch) await sub.index.store(entry);
+            for (const entry of batch) sub.ids.add(entry.id);
+        }
+        if (sub.ids.size !== sig.n) {
+            const live = new Set(q.ids.all(sub.ns).map(r => r.id));
+            for (const gone of [...sub.ids].filter(x => !live.has(x))) {
+                await sub.index.delete(gone).catch(() => {});
+                sub.ids.delete(gone);
+            }
+        }
+        sub.t = t === -Infinity ? null : t;
+        sub.id = id;
+    }
+    // Candidates for one namespace from its own sub-index; `all` (or no
+    // namespace) fans out over every namespace in parallel and merges by score.
+    // null = not applicable, the caller searches the main index.
+    async _namespaceIndexSearch(query) {
+        try {
+            if (!query || !this._namespaceIndexesEnabled() || !this._namespaceSchema()) return null;
+            if (query.filters && Object.keys(query.filters).some(f => f !== 'namespace')) return null;
+            let embedding = query.embedding;
+            if (!embedding && query.content && this.config.embeddingGenerator) {
+                embedding = await this.config.embeddingGenerator(query.content);
+            }
+            if (!embedding) return null;
+            const k = query.k || query.limit || 10;
+            const target = query.namespace ?? query.filters?.namespace;
+            const namespaces = target && target !== 'all'
+                ? [target]
+                : this._nsSchema.namespaces.all().map(r => r.namespace);
+            const lists = await Promise.all(namespaces.map(async (ns) => {
+                const sub = await this._namespaceIndex(ns);
+                if (!sub) return null;
+                sub.busy = sub.busy.catch(() => {}).then(() => this._syncNamespaceIndex(sub));
+                await sub.busy;
+                const hits = await sub.index.search(embedding, { k, threshold: query.threshold, namespace: ns });
+                return (hits || []).map(h => ({ ...(h.entry || h), score: h.score ?? h.similarity }));
+            }));
+            if (lists.some(l => l === null)) return null;
+            return lists.flat().sort((a, b) => (b.score ?? 0) - (a.score ?? 0)).slice(0, k);
+        } catch {
+            return null;
+        }
+    }
+    async _closeNamespaceIndexes() {
+        const slots = this._nsIndexes;
+        this._nsIndexes = null;
+        if (!slots) return;
+        const fs = await import('node:fs');
+        for (const slot of slots.values()) {
+            const sub = await slot;
+            if (!sub) continue;
+            await sub.busy.catch(() => {});
+            try {
+                await sub.index.shutdown();
+                const st = fs.statSync(sub.file);
+                const tmp = sub.stateFile + '.tmp';
+                fs.writeFileSync(tmp, JSON.stringify({
+                    t: sub.t, id: sub.id, ids: [...sub.ids], size: st.size, mtimeMs: st.mtimeMs,
+                }));
+                fs.renameSync(tmp, sub.stateFile);
+            } catch {
+                // Nothing saved (or unreadable): rebuild from SQLite next time
+                try { fs.rmSync(sub.stateFile, { force: true }); } catch {}
+            }
+        }
+    }
+    getSQLiteBackend() {""")
+
+# ── Op D: hybrid-backend.js — route candidate search, close sub-indexes on shutdown ──
+# Raw op, appended once. Wraps the candidate stage (WM-020f's
+# _querySemanticCandidates, else querySemantic itself) so the full-precision
+# re-rank still applies to sub-index results.
+_WM021D_MARKER = "// WM-021d: Namespace-scoped candidates from the per-namespace sub-indexes"
+_WM021D_BLOCK = _WM021D_MARKER + """
+{
+    const candidateStage = typeof HybridBackend.prototype._querySemanticCandidates === 'function'
+        ? '_querySemanticCandidates'
+        : 'querySemantic';
+    const mainIndexSearch = HybridBackend.prototype[candidateStage];
+    HybridBackend.prototype[candidateStage] = async function (query) {
+        return (await this._namespaceIndexSearch(query)) ?? mainIndexSearch.call(this, query);
+    };
+    const shutdown = HybridBackend.prototype.shutdown;
+    HybridBackend.prototype.shutdown = async function (...args) {
+        await this._closeNamespaceIndexes();
+        return shutdown.apply(this, args);
+    };
+}
+"""
+if HYBRID_BACKEND:
+    try:
+        _code = read_file(HYBRID_BACKEND)
+        if _WM021D_MARKER in _code:
+            skipped += 1
+        elif "_namespaceIndexSearch(query)" not in _code:
+            print("  WARN: WM-021d: sub-index methods (WM-021c) not present")
+        else:
+            write_file(HYBRID_BACKEND, _code.rstrip("\n") + "\n" + _WM021D_BLOCK)
+            print("  Applied: WM-021d: route semantic candidates to namespace sub-indexes")
+            applied += 1
+    except FileNotFoundError:
+        pass  # @claude-flow/memory not installed
@@ -0,0 +1,224 @@
+# WM-022: Write-invalidated result cache for searchEntries (memory_search,
+# hooks_pattern-search fallback) in the long-lived MCP server process
+# 2 ops: cache + generation counters in memory-initializer.js, stats MCP tool
+
+# ── Op A: result cache in front of searchEntries ──
+# Keyed by (query, namespace, limit, threshold, mode). Each entry remembers the
+# namespace generation it was computed at; a lookup at a different generation
+# is a miss. Generations have two parts:
+#   - in-process counters bumped by storeEntry / storeEntries / deleteEntry /
+#     importEntries of this module (per namespace, plus an epoch for writes
+#     whose namespaces are unknown);
+#   - memory_namespace_generations in hybrid-memory.db, bumped by triggers on
+#     memory_entries, so writes from hook and CLI processes invalidate too.
+# The cache is an LRU bounded by maxEntries with a TTL (config.json
+# memory.searchCache: enabled, maxEntries 256, ttlMs 60000).
+# The wrappers reassign the module's function bindings, so importers and the
+# default export both get them; they sit above WM-011a3 / WM-009a so they run
+# before `export default {` is evaluated.
+patch("WM-022a: write-invalidated searchEntries result cache",
+    MI,
+    """// WM-011a3: Expose ReasoningBank instance for hooks""",
+    """// WM-022a: searchEntries result cache, invalidated by per-namespace write generations
+let _searchCacheCfg = null;
+function _searchCacheConfig() {
+    if (_searchCacheCfg) return _searchCacheCfg;
+    const cfg = { enabled: true, maxEntries: 256, ttlMs: 60000 };
+    try {
+        const cfgPath = path.join(process.cwd(), '.claude-flow', 'config.json');
+        if (fs.existsSync(cfgPath)) {
+            const sc = JSON.parse(fs.readFileSync(cfgPath, 'utf-8')).memory?.searchCache || {};
+            if (typeof sc.enabled === 'boolean') cfg.enabled = sc.enabled;
+            if (Number.isInteger(sc.maxEntries) && sc.maxEntries >= 0) cfg.maxEntries = sc.maxEntries;
+            if (Number.isFinite(sc.ttlMs) && sc.ttlMs >= 0) cfg.ttlMs = sc.ttlMs;
+        }
+    } catch { /* use defaults */ }
+    _searchCacheCfg = cfg;
+    return cfg;
+}
+const _searchCache = new Map(); // key -> { result, generation, at }
+const _searchCacheCounters = { hits: 0, misses: 0, stale: 0, expired: 0, evictions: 0 };
+const _searchGenLocal = new Map(); // namespace -> writes seen in this process
+let _searchGenLocalAll = 0;
+let _searchGenEpoch = 0;
+let _searchGenDb = null;
+function _bumpSearchGeneration(namespace) {
+    if (typeof namespace === 'string' && namespace) {
+        _searchGenLocal.set(namespace, (_searchGenLocal.get(namespace) || 0) + 1);
+        _searchGenLocalAll++;
+    } else {
+        _searchGenEpoch++;
+    }
+}
+function _searchGenerationDb() {
+    const db = _hybridBackend?.getSQLiteBackend?.()?.db;
+    if (!db) return null;
+    if (_searchGenDb && _searchGenDb.db === db) return _searchGenDb;
+    try {
+        const cols = new Set(db.prepare('PRAGMA table_info(memory_entries)').all().map(c => c.name));
+        if (!cols.has('namespace')) return null;
+        // access_count / last_accessed updates from reads must not invalidate
+        const watched = ['key', 'content', 'embedding', 'namespace', 'tags', 'metadata', 'type', 'status',
+            'expires_at', 'expiresAt'].filter(c => cols.has(c)).map(c => `"${c}"`).join(', ');
+        db.exec(`CREATE TABLE IF NOT EXISTS memory_namespace_generations (
+                namespace TEXT PRIMARY KEY, generation INTEGER NOT NULL DEFAULT 0);
+            CREATE TRIGGER IF NOT EXISTS memory_namespace_generations_ai AFTER INSERT ON memory_entries BEGIN
+                INSERT INTO memory_namespace_generations (namespace, generation) VALUES (new.namespace, 1)
+                    ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_namespace_generations_ad AFTER DELETE ON memory_entries BEGIN
+                INSERT INTO memory_namespace_generations (namespace, generation) VALUES (old.namespace, 1)
+                    ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS memory_namespace_generations_au AFTER UPDATE OF ${watched} ON memory_entries BEGIN
+                INSERT INTO memory_namespace_generations (namespace, generation) VALUES (old.namespace, 1)
+                    ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1;
+                INSERT INTO memory_namespace_generations (namespace, generation) VALUES (new.namespace, 1)
+                    ON CONFLICT(namespace) DO UPDATE SET generation = generation + 1;
+            END`);
+        _searchGenDb = {
+            db,
+            one: db.prepare('SELECT generation FROM memory_namespace_generations WHERE namespace = ?'),
+            all: db.prepare('SELECT COALESCE(SUM(generation), 0) AS generation FROM memory_namespace_generations'),
+        };
+        return _searchGenDb;
+    } catch {
+        // Read-only or foreign schema: in-process generations and the TTL only
+        return null;
+    }
+}
+function _searchGeneration(ns) {
+    const local = ns ? (_searchGenLocal.get(ns) || 0) : _searchGenLocalAll;
+    let shared = '-';
+    const gen = _searchGenerationDb();
+    if (gen) {
+        try {
+            shared = ns ? (gen.one.get(ns)?.generation ?? 0) : gen.all.get().generation;
+        } catch { /* keep '-' */ }
+    }
+    return `${_searchGenEpoch}:${local}:${shared}`;
+}
+// Counters for this process since start; hitRate = hits / lookups
+export function getSearchCacheStats() {
+    const cfg = _searchCacheConfig();
+    const lookups = _searchCacheCounters.hits + _searchCacheCounters.misses;
+    return {
+        enabled: cfg.enabled,
+        entries: _searchCache.size,
+        maxEntries: cfg.maxEntries,
+        ttlMs: cfg.ttlMs,
+        ..._searchCacheCounters,
+        hitRate: lookups ? _searchCacheCounters.hits / lookups : 0,
+    };
+}
+const _searchEntriesUncached = searchEntries;
+searchEntries = async function searchEntries(options) {
+    const cfg = _searchCacheConfig();
+    if (!cfg.enabled || !cfg.maxEntries || !options || options.dbPath || typeof options.query !== 'string') {
+        return _searchEntriesUncached(options);
+    }
+    const { query, namespace = 'all', limit = 10, threshold = 0.3, mode } = options;
+    const ns = namespace === 'all' ? null : namespace;
+    const key = JSON.stringify([query, namespace, limit, threshold, mode ?? null]);
+    const generation = _searchGeneration(ns);
+    const startTime = Date.now();
+    const hit = _searchCache.get(key);
+    if (hit) {
+        _searchCache.delete(key);
+        if (hit.generation !== generation) {
+            _searchCacheCounters.stale++;
+        } else if (startTime - hit.at > cfg.ttlMs) {
+            _searchCacheCounters.expired++;
+        } else {
+            _searchCache.set(key, hit); // most recently used
+            _searchCacheCounters.hits++;
+            return { ...hit.result, results: hit.result.results.map(r => ({ ...r })), searchTime: Date.now() - startTime, cached: true };
+        }
+    }
+    _searchCacheCounters.misses++;
+    const result = await _searchEntriesUncached(options);
+    // A write that landed while searching leaves the result uncached
+    if (result && result.success && Array.isArray(result.results) && _searchGeneration(ns) === generation) {
+        _searchCache.set(key, { result: { ...result, results: result.results.map(r => ({ ...r })) }, generation, at: startTime });
+        while (_searchCache.size > cfg.maxEntries) {
+            _searchCache.delete(_searchCache.keys().next().value);
+            _searchCacheCounters.evictions++;
+        }
+    }
+    return result;
+};
+const _storeEntryUncached = storeEntry;
+storeEntry = async function storeEntry(options) {
+    try {
+        return await _storeEntryUncached(options);
+    } finally {
+        _bumpSearchGeneration(options?.namespace || 'default');
+    }
+};
+if (typeof storeEntries === 'function') {
+    const _storeEntriesUncached = storeEntries;
+    storeEntries = async function storeEntries(entries) {
+        try {
+            return await _storeEntriesUncached(entries);
+        } finally {
+            const namespaces = new Set((Array.isArray(entries) ? entries : []).map(e => e?.namespace || 'default'));
+            namespaces.forEach(_bumpSearchGeneration);
+        }
+    };
+}
+const _deleteEntryUncached = deleteEntry;
+deleteEntry = async function deleteEntry(options) {
+    try {
+        return await _deleteEntryUncached(options);
+    } finally {
+        _bumpSearchGeneration(options?.namespace);
+    }
+};
+if (typeof importEntries === 'function') {
+    const _importEntriesUncached = importEntries;
+    importEntries = async function importEntries(records, options) {
+        try {
+            return await _importEntriesUncached(records, options);
+        } finally {
+            _bumpSearchGeneration(null);
+        }
+    };
+}
+// WM-011a3: Expose ReasoningBank instance for hooks""")
+
+# ── Op B: memory_search_cache_stats MCP tool ──
+# The cache lives in the MCP server process, so its counters are read there.
+# Raw op: appended once, guarded by its marker comment.
+_WM022B_MARKER = "// WM-022b: memory_search result cache counters"
+_WM022B_BLOCK = _WM022B_MARKER + """
+if (typeof memoryTools !== 'undefined' && Array.isArray(memoryTools)
+    && !memoryTools.some(t => t && t.name === 'memory_search_cache_stats')) {
+    memoryTools.push({
+        name: 'memory_search_cache_stats',
+        description: 'memory_search result cache: size, hits, misses, stale / expired lookups, evictions and hit rate',
+        category: 'memory',
+        inputSchema: {
+            type: 'object',
+            properties: {},
+        },
+        handler: async () => {
+            const { getSearchCacheStats } = await import('../memory/memory-initializer.js');
+            if (typeof getSearchCacheStats !== 'function') {
+                return { success: false, error: 'search cache not available' };
+            }
+            return { success: true, ...getSearchCacheStats() };
+        },
+    });
+}
+"""
+if MCP_MEMORY:
+    try:
+        _code = read_file(MCP_MEMORY)
+        if _WM022B_MARKER in _code:
+            skipped += 1
+        else:
+            write_file(MCP_MEMORY, _code.rstrip("\n") + "\n" + _WM022B_BLOCK)
+            print("  Applied: WM-022b: memory_search_cache_stats MCP tool")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: WM-022b: mcp-tools/memory-tools.js not found")
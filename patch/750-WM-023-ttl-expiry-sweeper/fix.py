@@ -0,0 +1,269 @@
+# WM-023: TTL expiry -- indexed expires_at, expired-row read filter, daemon sweeper
+# 4 ops: expiry index + sweepExpiredEntries() + read filters in memory-initializer.js,
+#        expire worker in worker-daemon.js (DEFAULT_WORKERS, method, dispatch)
+
+# ── Op A: expiry index, sweeper and read filters ──
+# memory_entries.expires_at (added when the SQLiteBackend schema lacks it) holds
+# epoch ms behind a partial index on the non-NULL rows, so "expired now" is one
+# range scan over entries with a TTL. WM-001b / WM-013a write expiresAt as an
+# ISO-8601 string, which SQLite sorts after every number: triggers convert it
+# on insert / update, existing rows are converted once, and storeEntry /
+# storeEntries with a ttl also write the column directly (covers upserts).
+# Until the sweeper has removed them, expired rows are dropped where full ids
+# are still known, before the adapters truncate them: HybridBackend
+# querySemantic / query (instance wrappers), WM-015a's _keywordSearch, the
+# WM-018a keyset pages and getEntry. The block sits above WM-022a, so the
+# result cache holds filtered results; a row passing its expiry moves the
+# cache generation like a write does.
+patch("WM-023a: indexed expires_at, sweepExpiredEntries and expired-row read filters",
+    MI,
+    """// WM-022a: searchEntries result cache, invalidated by per-namespace write generations""",
+    """// WM-023a: TTL expiry -- memory_entries.expires_at (epoch ms) behind a partial
+// index; expired rows are filtered from reads and deleted by the expire worker
+function _expiryConfig() {
+    const cfg = { batchSize: 500, maxBatches: 20 };
+    try {
+        const cfgPath = path.join(process.cwd(), '.claude-flow', 'config.json');
+        if (fs.existsSync(cfgPath)) {
+            const ex = JSON.parse(fs.readFileSync(cfgPath, 'utf-8')).memory?.expiry || {};
+            for (const k of Object.keys(cfg)) {
+                if (Number.isInteger(ex[k]) && ex[k] > 0) cfg[k] = ex[k];
+            }
+        }
+    } catch { /* use defaults */ }
+    return cfg;
+}
+let _expiry = null;
+function _expiryState() {
+    const db = _hybridBackend?.getSQLiteBackend?.()?.db;
+    if (!db) return null;
+    if (_expiry && _expiry.db === db) return _expiry.q;
+    _expiry = { db, q: null };
+    try {
+        const cols = new Set(db.prepare('PRAGMA table_info(memory_entries)').all().map(c => c.name));
+        if (!cols.has('id')) return null;
+        let col = ['expires_at', 'expiresAt'].find(c => cols.has(c));
+        if (!col) {
+            db.exec('ALTER TABLE memory_entries ADD COLUMN expires_at INTEGER');
+            col = 'expires_at';
+        }
+        const toMs = (v) => `CAST(ROUND((julianday(${v}) - 2440587.5) * 86400000) AS INTEGER)`;
+        const isIso = (v) => `typeof(${v}) = 'text' AND julianday(${v}) IS NOT NULL`;
+        db.transaction(() => {
+            db.exec(`CREATE INDEX IF NOT EXISTS memory_entries_expires_at ON memory_entries("${col}") WHERE "${col}" IS NOT NULL;
+                CREATE TRIGGER IF NOT EXISTS memory_entries_expires_at_ai AFTER INSERT ON memory_entries
+                    WHEN ${isIso(`new."${col}"`)} BEGIN
+                    UPDATE memory_entries SET "${col}" = ${toMs(`new."${col}"`)} WHERE rowid = new.rowid;
+                END;
+                CREATE TRIGGER IF NOT EXISTS memory_entries_expires_at_au AFTER UPDATE OF "${col}" ON memory_entries
+                    WHEN ${isIso(`new."${col}"`)} BEGIN
+                    UPDATE memory_entries SET "${col}" = ${toMs(`new."${col}"`)} WHERE rowid = new.rowid;
+                END`);
+            // Rows written as ISO strings before the triggers existed
+            db.exec(`UPDATE memory_entries SET "${col}" = ${toMs(`"${col}"`)} WHERE "${col}" IS NOT NULL AND ${isIso(`"${col}"`)}`);
+        })();
+        _expiry.q = {
+            due: db.prepare(`SELECT id, namespace FROM memory_entries WHERE "${col}" IS NOT NULL AND "${col}" <= ? ORDER BY "${col}" LIMIT ?`),
+            expired: db.prepare(`SELECT id FROM memory_entries WHERE "${col}" IS NOT NULL AND "${col}" <= ?`),
+            pending: db.prepare(`SELECT COUNT(*) AS n FROM memory_entries WHERE "${col}" IS NOT NULL AND "${col}" <= ?`),
+            latest: db.prepare(`SELECT MAX("${col}") AS t FROM memory_entries WHERE "${col}" IS NOT NULL AND "${col}" <= ?`),
+            set: db.prepare(`UPDATE memory_entries SET "${col}" = ? WHERE id = ?`),
+        };
+        _filterBackendReads(_hybridBackend);
+    } catch {
+        // Read-only or foreign schema: no expiry filtering or sweeping
+    }
+    return _expiry.q;
+}
+function _recordExpiry(id, ttl) {
+    if (!id || !(Number(ttl) > 0)) return;
+    try { _expiryState()?.set.run(Date.now() + Number(ttl) * 1000, id); } catch { /* backend value stands */ }
+}
+// Ids of rows past their expiry that the sweeper has not removed yet (null = no index)
+function _expiredIds() {
+    const q = _expiryState();
+    if (!q) return null;
+    try {
+        return new Set(q.expired.all(Date.now()).map(r => String(r.id)));
+    } catch {
+        return null;
+    }
+}
+// Rows (or { entry } hits) minus those past their expiry; matched on full ids,
+// so callers filter before truncating ids for display
+function _liveRows(rows, expired = _expiredIds()) {
+    if (!Array.isArray(rows) || !expired || expired.size === 0) return rows;
+    return rows.filter(r => !expired.has(String((r?.entry || r)?.id)));
+}
+// Filters the backend's own reads, which every searchEntries / listEntries path
+// goes through; semantic queries over-fetch by the backlog (up to 2x) so the
+// page stays full after filtering
+function _filterBackendReads(backend) {
+    if (!backend || backend._expiryFiltered) return;
+    backend._expiryFiltered = true;
+    const querySemantic = backend.querySemantic;
+    if (typeof querySemantic === 'function') {
+        backend.querySemantic = async function (query) {
+            const expired = _expiredIds();
+            if (!query || !expired || expired.size === 0) return querySemantic.call(this, query);
+            const k = query.k || query.limit || 10;
+            const wide = k + Math.min(expired.size, k);
+            const rows = await querySemantic.call(this, { ...query, k: wide, limit: wide });
+            return Array.isArray(rows) ? _liveRows(rows, expired).slice(0, k) : rows;
+        };
+    }
+    const query = backend.query;
+    if (typeof query === 'function') {
+        backend.query = async function (q) {
+            return _liveRows(await query.call(this, q));
+        };
+    }
+}
+// Deletes expired entries from hybrid-memory.db and the vector index in batches
+// of memory.expiry.batchSize, at most maxBatches per call; the rest is left for
+// the next run. Deleted ids are also logged as HNSW tombstones (GV-002).
+export async function sweepExpiredEntries(options = {}) {
+    const cfg = _expiryConfig();
+    const batchSize = options.batchSize || cfg.batchSize;
+    const maxBatches = options.maxBatches || cfg.maxBatches;
+    const result = { expired: 0, batches: 0, pending: 0 };
+    try {
+        if (!_hybridBackend) await initializeMemoryDatabase({ verbose: false });
+        const q = _expiryState();
+        if (!q) return { ...result, mode: 'unavailable' };
+        const now = Date.now();
+        while (result.batches < maxBatches) {
+            const rows = q.due.all(now, batchSize);
+            if (rows.length === 0) break;
+            result.batches++;
+            const ids = rows.map(r => r.id);
+            if (typeof _hybridBackend.bulkDelete === 'function') {
+                await _hybridBackend.bulkDelete(ids);
+            } else {
+                for (const id of ids) await _hybridBackend.delete(id);
+            }
+            if (typeof _appendTombstone === 'function') ids.forEach(id => _appendTombstone(id));
+            if (typeof _bumpSearchGeneration === 'function') new Set(rows.map(r => r.namespace || 'default')).forEach(_bumpSearchGeneration);
+            result.expired += ids.length;
+            if (rows.length < batchSize) break;
+            await new Promise(resolve => setImmediate(resolve));
+        }
+        result.pending = q.pending.get(now).n;
+    } catch (e) {
+        result.error = e instanceof Error ? e.message : String(e);
+    }
+    return result;
+}
+// WM-022a generations: the newest expiry already passed joins the generation,
+// so a cached result is recomputed once one of the rows in it may have expired
+if (typeof _searchGeneration === 'function') {
+    const _searchGenerationNoExpiry = _searchGeneration;
+    _searchGeneration = function (ns) {
+        let latest = '-';
+        try { latest = _expiryState()?.latest.get(Date.now()).t ?? 0; } catch { /* keep '-' */ }
+        return `${_searchGenerationNoExpiry(ns)}:${latest}`;
+    };
+}
+const _storeEntryNoExpiry = storeEntry;
+storeEntry = async function storeEntry(options) {
+    const result = await _storeEntryNoExpiry(options);
+    if (result?.success && options?.ttl) _recordExpiry(result.id, options.ttl);
+    return result;
+};
+if (typeof storeEntries === 'function') {
+    const _storeEntriesNoExpiry = storeEntries;
+    storeEntries = async function storeEntries(entries) {
+        const result = await _storeEntriesNoExpiry(entries);
+        (result?.results || []).forEach((r, i) => {
+            if (r?.success && entries[i]?.ttl) _recordExpiry(r.id, entries[i].ttl);
+        });
+        return result;
+    };
+}
+// The backend filters are installed with the expiry index, before the first read
+const _searchEntriesWithExpired = searchEntries;
+searchEntries = async function searchEntries(options) {
+    _expiryState();
+    return _searchEntriesWithExpired(options);
+};
+const _listEntriesWithExpired = listEntries;
+listEntries = async function listEntries(options) {
+    _expiryState();
+    return _listEntriesWithExpired(options);
+};
+if (typeof _keywordSearch === 'function') {
+    const _keywordSearchWithExpired = _keywordSearch;
+    _keywordSearch = function (query, ns, limit, threshold) {
+        return _liveRows(_keywordSearchWithExpired(query, ns, limit, threshold));
+    };
+}
+if (typeof _keysetPage === 'function') {
+    const _keysetPageWithExpired = _keysetPage;
+    _keysetPage = function (stmts, ns, limit, cursor) {
+        const page = _keysetPageWithExpired(stmts, ns, limit, cursor);
+        return { ...page, rows: _liveRows(page.rows) };
+    };
+}
+const _getEntryWithExpired = getEntry;
+getEntry = async function getEntry(options) {
+    const result = await _getEntryWithExpired(options);
+    if (result?.found && !options?.dbPath && _expiredIds()?.has(String(result.entry?.id))) {
+        return { success: true, found: false };
+    }
+    return result;
+};
+// WM-022a: searchEntries result cache, invalidated by per-namespace write generations""")
+
+# ── Op B: expire worker in DEFAULT_WORKERS ──
+# Inserted above the stock 'document' entry, which starts DM-004's block.
+patch("WM-023b: expire worker in DEFAULT_WORKERS",
+    WD,
+    """    { type: 'document', intervalMs: 60 * 60 * 1000, offsetMs: 0, priority: 'low', description: 'Auto-documentation', enabled: false },""",
+    """    { type: 'expire', intervalMs: 5 * 60 * 1000, offsetMs: 0, priority: 'normal', description: 'Delete TTL-expired memory entries (WM-023)', enabled: true },
+    { type: 'document', intervalMs: 60 * 60 * 1000, offsetMs: 0, priority: 'low', description: 'Auto-documentation', enabled: false },""")
+
+# ── Op C: runExpireWorker() next to DM-004's consolidate worker ──
+patch("WM-023c: expire worker sweeps TTL-expired memory entries",
+    WD,
+    """    async runConsolidateWorker() {""",
+    """    // WM-023c: Delete TTL-expired memory entries in bounded batches (SQLite + vector index)
+    async runExpireWorker() {
+        const expiryFile = join(this.projectRoot, '.claude-flow', 'metrics', 'expiry.json');
+        const metricsDir = join(this.projectRoot, '.claude-flow', 'metrics');
+        if (!existsSync(metricsDir)) {
+            mkdirSync(metricsDir, { recursive: true });
+        }
+        const result = { timestamp: new Date().toISOString(), expired: 0, batches: 0, pending: 0 };
+        try {
+            const mi = await import('../memory/memory-initializer.js');
+            if (typeof mi.sweepExpiredEntries === 'function') Object.assign(result, await mi.sweepExpiredEntries());
+            else result.error = 'sweepExpiredEntries not available';
+        } catch (e) { result.error = e?.message || String(e); }
+        writeFileSync(expiryFile, JSON.stringify(result, null, 2));
+        return result;
+    }
+    async runConsolidateWorker() {""")
+
+# ── Op D: dispatch 'expire' in the worker switch ──
+# Raw op: a case is added above the existing consolidate case, whatever its
+# indentation.
+_WM023D_MARKER = "case 'expire': // WM-023d"
+if WD:
+    try:
+        _code = read_file(WD)
+        _m = re.search(r"^([ \t]*)case 'consolidate':", _code, re.M)
+        if _WM023D_MARKER in _code:
+            skipped += 1
+        elif not _m:
+            print("  WARN: WM-023d: consolidate worker case not found")
+        else:
+            _indent = _m.group(1)
+            write_file(WD, _code[:_m.start()]
+                + _indent + _WM023D_MARKER + "\n"
+                + _indent + "    return this.runExpireWorker();\n"
+                + _code[_m.start():])
+            print("  Applied: WM-023d: dispatch expire worker")
+            applied += 1
+    except FileNotFoundError:
+        print("  WARN: WM-023d: services/worker-daemon.js not found")
+
@@ -117,6 +117,56 @@ patch_all("test-partial", "${testFile}", "aaa", "zzz")
   });
 });
 
+describe('common.py file buffer', () => {
+  let dir, base, testFile;
+
+  beforeEach(() => {
+    dir = mkdtempSync(join(tmpdir(), 'cfp-common-'));
+    base = dir;
+    testFile = join(dir, 'target.js');
+  });
+
+  afterEach(() => { rmSync(dir, { recursive: true, force: true }); });
+
+  it('chains ops on the same file in memory and writes once on flush', () => {
+    writeFileSync(testFile, "const a = 1; const b = 2;");
+    const r = runPythonCode(`
+patch("op-1", "${testFile}", "a = 1", "a = 10")
+patch("op-2", "${testFile}", "a = 10; const b = 2", "a = 10; const b = 20")
+with open("${testFile}") as f:
+    print(f"disk={f.read()}")
+print(f"buffered={read_file('${testFile}')}")
+flush()
+print(f"applied={applied} skipped={skipped}")
+`, base);
+    assert.equal(r.status, 0);
+    assert.ok(r.stdout.includes('disk=const a = 1; const b = 2;'), 'disk untouched before flush');
+    assert.ok(r.stdout.includes('buffered=const a = 10; const b = 20;'));
+    assert.ok(r.stdout.includes('applied=2 skipped=0'));
+    assert.equal(readFileSync(testFile, 'utf-8'), "const a = 10; const b = 20;");
+  });
+
+  it('flushes pending writes at exit without an explicit flush()', () => {
+    writeFileSync(testFile, "x = 'old';");
+    const r = runPythonCode(`
+write_file("${testFile}", read_file("${testFile}").replace("old", "new"))
+`, base);
+    assert.equal(r.status, 0);
+    assert.equal(readFileSync(testFile, 'utf-8'), "x = 'new';");
+  });
+
+  it('read_file raises FileNotFoundError for missing files', () => {
+    const r = runPythonCode(`
+try:
+    read_file("${join(dir, 'nonexistent.js')}")
+except FileNotFoundError:
+    print("missing")
+`, base);
+    assert.equal(r.status, 0);
+    assert.ok(r.stdout.includes('missing'));
+  });
+});
+
 describe('common.py path resolution', () => {
   it('sets empty paths when BASE is empty', () => {
     const r = runPythonCode(`
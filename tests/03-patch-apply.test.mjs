@@ -853,6 +853,197 @@ describe('individual patch application', () => {
       sentinel: 'WM-012c: Proxy getWitnessChain',
       absent: null,
     },
+    // WM-013: Batched storeEntries API + memory_store_batch MCP tool
+    {
+      id: 'WM-013',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'export async function storeEntries(entries)',
+      absent: null,
+    },
+    {
+      id: 'WM-013',
+      file: 'mcp-tools/memory-tools.js',
+      sentinel: "name: 'memory_store_batch'",
+      absent: null,
+    },
+    // WM-014: Persistent content-addressed embedding cache
+    {
+      id: 'WM-014',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'async function _generateEmbeddingUncached(text) {',
+      absent: null,
+    },
+    {
+      id: 'WM-014',
+      file: 'commands/memory.js',
+      sentinel: 'WM-014b: Embedding cache counters',
+      absent: null,
+    },
+    // EM-003: Batched transformer inference
+    {
+      id: 'EM-003',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'function _batchEmbedder(embedder)',
+      absent: null,
+    },
+    // WM-015: FTS5 keyword index (extends WM-001b searchEntries)
+    {
+      id: 'WM-015',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'WM-015c: Keyword fallback via the FTS5 index',
+      absent: null,
+      deps: ['WM-001'],
+    },
+    // WM-016: Hybrid search mode (RRF)
+    {
+      id: 'WM-016',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'WM-016b: mode \'hybrid\'',
+      absent: null,
+      deps: ['WM-001', 'WM-015'],
+    },
+    {
+      id: 'WM-016',
+      file: 'mcp-tools/memory-tools.js',
+      sentinel: 'WM-016d: memory_search `mode` input',
+      absent: null,
+    },
+    // WM-017: Maintained per-namespace entry counts
+    {
+      id: 'WM-017',
+      file: 'memory/memory-initializer.js',
+      sentinel: '_namespaceCount(namespace) ?? await _hybridBackend.count(namespace)',
+      absent: 'const count = await _hybridBackend.count(namespace);',
+      deps: ['WM-001'],
+    },
+    {
+      id: 'WM-017',
+      file: 'init/helpers-generator.js',
+      sentinel: 'FROM memory_namespace_counts',
+      absent: null,
+      deps: ['WM-003'],
+    },
+    {
+      id: 'WM-017',
+      file: 'commands/memory.js',
+      sentinel: 'WM-017g: Per-namespace entry counts',
+      absent: null,
+    },
+    // WM-018: Keyset-pagination cursors
+    {
+      id: 'WM-018',
+      file: 'memory/memory-initializer.js',
+      sentinel: '...(page ? { nextCursor: page.nextCursor } : {})',
+      absent: null,
+      deps: ['WM-001'],
+    },
+    {
+      id: 'WM-018',
+      file: 'commands/memory.js',
+      sentinel: 'WM-018g: `memory list` keyset flags',
+      absent: null,
+    },
+    // WM-019: Streaming NDJSON export / import
+    {
+      id: 'WM-019',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'export async function* exportEntries(options = {}) {',
+      absent: null,
+    },
+    {
+      id: 'WM-019',
+      file: 'commands/memory.js',
+      sentinel: 'WM-019b: NDJSON `memory export` / `memory import`',
+      absent: null,
+    },
+    // GV-002: HNSW tombstone log
+    {
+      id: 'GV-002',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'GV-002a: Append-only tombstone log for HNSW deletes',
+      absent: null,
+      deps: ['WM-019'],
+    },
+    // DM-007: Incremental HNSW maintenance
+    {
+      id: 'DM-007',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'export async function syncHNSWIndex(options = {}) {',
+      absent: null,
+      deps: ['WM-019', 'GV-002'],
+    },
+    // EM-004: Binary HNSW metadata image
+    {
+      id: 'EM-004',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'class _HNSWMetadataView {',
+      absent: null,
+      deps: ['WM-019', 'GV-002', 'DM-007'],
+    },
+    // WM-020: AgentDB vector quantization + full-precision re-rank
+    {
+      id: 'WM-020',
+      file: '../../../memory/dist/agentdb-backend.js',
+      sentinel: "const QUANTIZATION_TYPES = { int8: 'scalar', pq: 'product', binary: 'binary' };",
+      absent: null,
+    },
+    {
+      id: 'WM-020',
+      file: '../../../memory/dist/hybrid-backend.js',
+      sentinel: 'async _querySemanticCandidates(query) { // WM-020f',
+      absent: null,
+    },
+    {
+      id: 'WM-020',
+      file: 'memory/memory-initializer.js',
+      sentinel: "quantization: ['int8', 'pq', 'binary'].includes(agentdbCfg.quantization)",
+      absent: null,
+      deps: ['WM-001', 'WM-007', 'WM-008'],
+    },
+    {
+      id: 'WM-020',
+      file: 'init/executor.js',
+      sentinel: 'agentdbQuantization',
+      absent: null,
+      deps: ['SG-008', 'SG-010', 'WM-008'],
+    },
+    // WM-021: Per-namespace vector sub-indexes
+    {
+      id: 'WM-021',
+      file: '../../../memory/dist/hybrid-backend.js',
+      sentinel: 'WM-021d: Namespace-scoped candidates from the per-namespace sub-indexes',
+      absent: null,
+      deps: ['WM-020'],
+    },
+    {
+      id: 'WM-021',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'namespaceIndexes: agentdbCfg.namespaceIndexes === true',
+      absent: null,
+      deps: ['WM-001', 'WM-007', 'WM-008'],
+    },
+    // WM-022: Write-invalidated searchEntries result cache
+    {
+      id: 'WM-022',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'export function getSearchCacheStats() {',
+      absent: null,
+      deps: ['WM-001', 'WM-009', 'WM-011'],
+    },
+    {
+      id: 'WM-022',
+      file: 'mcp-tools/memory-tools.js',
+      sentinel: 'WM-022b: memory_search result cache counters',
+      absent: null,
+    },
+    // WM-023: TTL expiry sweeper
+    {
+      id: 'WM-023',
+      file: 'memory/memory-initializer.js',
+      sentinel: 'export async function sweepExpiredEntries(options = {}) {',
+      absent: null,
+      deps: ['WM-001', 'WM-009', 'WM-011', 'WM-022'],
+    },
   ];
 
   for (const { id, file, sentinel, absent, deps } of TESTS) {
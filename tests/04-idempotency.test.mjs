@@ -1,7 +1,7 @@
 import { describe, it, beforeEach, afterEach } from 'node:test';
 import assert from 'node:assert/strict';
-import { readFileSync } from 'node:fs';
-import { join } from 'node:path';
+import { readFileSync, writeFileSync, existsSync } from 'node:fs';
+import { join, dirname } from 'node:path';
 import { createFixtureTree } from './helpers/fixture-factory.mjs';
 import { runPatch } from './helpers/run-python.mjs';
 
@@ -83,6 +83,43 @@ describe('patch idempotency', () => {
     { id: 'WM-011', file: 'mcp-tools/hooks-tools.js' },
     // WM-012: HybridBackend proxy methods for learning + witness chain
     { id: 'WM-012', file: '../../../memory/dist/hybrid-backend.js' },
+    // WM-013: Batched storeEntries API
+    { id: 'WM-013', file: 'memory/memory-initializer.js' },
+    { id: 'WM-013', file: 'mcp-tools/memory-tools.js' },
+    // WM-014: Persistent embedding cache
+    { id: 'WM-014', file: 'memory/memory-initializer.js' },
+    { id: 'WM-014', file: 'commands/memory.js' },
+    // EM-003: Batched transformer inference
+    { id: 'EM-003', file: 'memory/memory-initializer.js' },
+    // WM-015: FTS5 keyword index
+    { id: 'WM-015', file: 'memory/memory-initializer.js' },
+    // WM-016: Hybrid search mode (RRF)
+    { id: 'WM-016', file: 'memory/memory-initializer.js' },
+    { id: 'WM-016', file: 'mcp-tools/memory-tools.js' },
+    // WM-017: Maintained per-namespace entry counts
+    { id: 'WM-017', file: 'memory/memory-initializer.js' },
+    { id: 'WM-017', file: 'commands/memory.js' },
+    // WM-018: Keyset-pagination cursors
+    { id: 'WM-018', file: 'memory/memory-initializer.js' },
+    { id: 'WM-018', file: 'commands/memory.js' },
+    // WM-019: Streaming NDJSON export / import
+    { id: 'WM-019', file: 'memory/memory-initializer.js' },
+    { id: 'WM-019', file: 'commands/memory.js' },
+    // GV-002: HNSW tombstone log
+    { id: 'GV-002', file: 'memory/memory-initializer.js' },
+    // DM-007: Incremental HNSW maintenance
+    { id: 'DM-007', file: 'memory/memory-initializer.js' },
+    // EM-004: Binary HNSW metadata image
+    { id: 'EM-004', file: 'memory/memory-initializer.js' },
+    // WM-020: AgentDB vector quantization
+    { id: 'WM-020', file: '../../../memory/dist/agentdb-backend.js' },
+    { id: 'WM-020', file: '../../../memory/dist/hybrid-backend.js' },
+    // WM-021: Per-namespace vector sub-indexes
+    { id: 'WM-021', file: '../../../memory/dist/hybrid-backend.js' },
+    // WM-022: searchEntries result cache
+    { id: 'WM-022', file: 'mcp-tools/memory-tools.js' },
+    // WM-023: TTL expiry sweeper
+    { id: 'WM-023', file: 'memory/memory-initializer.js' },
   ];
 
   for (const { id, file } of PATCHES) {
@@ -107,3 +144,66 @@ describe('patch idempotency', () => {
     });
   }
 });
+
+describe('patch manifest (.cfp-manifest.json)', () => {
+  let fixture;
+
+  beforeEach(() => { fixture = createFixtureTree(); });
+  afterEach(() => { fixture.cleanup(); });
+
+  const env = { CFP_PATCH_SET: 'test-set-1' };
+  const hwe = () => join(fixture.base, 'services/headless-worker-executor.js');
+  const manifestPath = () => join(dirname(fixture.base), '.cfp-manifest.json');
+
+  it('records the patch set and a hash of each patched file', () => {
+    runPatch('HW-001', fixture.base, { env });
+    assert.ok(existsSync(manifestPath()), 'manifest should be written next to dist/src');
+    const manifest = JSON.parse(readFileSync(manifestPath(), 'utf-8'));
+    assert.equal(manifest.patchSet, 'test-set-1');
+    assert.match(manifest.files[hwe()], /^[0-9a-f]{64}$/);
+  });
+
+  it('skips unchanged files without searching on the next run', () => {
+    runPatch('HW-001', fixture.base, { env });
+    const r2 = runPatch('HW-001', fixture.base, { env });
+    assert.ok(r2.stdout.includes('Manifest: 1/1 file(s) unchanged'), r2.stdout);
+    assert.ok(!r2.stdout.includes('Applied:'));
+  });
+
+  it('records files with WARN ops and replays the WARN without searching', () => {
+    const mi = join(fixture.base, 'memory/memory-initializer.js');
+    // WM-017a applies to the fixture; WM-017b-d anchor on WM-001 text it lacks
+    const r1 = runPatch('WM-017', fixture.base, { env });
+    assert.ok(r1.stdout.includes('Applied: WM-017a'), r1.stdout);
+    assert.ok(r1.stdout.includes('WARN: WM-017b'), r1.stdout);
+    const manifest = JSON.parse(readFileSync(manifestPath(), 'utf-8'));
+    assert.match(manifest.files[mi], /^[0-9a-f]{64}$/);
+    assert.ok(manifest.warnings[mi]['WM-017b: attach namespace counters at HybridBackend init']);
+
+    const r2 = runPatch('WM-017', fixture.base, { env });
+    assert.match(r2.stdout, /Manifest: (\d+)\/\1 file\(s\) unchanged/);
+    assert.ok(!r2.stdout.includes('Applied:'), r2.stdout);
+    const warns = (out) => out.split('\n').filter(l => l.includes('WARN:')).sort();
+    assert.deepEqual(warns(r2.stdout), warns(r1.stdout));
+  });
+
+  it('re-patches a file whose content drifted', () => {
+    const original = readFileSync(hwe(), 'utf-8');
+    runPatch('HW-001', fixture.base, { env });
+    writeFileSync(hwe(), original);  // simulate npx cache wipe of one file
+    const r2 = runPatch('HW-001', fixture.base, { env });
+    assert.ok(r2.stdout.includes('Manifest: 0/1 file(s) unchanged'), r2.stdout);
+    assert.ok(r2.stdout.includes('Applied: 1: stdin pipe'));
+  });
+
+  it('ignores a manifest written for a different patch set', () => {
+    runPatch('HW-001', fixture.base, { env });
+    const r2 = runPatch('HW-001', fixture.base, { env: { CFP_PATCH_SET: 'test-set-2' } });
+    assert.ok(!r2.stdout.includes('Manifest:'));
+  });
+
+  it('is not written when no patch set is given', () => {
+    runPatch('HW-001', fixture.base);
+    assert.ok(!existsSync(manifestPath()));
+  });
+});
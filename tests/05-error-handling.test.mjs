@@ -1,11 +1,12 @@
 import { describe, it } from 'node:test';
 import assert from 'node:assert/strict';
 import { spawnSync } from 'node:child_process';
-import { mkdtempSync, mkdirSync, writeFileSync, rmSync } from 'node:fs';
+import { mkdtempSync, mkdirSync, writeFileSync, readFileSync, rmSync, symlinkSync } from 'node:fs';
 import { resolve, dirname, join } from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { tmpdir } from 'node:os';
 import { runPatch, runPythonCode } from './helpers/run-python.mjs';
+import { makeNpmCacheStructure } from './helpers/fixture-factory.mjs';
 
 const __dirname = dirname(fileURLToPath(import.meta.url));
 const ROOT = resolve(__dirname, '..');
@@ -106,6 +107,20 @@ describe('--global and --target flags', () => {
     assert.equal(r.status, 0);
     assert.ok(r.stdout.includes('--global'));
     assert.ok(r.stdout.includes('--target'));
+    assert.ok(r.stdout.includes('--jobs'));
+  });
+
+  it('--jobs rejects a non-positive value', () => {
+    const r = run('--jobs', '0');
+    assert.equal(r.status, 1);
+    const out = r.stdout + r.stderr;
+    assert.ok(out.includes('positive integer'), 'should report invalid --jobs');
+  });
+
+  it('--profile without argument exits 1', () => {
+    const r = run('--profile');
+    assert.equal(r.status, 1);
+    assert.ok((r.stdout + r.stderr).includes('requires an output file'));
   });
 
   it('cleanup: remove temp dir', () => {
@@ -113,6 +128,75 @@ describe('--global and --target flags', () => {
   });
 });
 
+describe('parallel patching (--jobs)', () => {
+  const PATCH_ALL = resolve(ROOT, 'patch-all.sh');
+  let fakeHome;
+
+  it('setup: create fake HOME with three installs (one symlinked duplicate)', () => {
+    fakeHome = mkdtempSync(join(tmpdir(), 'cfp-jobs-test-'));
+    makeNpmCacheStructure(fakeHome, 'hash-a');
+    makeNpmCacheStructure(fakeHome, 'hash-b');
+    symlinkSync(join(fakeHome, '.npm', '_npx', 'hash-a'), join(fakeHome, '.npm', '_npx', 'hash-c'));
+  });
+
+  it('patches each distinct install once and prints a combined summary', () => {
+    const r = spawnSync('bash', [PATCH_ALL, '--global', '--jobs', '2'], {
+      encoding: 'utf-8', timeout: 60_000,
+      env: { ...process.env, HOME: fakeHome },
+    });
+    assert.equal(r.status, 0, r.stderr);
+    const out = r.stdout + r.stderr;
+    assert.equal((out.match(/Done: \d+ applied/g) || []).length, 2, 'symlinked duplicate patched once');
+    assert.ok(/Summary: 2 install\(s\), 2 patched, 0 failed/.test(out), 'should print combined summary');
+    const mi = readFileSync(join(fakeHome, '.npm', '_npx', 'hash-b', 'node_modules',
+      '@claude-flow', 'cli', 'dist', 'src', 'memory', 'memory-initializer.js'), 'utf-8');
+    assert.ok(mi.includes('WM-001'), 'second install should be patched');
+  });
+
+  it('cleanup: remove fake HOME', () => {
+    rmSync(fakeHome, { recursive: true, force: true });
+  });
+});
+
+describe('patch profiler (--profile)', () => {
+  const PATCH_ALL = resolve(ROOT, 'patch-all.sh');
+  let fakeHome;
+
+  it('setup: create fake HOME with one install', () => {
+    fakeHome = mkdtempSync(join(tmpdir(), 'cfp-profile-test-'));
+    makeNpmCacheStructure(fakeHome, 'hash-a');
+  });
+
+  it('writes a JSON report and prints the slowest dirs, files and ops', () => {
+    const report = join(fakeHome, 'profile.json');
+    const r = spawnSync('bash', [PATCH_ALL, '--global', '--profile', report], {
+      encoding: 'utf-8', timeout: 60_000,
+      env: { ...process.env, HOME: fakeHome, PATCH_INCLUDE: '^(CF-001|HW-001)' },
+    });
+    assert.equal(r.status, 0, r.stderr);
+    assert.ok(/Profile: \d+ ops, 2 patch dirs/.test(r.stdout), r.stdout);
+
+    const { installs } = JSON.parse(readFileSync(report, 'utf-8'));
+    assert.equal(installs.length, 1);
+    const [{ ops, dirs, files }] = installs;
+    assert.ok(ops.length > 0);
+    for (const op of ops) {
+      assert.ok(/^(010-CF-001|140-HW-001)/.test(op.dir), `op charged to ${op.dir}`);
+      assert.ok(op.wallMs >= op.searchMs);
+    }
+    assert.ok(ops.some(o => o.dir.startsWith('140-HW-001') && o.status === 'applied'));
+    assert.deepEqual(dirs.filter(d => d.dir).map(d => d.dir).sort(),
+      ['010-CF-001-doctor-yaml', '140-HW-001-stdin-hang']);
+    const doctor = files.find(f => f.file.endsWith('commands/doctor.js'));
+    assert.ok(doctor.readBytes > 0 && doctor.writtenBytes > doctor.readBytes);
+    for (let i = 1; i < ops.length; i++) assert.ok(ops[i - 1].wallMs >= ops[i].wallMs, 'ops sorted by wall time');
+  });
+
+  it('cleanup: remove fake HOME', () => {
+    rmSync(fakeHome, { recursive: true, force: true });
+  });
+});
+
 describe('PATCH_INCLUDE / PATCH_EXCLUDE filtering', () => {
   // Test the filtering logic in isolation using a temp directory with
   // fake patch dirs and a minimal bash script that mimics patch-all.sh's loop.
@@ -1,7 +1,9 @@
 import { describe, it, beforeEach, afterEach } from 'node:test';
 import assert from 'node:assert/strict';
 import { spawnSync } from 'node:child_process';
-import { mkdtempSync, rmSync, mkdirSync, cpSync, writeFileSync } from 'node:fs';
+import {
+  mkdtempSync, rmSync, mkdirSync, cpSync, writeFileSync, existsSync, readFileSync, utimesSync,
+} from 'node:fs';
 import { resolve, dirname, join } from 'node:path';
 import { fileURLToPath } from 'node:url';
 import { tmpdir } from 'node:os';
@@ -31,7 +33,7 @@ function runDiscover(fakeHome, funcCall, extraEnv = {}) {
   const r = spawnSync('bash', ['-c', script], {
     encoding: 'utf-8',
     timeout: 10_000,
-    env: { ...process.env, ...extraEnv, HOME: fakeHome },
+    env: { ...process.env, CFP_CACHE_DIR: join(fakeHome, '.cache', 'cfp'), ...extraEnv, HOME: fakeHome },
   });
   return {
     stdout: r.stdout || '',
@@ -110,6 +112,64 @@ describe('lib/discover.sh', () => {
     });
   });
 
+  describe('discovery cache', () => {
+    // Counts `npm config get prefix` calls; fixed prefix so the cache key is stable
+    const counted = `npm() { echo x >> "$HOME/npm-calls"; echo /tmp/cfp-no-such-prefix; }; discover_all_cf_installs`;
+    const npmCalls = () => {
+      const f = join(fakeHome, 'npm-calls');
+      return existsSync(f) ? readFileSync(f, 'utf-8').trim().split('\n').length : 0;
+    };
+    // mtimes have 1s resolution; inputs touched in the last 2s are never cached
+    const settle = () => {
+      const past = new Date(Date.now() - 60_000);
+      utimesSync(join(fakeHome, '.npm', '_npx'), past, past);
+    };
+
+    it('serves an unchanged tree from the cache without calling npm', () => {
+      makeNpmCacheStructure(fakeHome, 'hash-a');
+      makeUmbrellaCacheStructure(fakeHome, 'hash-b');
+      settle();
+      const first = runDiscover(fakeHome, counted);
+      assert.equal(first.status, 0, first.stderr);
+      assert.equal(first.lines.length, 2);
+      assert.ok(existsSync(join(fakeHome, '.cache', 'cfp', 'discover.tsv')));
+
+      const second = runDiscover(fakeHome, counted);
+      assert.equal(second.stdout, first.stdout);
+      assert.equal(npmCalls(), 1, 'second run must not re-query the npm prefix');
+    });
+
+    it('rediscovers when an install is added', () => {
+      makeNpmCacheStructure(fakeHome, 'hash-a');
+      settle();
+      runDiscover(fakeHome, counted);
+      makeNpmCacheStructure(fakeHome, 'hash-c');
+      const r = runDiscover(fakeHome, counted);
+      assert.equal(r.lines.length, 2, r.stdout);
+      assert.equal(npmCalls(), 2);
+    });
+
+    it('rediscovers when a cached install disappears', () => {
+      makeNpmCacheStructure(fakeHome, 'hash-a');
+      makeNpmCacheStructure(fakeHome, 'hash-b');
+      settle();
+      runDiscover(fakeHome, counted);
+      rmSync(join(fakeHome, '.npm', '_npx', 'hash-b', 'node_modules'), { recursive: true });
+      settle();
+      const r = runDiscover(fakeHome, counted);
+      assert.equal(r.lines.length, 1, r.stdout);
+      assert.ok(r.lines[0].includes('hash-a'));
+    });
+
+    it('is bypassed with CFP_NO_DISCOVER_CACHE=1', () => {
+      makeNpmCacheStructure(fakeHome, 'hash-a');
+      settle();
+      const r = runDiscover(fakeHome, counted, { CFP_NO_DISCOVER_CACHE: '1' });
+      assert.equal(r.lines.length, 1);
+      assert.ok(!existsSync(join(fakeHome, '.cache', 'cfp', 'discover.tsv')));
+    });
+  });
+
   describe('discover_target_installs', () => {
     it('finds direct layout in target dir', () => {
       const projectDir = join(fakeHome, 'project');
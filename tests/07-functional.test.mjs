@@ -1,7 +1,8 @@
 import { describe, it, beforeEach, afterEach } from 'node:test';
 import assert from 'node:assert/strict';
-import { readFileSync } from 'node:fs';
+import { readFileSync, writeFileSync, existsSync } from 'node:fs';
 import { join } from 'node:path';
+import { pathToFileURL } from 'node:url';
 import { spawnSync } from 'node:child_process';
 import { createFixtureTree } from './helpers/fixture-factory.mjs';
 import { runPatch } from './helpers/run-python.mjs';
@@ -97,3 +98,433 @@ describe('functional: WM-003 session hooks', () => {
     );
   });
 });
+
+describe('functional: EM-004 binary HNSW metadata image', () => {
+  let fixture;
+  let content;
+
+  beforeEach(() => {
+    fixture = createFixtureTree();
+    // EM-004a sits above DM-007a's helpers, which sit above GV-002a's
+    for (const id of ['GV-002', 'DM-007', 'EM-004']) {
+      const r = runPatch(id, fixture.base);
+      assert.equal(r.status, 0, `${id} patch failed: ${r.stderr}`);
+    }
+    content = readFileSync(join(fixture.base, 'memory', 'memory-initializer.js'), 'utf-8');
+  });
+
+  afterEach(() => { fixture.cleanup(); });
+
+  // The EM-004a block as an importable module
+  async function loadImageModule() {
+    const start = content.indexOf('// EM-004a: Binary load image');
+    const end = content.indexOf('// DM-007a: Incremental HNSW maintenance', start);
+    assert.ok(start >= 0 && end > start, 'EM-004a block not found above DM-007a');
+    const modPath = join(fixture.dir, 'em004a.mjs');
+    writeFileSync(modPath, [
+      "import fs from 'node:fs';",
+      "import path from 'node:path';",
+      content.slice(start, end),
+      'export { _HNSWMetadataView, _openHNSWMetadataBin, _writeHNSWMetadataBin, _hnswBinPath };',
+    ].join('\n'));
+    return import(pathToFileURL(modPath).href);
+  }
+
+  it('getHNSWIndex loads through the image and saveHNSWMetadata refreshes it', () => {
+    assert.ok(content.includes('_openHNSWMetadataBin(metadataPath)) || new Map(); // EM-004b'),
+      'EM-004b: getHNSWIndex metadata load not rewritten');
+    assert.ok(content.includes('function _saveHNSWMetadataJson('),
+      'EM-004c: saveHNSWMetadata not wrapped');
+    assert.ok(content.includes('_applyHNSWTombstones(hnswIndex); // GV-002e'),
+      'GV-002e: saveHNSWMetadata does not apply tombstones');
+    assert.ok(content.includes('async function _searchHNSWIndexUnfiltered('),
+      'GV-002d: searchHNSWIndex not wrapped');
+  });
+
+  it('patched memory-initializer.js is valid JavaScript', () => {
+    const r = spawnSync('node', ['--check', join(fixture.base, 'memory', 'memory-initializer.js')], {
+      encoding: 'utf-8',
+      timeout: 5000,
+    });
+    assert.equal(r.status, 0, `Syntax error: ${r.stderr}`);
+  });
+
+  it('_HNSWMetadataView round-trips through the image', async () => {
+    const { _HNSWMetadataView, _openHNSWMetadataBin, _writeHNSWMetadataBin, _hnswBinPath } = await loadImageModule();
+    const metadataPath = join(fixture.dir, 'hnsw.metadata.json');
+    const metadata = [
+      ['mem_b', { key: 'b', namespace: 'x', content: 'beta' }],
+      ['mem_a', { key: 'a', namespace: 'x', content: 'alpha' }],
+      ['mem_\u00e9', { key: 'e', namespace: 'y', content: 'non-ascii id' }],
+    ];
+    writeFileSync(metadataPath, JSON.stringify(metadata));
+
+    // First load parses the JSON and writes the image
+    const parsed = _openHNSWMetadataBin(metadataPath);
+    assert.ok(parsed instanceof Map && !(parsed instanceof _HNSWMetadataView));
+    assert.ok(existsSync(_hnswBinPath(metadataPath)), 'image not written on first load');
+
+    // Next load is a view over the image
+    const view = _openHNSWMetadataBin(metadataPath);
+    assert.ok(view instanceof _HNSWMetadataView, 'image not loaded as a view');
+    assert.equal(view.size, 3);
+    assert.deepEqual(view.get('mem_a'), metadata[1][1]);
+    assert.deepEqual(view.get('mem_\u00e9'), metadata[2][1]);
+    assert.equal(view.has('mem_b'), true);
+    assert.equal(view.has('mem_zz'), false);
+    assert.equal(view.get('mem_zz'), undefined);
+    assert.deepEqual(new Map(view), new Map(metadata));
+
+    // Changes go to the overlay
+    view.set('mem_c', { key: 'c', namespace: 'x', content: 'gamma' });
+    view.set('mem_a', { key: 'a', namespace: 'x', content: 'alpha v2' });
+    assert.equal(view.delete('mem_b'), true);
+    assert.equal(view.delete('mem_b'), false);
+    assert.equal(view.size, 3);
+    assert.equal(view.has('mem_b'), false);
+    assert.equal(view.get('mem_a').content, 'alpha v2');
+    assert.deepEqual([...view.keys()].sort(), ['mem_a', 'mem_c', 'mem_\u00e9']);
+    const seen = [];
+    view.forEach((value, id) => seen.push([id, value.content]));
+    assert.deepEqual(seen.sort(), [['mem_a', 'alpha v2'], ['mem_c', 'gamma'], ['mem_\u00e9', 'non-ascii id']]);
+
+    // Re-save: JSON from the view, then the image (what saveHNSWMetadata does)
+    const expected = new Map(view);
+    writeFileSync(metadataPath, JSON.stringify([...view]));
+    _writeHNSWMetadataBin(metadataPath, view);
+    const reloaded = _openHNSWMetadataBin(metadataPath);
+    assert.ok(reloaded instanceof _HNSWMetadataView, 're-saved image not loaded as a view');
+    assert.equal(reloaded.size, 3);
+    assert.deepEqual(new Map(reloaded), expected);
+
+    // An image that no longer matches the JSON is rebuilt from it
+    writeFileSync(metadataPath, JSON.stringify([['mem_only', { key: 'only' }]]));
+    const stale = _openHNSWMetadataBin(metadataPath);
+    assert.ok(!(stale instanceof _HNSWMetadataView), 'stale image was used');
+    assert.deepEqual([...stale.keys()], ['mem_only']);
+  });
+});
+
+describe('functional: WM-016 reciprocal-rank fusion', () => {
+  let fixture;
+  let content;
+
+  beforeEach(() => {
+    fixture = createFixtureTree();
+    // WM-016a sits above WM-015a's keyword index helpers
+    for (const id of ['WM-015', 'WM-016']) {
+      const r = runPatch(id, fixture.base);
+      assert.equal(r.status, 0, `${id} patch failed: ${r.stderr}`);
+    }
+    content = readFileSync(join(fixture.base, 'memory', 'memory-initializer.js'), 'utf-8');
+  });
+
+  afterEach(() => { fixture.cleanup(); });
+
+  // The WM-016a block as an importable module, with the backend and the
+  // WM-015a keyword lookup supplied by the test
+  async function loadFusionModule() {
+    const start = content.indexOf('// WM-016a: Hybrid search');
+    const end = content.indexOf('// WM-015a: FTS5 keyword index over', start);
+    assert.ok(start >= 0 && end > start, 'WM-016a block not found above WM-015a');
+    const modPath = join(fixture.dir, 'wm016a.mjs');
+    writeFileSync(modPath, [
+      "import fs from 'node:fs';",
+      "import path from 'node:path';",
+      'let _hybridBackend = null;',
+      'let _keywordRows = [];',
+      'function _keywordSearch() { return _keywordRows; }',
+      content.slice(start, end),
+      'function _setSources(backend, keywordRows) { _hybridBackend = backend; _keywordRows = keywordRows; }',
+      'export { _hybridSearch, _setSources };',
+    ].join('\n'));
+    return import(pathToFileURL(modPath).href);
+  }
+
+  const row = (id, content) => ({ id, key: id.slice(-3), content, namespace: 'default' });
+
+  it('keeps entries whose ids share a prefix apart', async () => {
+    const { _hybridSearch, _setSources } = await loadFusionModule();
+    // Generated ids: the first 12 characters are the same for both entries
+    const a = 'mem_1760000000001_aaa';
+    const b = 'mem_1760000000002_bbb';
+    _setSources({ querySemantic: async () => [row(a, 'alpha')] }, [row(b, 'beta')]);
+
+    const results = await _hybridSearch('alpha beta', undefined, 10, 0);
+    assert.equal(results.length, 2, 'prefix-sharing entries were merged');
+    assert.deepEqual(results.map(r => r.content).sort(), ['alpha', 'beta']);
+    for (const r of results) {
+      assert.equal(r.id, 'mem_17600000', 'ids are shortened in the output');
+      assert.equal(r.score, 0.5, 'each entry is first in one list only');
+    }
+  });
+
+  it('adds the scores of an entry found by both searches', async () => {
+    const { _hybridSearch, _setSources } = await loadFusionModule();
+    const a = 'mem_1760000000001_aaa';
+    const b = 'mem_1760000000002_bbb';
+    _setSources({ querySemantic: async () => [row(a, 'alpha'), row(b, 'beta')] }, [row(a, 'alpha')]);
+
+    const results = await _hybridSearch('alpha', undefined, 10, 0);
+    assert.equal(results.length, 2);
+    assert.equal(results[0].content, 'alpha');
+    assert.equal(results[0].score, 1, 'first in both lists scores 1');
+    assert.ok(results[1].score < 0.5);
+  });
+});
+
+describe('functional: WM-022 search result cache', () => {
+  let fixture;
+  let content;
+
+  beforeEach(() => {
+    fixture = createFixtureTree();
+    // WM-022a sits above WM-011a3's getter, which WM-009a's export anchors
+    for (const id of ['WM-009', 'WM-011', 'WM-022']) {
+      const r = runPatch(id, fixture.base);
+      assert.equal(r.status, 0, `${id} patch failed: ${r.stderr}`);
+    }
+    content = readFileSync(join(fixture.base, 'memory', 'memory-initializer.js'), 'utf-8');
+  });
+
+  afterEach(() => { fixture.cleanup(); });
+
+  // The WM-022a block as an importable module over stub search / write
+  // functions; without a HybridBackend only in-process generations count
+  async function loadCacheModule() {
+    const start = content.indexOf('// WM-022a: searchEntries result cache');
+    const end = content.indexOf('// WM-011a3: Expose ReasoningBank instance for hooks', start);
+    assert.ok(start >= 0 && end > start, 'WM-022a block not found above WM-011a3');
+    const modPath = join(fixture.dir, 'wm022a.mjs');
+    writeFileSync(modPath, [
+      "import fs from 'node:fs';",
+      "import path from 'node:path';",
+      'let _hybridBackend = null;',
+      'let searches = 0;',
+      'let searchEntries = async (options) => { searches++; return { success: true, results: [{ key: `k${searches}`, namespace: options.namespace }] }; };',
+      'let storeEntry = async () => ({ success: true });',
+      'let deleteEntry = async () => ({ success: true });',
+      content.slice(start, end),
+      'const api = { search: (o) => searchEntries(o), store: (o) => storeEntry(o), searches: () => searches };',
+      'export { api };',
+    ].join('\n'));
+    return import(pathToFileURL(modPath).href);
+  }
+
+  it('answers a repeated search from the cache', async () => {
+    const { api, getSearchCacheStats } = await loadCacheModule();
+    const first = await api.search({ query: 'auth', namespace: 'default' });
+    const second = await api.search({ query: 'auth', namespace: 'default' });
+    assert.equal(api.searches(), 1);
+    assert.equal(second.cached, true);
+    assert.deepEqual(second.results, first.results);
+    assert.equal(getSearchCacheStats().hits, 1);
+  });
+
+  it('misses on a stale generation after a write to the namespace', async () => {
+    const { api, getSearchCacheStats } = await loadCacheModule();
+    await api.search({ query: 'auth', namespace: 'default' });
+    await api.search({ query: 'auth', namespace: 'other' });
+    await api.store({ key: 'k', value: 'v', namespace: 'default' });
+
+    const again = await api.search({ query: 'auth', namespace: 'default' });
+    assert.equal(api.searches(), 3, 'the write invalidated the cached search');
+    assert.equal(again.cached, undefined);
+    assert.equal(again.results[0].key, 'k3');
+    const untouched = await api.search({ query: 'auth', namespace: 'other' });
+    assert.equal(untouched.cached, true, 'other namespaces keep their entries');
+    const stats = getSearchCacheStats();
+    assert.equal(stats.stale, 1);
+    assert.equal(stats.hits, 1);
+  });
+});
+
+describe('functional: WM-021 per-namespace sub-indexes', () => {
+  let fixture;
+  let HybridBackend;
+
+  beforeEach(async () => {
+    fixture = createFixtureTree();
+    // WM-021d wraps WM-020f's candidate stage
+    for (const id of ['WM-020', 'WM-021']) {
+      const r = runPatch(id, fixture.base);
+      assert.equal(r.status, 0, `${id} patch failed: ${r.stderr}`);
+    }
+    const file = join(fixture.base, '..', '..', '..', 'memory', 'dist', 'hybrid-backend.js');
+    ({ HybridBackend } = await import(pathToFileURL(file).href));
+  });
+
+  afterEach(() => { fixture.cleanup(); });
+
+  // memory_entries rows behind the statements WM-021c prepares
+  function mockDb(rows) {
+    const live = (ns) => rows.filter(r => r.namespace === ns && r.embedding != null);
+    const after = (r, t, id) => r.updated_at > t || (r.updated_at === t && r.id > id);
+    const order = (a, b) => a.updated_at - b.updated_at || (a.id < b.id ? -1 : 1);
+    return {
+      exec() {},
+      prepare(sql) {
+        if (sql.startsWith('PRAGMA')) return { all: () => ['id', 'namespace', 'content', 'embedding', 'updated_at'].map(name => ({ name })) };
+        if (sql.includes('DISTINCT namespace')) return { all: () => [...new Set(rows.map(r => r.namespace))].map(namespace => ({ namespace })) };
+        if (sql.includes('COUNT(*)')) {
+          return { get: (ns) => ({ n: live(ns).length, t: live(ns).length ? Math.max(...live(ns).map(r => r.updated_at)) : null }) };
+        }
+        if (sql.includes('LIMIT 500')) return { all: (ns, t, id) => live(ns).filter(r => after(r, t, id)).sort(order).map(r => ({ ...r })) };
+        if (sql.startsWith('SELECT id FROM')) return { all: (ns) => live(ns).map(r => ({ id: r.id })) };
+        throw new Error(`unexpected SQL: ${sql}`);
+      },
+    };
+  }
+
+  // AgentDBBackend stand-in: sub-indexes are built with this.agentdb.constructor
+  class MockAgentDB {
+    constructor(config) { this.config = config; this.entries = new Map(); }
+    async initialize() {}
+    async bulkInsert(batch) { for (const e of batch) this.entries.set(e.id, e); }
+    async delete(id) { this.entries.delete(id); }
+    async search(embedding, { k }) {
+      return [...this.entries.values()]
+        .map(entry => ({ entry, score: entry.embedding.reduce((s, x, i) => s + x * embedding[i], 0) }))
+        .sort((a, b) => b.score - a.score)
+        .slice(0, k);
+    }
+    async shutdown() {}
+  }
+
+  function backend(rows) {
+    const hb = new HybridBackend({});
+    hb.sqlite = { db: mockDb(rows) };
+    hb.agentdb = new MockAgentDB({ namespaceIndexes: true, dbPath: join(fixture.dir, 'memory.rvf') });
+    return hb;
+  }
+
+  const row = (id, namespace, updated_at, embedding) => ({ id, namespace, content: id, updated_at, embedding: JSON.stringify(embedding) });
+
+  it('answers a namespace query from its sub-index', async () => {
+    const hb = backend([row('a1', 'alpha', 1, [1, 0]), row('b1', 'beta', 1, [1, 0])]);
+    const results = await hb.querySemantic({ embedding: [1, 0], namespace: 'alpha', k: 5 });
+    assert.deepEqual(results.map(r => r.id), ['a1']);
+    assert.equal(hb.agentdb.entries.size, 0, 'the main index was not searched');
+  });
+
+  it('picks up a write to the namespace on the next query', async () => {
+    const rows = [row('a1', 'alpha', 1, [0, 1])];
+    const hb = backend(rows);
+    assert.deepEqual((await hb.querySemantic({ embedding: [1, 0], namespace: 'alpha', k: 5 })).map(r => r.id), ['a1']);
+    const sub = await hb._namespaceIndex('alpha');
+
+    rows.push(row('a2', 'alpha', 2, [1, 0]));
+    rows[0] = row('a1', 'alpha', 3, [0.5, 0.5]);
+    const results = await hb.querySemantic({ embedding: [1, 0], namespace: 'alpha', k: 5 });
+    assert.deepEqual(results.map(r => r.id), ['a2', 'a1']);
+    assert.equal(results[1].score, 0.5, 'the updated vector replaced the old one');
+    assert.equal(await hb._namespaceIndex('alpha'), sub, 'the same sub-index was brought up to date');
+
+    rows.splice(0, 1);
+    const afterDelete = await hb.querySemantic({ embedding: [1, 0], namespace: 'alpha', k: 5 });
+    assert.deepEqual(afterDelete.map(r => r.id), ['a2'], 'a deleted row leaves the sub-index');
+  });
+});
+
+describe('functional: WM-023 TTL expiry', () => {
+  let fixture;
+  let content;
+
+  beforeEach(() => {
+    fixture = createFixtureTree();
+    // WM-023a sits above WM-022a's result cache
+    for (const id of ['WM-009', 'WM-011', 'WM-022', 'WM-023']) {
+      const r = runPatch(id, fixture.base);
+      assert.equal(r.status, 0, `${id} patch failed: ${r.stderr}`);
+    }
+    content = readFileSync(join(fixture.base, 'memory', 'memory-initializer.js'), 'utf-8');
+  });
+
+  afterEach(() => { fixture.cleanup(); });
+
+  // The WM-023a block as an importable module over a HybridBackend stub whose
+  // memory_entries rows answer the statements WM-023a prepares
+  async function loadExpiryModule() {
+    const start = content.indexOf('// WM-023a: TTL expiry');
+    const end = content.indexOf('// WM-022a: searchEntries result cache', start);
+    assert.ok(start >= 0 && end > start, 'WM-023a block not found above WM-022a');
+    const modPath = join(fixture.dir, 'wm023a.mjs');
+    writeFileSync(modPath, [
+      "import fs from 'node:fs';",
+      "import path from 'node:path';",
+      'const rows = [];',
+      'const deleted = [];',
+      'const tombstones = [];',
+      'const due = (now) => rows.filter(r => r.expires_at != null && r.expires_at <= now).sort((a, b) => a.expires_at - b.expires_at);',
+      'const db = {',
+      '  prepare(sql) {',
+      "    if (sql.startsWith('PRAGMA')) return { all: () => ['id', 'namespace', 'key', 'expires_at'].map(name => ({ name })) };",
+      "    if (sql.startsWith('SELECT id, namespace')) return { all: (now, n) => due(now).slice(0, n) };",
+      "    if (sql.startsWith('SELECT id FROM')) return { all: (now) => due(now) };",
+      "    if (sql.startsWith('SELECT COUNT')) return { get: (now) => ({ n: due(now).length }) };",
+      "    if (sql.startsWith('SELECT MAX')) return { get: (now) => ({ t: due(now).reduce((t, r) => Math.max(t, r.expires_at), 0) || null }) };",
+      "    if (sql.startsWith('UPDATE')) return { run: (v, id) => { const r = rows.find(x => x.id === id); if (r) r.expires_at = v; } };",
+      '    throw new Error(`unexpected SQL: ${sql}`);',
+      '  },',
+      '  exec() {},',
+      '  transaction(fn) { return fn; },',
+      '};',
+      'let _hybridBackend = {',
+      '  getSQLiteBackend: () => ({ db }),',
+      '  async querySemantic(q) { return rows.slice(0, q.k || 10).map(r => ({ ...r })); },',
+      '  async bulkDelete(ids) { deleted.push(...ids); for (const id of ids) rows.splice(rows.findIndex(r => r.id === id), 1); },',
+      '};',
+      'function _appendTombstone(id) { tombstones.push(id); }',
+      'async function initializeMemoryDatabase() {}',
+      'let n = 0;',
+      "async function storeEntry(o) { const id = `mem_17600000${++n}_entry`; rows.push({ id, namespace: o.namespace, key: o.key, expires_at: null }); return { success: true, id }; }",
+      'async function searchEntries(o) { const hits = await _hybridBackend.querySemantic({ content: o.query, k: o.limit }); return { success: true, results: hits.map(r => ({ id: r.id.substring(0, 12), key: r.key })) }; }',
+      'async function listEntries() { return { success: true, entries: [] }; }',
+      'async function getEntry(o) { const r = rows.find(x => x.key === o.key); return r ? { success: true, found: true, entry: { id: r.id, key: r.key } } : { success: true, found: false }; }',
+      content.slice(start, end),
+      'const api = { store: (o) => storeEntry(o), search: (o) => searchEntries(o), get: (o) => getEntry(o), rows, deleted, tombstones };',
+      'export { api };',
+    ].join('\n'));
+    return import(pathToFileURL(modPath).href);
+  }
+
+  // Three entries already past their expiry (ttl in seconds), two live ones
+  async function seed(api) {
+    for (const key of ['old1', 'old2', 'old3', 'live']) {
+      await api.store({ key, value: 'v', namespace: 'default', ttl: 3600 });
+    }
+    await api.store({ key: 'forever', value: 'v', namespace: 'default' });
+    for (const r of api.rows.slice(0, 3)) r.expires_at = Date.now() - 1000;
+  }
+
+  it('records the ttl as an expires_at epoch', async () => {
+    const { api } = await loadExpiryModule();
+    const before = Date.now();
+    await api.store({ key: 'k', value: 'v', namespace: 'default', ttl: 60 });
+    await api.store({ key: 'n', value: 'v', namespace: 'default' });
+    assert.ok(api.rows[0].expires_at >= before + 60_000 && api.rows[0].expires_at <= Date.now() + 60_000);
+    assert.equal(api.rows[1].expires_at, null);
+  });
+
+  it('filters expired rows from reads until they are swept', async () => {
+    const { api } = await loadExpiryModule();
+    await seed(api);
+    const { results } = await api.search({ query: 'q', limit: 3 });
+    assert.deepEqual(results.map(r => r.key), ['live', 'forever'], 'semantic reads over-fetch past expired rows');
+    assert.equal((await api.get({ key: 'old1', namespace: 'default' })).found, false);
+    assert.equal((await api.get({ key: 'live', namespace: 'default' })).found, true);
+  });
+
+  it('sweeps expired rows in batches and logs their tombstones', async () => {
+    const { api, sweepExpiredEntries } = await loadExpiryModule();
+    await seed(api);
+    const expiredIds = api.rows.slice(0, 3).map(r => r.id);
+
+    const result = await sweepExpiredEntries({ batchSize: 2 });
+    assert.deepEqual(result, { expired: 3, batches: 2, pending: 0 });
+    assert.deepEqual(api.deleted, expiredIds);
+    assert.deepEqual(api.tombstones, expiredIds);
+    assert.deepEqual(api.rows.map(r => r.key), ['live', 'forever']);
+    assert.deepEqual(await sweepExpiredEntries(), { expired: 0, batches: 0, pending: 0 });
+  });
+});
@@ -0,0 +1,238 @@
+import { describe, it, beforeEach, afterEach } from 'node:test';
+import assert from 'node:assert/strict';
+import { spawnSync } from 'node:child_process';
+import {
+  existsSync, readFileSync, writeFileSync, appendFileSync, mkdtempSync, mkdirSync, rmSync,
+} from 'node:fs';
+import { tmpdir } from 'node:os';
+import { resolve, dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { createFixtureTree } from './helpers/fixture-factory.mjs';
+import { runPatch } from './helpers/run-python.mjs';
+import {
+  breToRegExp, loadSentinels, parseInstall, checkInstall, checkInstalls, loadCache,
+} from '../lib/check-sentinels.mjs';
+import { checkSyntax, contentHash, moduleType } from '../lib/syntax-check.mjs';
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const CHECKER = resolve(__dirname, '..', 'lib', 'check-sentinels.mjs');
+
+function installLine(base) {
+  return `${base}\t3.1.0-test\t-\t-\tyes`;
+}
+
+function runChecker(base, env = {}) {
+  const r = spawnSync('node', [CHECKER], {
+    input: installLine(base) + '\n',
+    encoding: 'utf-8',
+    timeout: 60_000,
+    env: { CFP_CACHE_DIR: join(base, '..', '.no-cache'), ...process.env, ...env },
+  });
+  return { stdout: r.stdout || '', stderr: r.stderr || '', status: r.status ?? 1 };
+}
+
+describe('breToRegExp (grep BRE semantics)', () => {
+  const cases = [
+    ['configPath.endsWith(\'.json\')', "if (configPath.endsWith('.json'))", true],
+    ['better-sqlite3.*\\^12', '"better-sqlite3": "^12.0.0"', true],
+    ['better-sqlite3.*\\^12', '"better-sqlite3": "^11.6.0"', false],
+    ['16 \\* 60 \\* 1000', 'const t = 16 * 60 * 1000;', true],
+    ['\\"backend\\": \\"hybrid\\"', '{ "backend": "hybrid" }', true],
+    ['|| \'patterns\'', "ns || 'patterns'", true],
+    ['^export', 'const a = 1;\nexport default a;', true],
+    ['a$', 'a\nb', true],
+    ['x[[:digit:]]y', 'x7y', true],
+  ];
+  for (const [pattern, text, expected] of cases) {
+    it(`${JSON.stringify(pattern)} ${expected ? 'matches' : 'does not match'}`, () => {
+      assert.equal(breToRegExp(pattern).test(text), expected);
+    });
+  }
+});
+
+describe('lib/check-sentinels.mjs', () => {
+  let fixture;
+
+  beforeEach(() => { fixture = createFixtureTree(); });
+  afterEach(() => { fixture.cleanup(); });
+
+  it('agrees with grep -q for every sentinel directive on the fixture tree', () => {
+    let compared = 0;
+    for (const { checks } of loadSentinels({})) {
+      for (const check of checks) {
+        if (check.package) continue;  // fixture tree only covers @claude-flow/cli
+        const file = join(fixture.base, check.file);
+        if (!existsSync(file)) continue;
+        const viaGrep = spawnSync('grep', ['-q', check.pattern, file]).status === 0;
+        const viaJs = check.re.test(readFileSync(file, 'utf-8'));
+        assert.equal(viaJs, viaGrep, `${check.type} "${check.pattern}" ${check.file}`);
+        compared++;
+      }
+    }
+    assert.ok(compared > 50, `expected to compare many directives, got ${compared}`);
+  });
+
+  it('reports per-patch failures on an unpatched install', () => {
+    const r = runChecker(fixture.base, { PATCH_INCLUDE: '^CF-001' });
+    assert.equal(r.status, 1);
+    assert.ok(r.stdout.includes('[PATCHES] FAIL: 010-CF-001-doctor-yaml'), r.stdout);
+  });
+
+  it('passes once the patch is applied', () => {
+    runPatch('CF-001', fixture.base);
+    const r = runChecker(fixture.base, { PATCH_INCLUDE: '^CF-001' });
+    assert.equal(r.status, 0, r.stdout);
+    assert.equal(r.stdout, '');
+  });
+
+  it('treats missing target files as passing (package not installed)', () => {
+    const { results } = checkInstall(
+      parseInstall(installLine(join(fixture.dir, 'nowhere'))),
+      loadSentinels({ PATCH_INCLUDE: '^CF-001' }),
+    );
+    assert.deepEqual(results.map(r => r.ok), [true]);
+  });
+});
+
+describe('check-sentinels result cache', () => {
+  let fixture, cacheDir;
+
+  beforeEach(() => {
+    fixture = createFixtureTree();
+    cacheDir = mkdtempSync(join(tmpdir(), 'cfp-check-cache-'));
+  });
+  afterEach(() => {
+    fixture.cleanup();
+    rmSync(cacheDir, { recursive: true, force: true });
+  });
+
+  const patches = () => loadSentinels({ PATCH_INCLUDE: '^(CF-001|HW-001)' });
+
+  const freshData = () => loadCache(join(cacheDir, 'none.json'), 'x');
+
+  it('skips unchanged files on the second pass without reading them', async () => {
+    runPatch('CF-001', fixture.base);
+    runPatch('HW-001', fixture.base);
+    const install = parseInstall(installLine(fixture.base));
+    const data = freshData();
+    const first = await checkInstalls([install], patches(), data);
+    assert.ok(first.checked > 0);
+    assert.ok(first.ok);
+    const second = await checkInstalls([install], patches(), data);
+    assert.equal(second.checked, 0, 'nothing should be re-read');
+    assert.ok(second.ok);
+  });
+
+  it('re-checks only the file whose stat key changed', async () => {
+    runPatch('CF-001', fixture.base);
+    runPatch('HW-001', fixture.base);
+    const install = parseInstall(installLine(fixture.base));
+    const data = freshData();
+    await checkInstalls([install], patches(), data);
+    appendFileSync(join(fixture.base, 'commands', 'doctor.js'), '\n// touched\n');
+    const again = await checkInstalls([install], patches(), data);
+    assert.equal(again.checked, 1);
+    assert.equal(again.parsed, 1);
+  });
+
+  it('never caches a failing file', () => {
+    const install = parseInstall(installLine(fixture.base));
+    const cache = {};
+    checkInstall(install, patches(), { cache });
+    assert.equal(cache[join(fixture.base, 'commands', 'doctor.js')], undefined);
+    const again = checkInstall(install, patches(), { cache });
+    assert.ok(again.results.some(r => !r.ok), 'unpatched CF-001 must still fail');
+  });
+
+  it('persists the cache and reports syntax errors', () => {
+    runPatch('CF-001', fixture.base);
+    const env = { CFP_CACHE_DIR: cacheDir, PATCH_INCLUDE: '^CF-001' };
+    const ok = runChecker(fixture.base, env);
+    assert.equal(ok.status, 0, ok.stdout);
+    assert.ok(existsSync(join(cacheDir, 'check-cache.json')));
+
+    writeFileSync(join(fixture.base, 'commands', 'status.js'), 'const x = ;\n');
+    const bad = runChecker(fixture.base, env);
+    assert.equal(bad.status, 1);
+    assert.ok(bad.stdout.includes('SYNTAX ERROR'), bad.stdout);
+    assert.ok(bad.stdout.includes('status.js'));
+  });
+
+  it('does not stat-cache a syntax file that fails to parse', async () => {
+    runPatch('CF-001', fixture.base);
+    const install = parseInstall(installLine(fixture.base));
+    const data = freshData();
+    const status = join(fixture.base, 'commands', 'status.js');
+    writeFileSync(status, 'const x = ;\n');
+    const r = await checkInstalls([install], patches(), data);
+    assert.equal(r.ok, false);
+    assert.deepEqual(r.syntaxErrors.map(e => e.file), [status]);
+    assert.equal(data.installs[fixture.base][status], undefined);
+  });
+
+  it('keeps syntax verdicts when the sentinel set changes', async () => {
+    runPatch('CF-001', fixture.base);
+    const install = parseInstall(installLine(fixture.base));
+    const file = join(cacheDir, 'check-cache.json');
+    const data = loadCache(file, 'a');
+    await checkInstalls([install], patches(), data);
+    writeFileSync(file, JSON.stringify(data));
+
+    const reloaded = loadCache(file, 'b');
+    assert.deepEqual(reloaded.installs, {});
+    const r = await checkInstalls([install], patches(), reloaded);
+    assert.ok(r.checked > 0, 'sentinels must be re-evaluated');
+    assert.equal(r.parsed, 0, 'unchanged bytes must not be re-parsed');
+  });
+});
+
+describe('lib/syntax-check.mjs', () => {
+  let dir;
+
+  beforeEach(() => { dir = mkdtempSync(join(tmpdir(), 'cfp-syntax-')); });
+  afterEach(() => { rmSync(dir, { recursive: true, force: true }); });
+
+  function item(rel, text) {
+    const path = join(dir, rel);
+    mkdirSync(dirname(path), { recursive: true });
+    writeFileSync(path, text);
+    return { path, text };
+  }
+
+  it('resolves module type from extension and nearest package.json', () => {
+    item('esm/package.json', '{"type":"module"}');
+    item('cjs/package.json', '{}');
+    assert.equal(moduleType(join(dir, 'esm', 'a', 'x.js')), 'module');
+    assert.equal(moduleType(join(dir, 'cjs', 'x.js')), 'commonjs');
+    assert.equal(moduleType(join(dir, 'esm', 'x.cjs')), 'commonjs');
+  });
+
+  it('accepts ESM, CommonJS and hashbang files', async () => {
+    item('esm/package.json', '{"type":"module"}');
+    const items = [
+      item('esm/a.js', 'import x from "y";\nexport const a = await x;\n'),
+      item('cjs/b.js', 'const fs = require("fs");\nmodule.exports = { fs };\nreturn;\n'),
+      item('esm/bin.js', '#!/usr/bin/env node\nexport default 1;\n'),
+    ];
+    const { errors, parsed } = await checkSyntax(items, { jobs: 2 });
+    assert.deepEqual(errors, []);
+    assert.equal(parsed, 3);
+  });
+
+  it('reports unparsable files with node\'s message', async () => {
+    const bad = item('bad.js', 'const x = ;\n');
+    const { errors } = await checkSyntax([bad, item('ok.js', 'let y = 1;\n')]);
+    assert.equal(errors.length, 1);
+    assert.equal(errors[0].file, bad.path);
+    assert.match(errors[0].message, /SyntaxError/);
+  });
+
+  it('skips content hashes already known to parse', async () => {
+    const ok = item('ok.js', 'let y = 1;\n');
+    const okHashes = new Set();
+    await checkSyntax([ok], { okHashes });
+    assert.ok(okHashes.has(contentHash(ok.text)));
+    const again = await checkSyntax([ok], { okHashes });
+    assert.equal(again.parsed, 0);
+  });
+});
@@ -0,0 +1,208 @@
+import { describe, it, beforeEach, afterEach } from 'node:test';
+import assert from 'node:assert/strict';
+import { spawnSync } from 'node:child_process';
+import { writeFileSync, readFileSync, readdirSync, mkdtempSync, mkdirSync, rmSync } from 'node:fs';
+import { resolve, dirname, join } from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { tmpdir } from 'node:os';
+
+const __dirname = dirname(fileURLToPath(import.meta.url));
+const LOADER = resolve(__dirname, '..', 'lib', 'patch-loader.py');
+const PLANNER = resolve(__dirname, '..', 'lib', 'patch_plan.py');
+
+describe('lib/patch-loader.py', () => {
+  let dir, target, cacheDir;
+
+  beforeEach(() => {
+    dir = mkdtempSync(join(tmpdir(), 'cfp-loader-'));
+    target = join(dir, 'target.js');
+    cacheDir = join(dir, 'cache');
+    writeFileSync(target, 'const a = 1;\nconst b = 2;\n');
+  });
+
+  afterEach(() => { rmSync(dir, { recursive: true, force: true }); });
+
+  function fix(name, code) {
+    const path = join(dir, 'patch', name, 'fix.py');
+    mkdirSync(dirname(path), { recursive: true });
+    writeFileSync(path, code);
+    return path;
+  }
+
+  function load(fixes, env = {}) {
+    const r = spawnSync('python3', [LOADER, '--label', 'T', ...fixes], {
+      encoding: 'utf-8',
+      timeout: 10_000,
+      env: { ...process.env, BASE: dir, CFP_CACHE_DIR: cacheDir, ...env },
+    });
+    return { stdout: r.stdout || '', stderr: r.stderr || '', status: r.status ?? 1 };
+  }
+
+  it('runs patches in the given order against the shared buffer', () => {
+    const r = load([
+      fix('010-T-001-a', `patch("T-001", "${target}", "a = 1", "a = 10")\n`),
+      fix('020-T-002-b', `patch("T-002", "${target}", "a = 10", "a = 100")\n`),
+    ]);
+    assert.equal(r.status, 0, r.stdout + r.stderr);
+    assert.ok(r.stdout.includes('[T] Done: 2 applied, 0 already present'), r.stdout);
+    assert.equal(readFileSync(target, 'utf-8'), 'const a = 100;\nconst b = 2;\n');
+  });
+
+  it('reports a broken patch and still runs the rest', () => {
+    const r = load([
+      fix('010-T-001-bad', 'patch("T-001", MI,\n'),
+      fix('020-T-002-raises', 'raise RuntimeError("boom")\n'),
+      fix('030-T-003-ok', `patch("T-003", "${target}", "b = 2", "b = 3")\n`),
+    ]);
+    assert.equal(r.status, 1);
+    assert.ok(r.stdout.includes('ERROR: 010-T-001-bad — SyntaxError'), r.stdout);
+    assert.ok(r.stdout.includes('ERROR: 020-T-002-raises — RuntimeError: boom (fix.py line 1)'), r.stdout);
+    assert.ok(r.stdout.includes('Applied: T-003'));
+    assert.ok(readFileSync(target, 'utf-8').includes('b = 3'));
+  });
+
+  it('keeps names a patch defines out of later patches', () => {
+    const r = load([
+      fix('010-T-001-a', '_local = 1\n'),
+      fix('020-T-002-b', 'print("leaked" if "_local" in globals() else "isolated")\n'),
+    ]);
+    assert.equal(r.status, 0, r.stdout);
+    assert.ok(r.stdout.includes('isolated'));
+  });
+
+  it('carries module-level counter updates back to common', () => {
+    const r = load([fix('010-T-001-raw', 'applied += 1\n')]);
+    assert.ok(r.stdout.includes('Done: 1 applied'), r.stdout);
+  });
+
+  it('runs independent chains in workers and prints their output in plan order', () => {
+    const other = join(dir, 'other.js');
+    writeFileSync(other, 'const c = 3;\n');
+    const fixes = [
+      fix('010-T-001-a', `patch("T-001", "${target}", "a = 1", "a = 10")\n`),
+      fix('020-T-002-c', `patch("T-002", "${other}", "c = 3", "c = 30")\nprint("raw op output")\n`),
+      fix('030-T-003-a', `patch("T-003", "${target}", "a = 10", "a = 100")\n`),
+    ];
+    const r = load(fixes, { CFP_CHAIN_JOBS: '2' });
+    assert.equal(r.status, 0, r.stdout + r.stderr);
+    assert.equal(r.stdout, [
+      '  Applied: T-001', '  Applied: T-002', 'raw op output', '  Applied: T-003',
+      '[T] Done: 3 applied, 0 already present', ''].join('\n'));
+    assert.equal(readFileSync(target, 'utf-8'), 'const a = 100;\nconst b = 2;\n');
+    assert.equal(readFileSync(other, 'utf-8'), 'const c = 30;\n');
+  });
+
+  it('falls back to one process when two chains touch the same file', () => {
+    // Different target expressions for one file: the planner sees two chains
+    const r = load([
+      fix('010-T-001-a', `t1 = "${target}"\npatch("T-001", t1, "a = 1", "a = 10")\n`),
+      fix('020-T-002-a', `t2 = "${target}"\npatch("T-002", t2, "a = 10", "a = 100")\n`),
+    ], { CFP_CHAIN_JOBS: '2' });
+    assert.equal(r.status, 0, r.stdout + r.stderr);
+    assert.ok(r.stdout.includes('[T] Done: 2 applied, 0 already present'), r.stdout);
+    assert.equal(readFileSync(target, 'utf-8'), 'const a = 100;\nconst b = 2;\n');
+  });
+
+  it('caches bytecode and recompiles when fix.py changes', () => {
+    const env = { PYTHONDONTWRITEBYTECODE: '' };
+    const path = fix('010-T-001-a', 'print("v1")\n');
+    assert.ok(load([path], env).stdout.includes('v1'));
+    const pyc = readdirSync(join(cacheDir, 'pycache')).filter(f => f.endsWith('.pyc'));
+    assert.equal(pyc.length, 1);
+    assert.ok(load([path], env).stdout.includes('v1'));
+
+    writeFileSync(path, 'print("second version")\n');
+    assert.ok(load([path], env).stdout.includes('second version'));
+  });
+});
+
+describe('lib/patch_plan.py', () => {
+  let dir, target;
+
+  beforeEach(() => {
+    dir = mkdtempSync(join(tmpdir(), 'cfp-plan-'));
+    target = join(dir, 'target.js');
+    writeFileSync(target, 'const alpha = 1;\nconst beta = 2;\n');
+  });
+
+  afterEach(() => { rmSync(dir, { recursive: true, force: true }); });
+
+  function fix(name, code) {
+    const path = join(dir, 'patch', name, 'fix.py');
+    mkdirSync(dirname(path), { recursive: true });
+    writeFileSync(path, code);
+    return path;
+  }
+
+  function load(fixes) {
+    const r = spawnSync('python3', [LOADER, ...fixes], {
+      encoding: 'utf-8',
+      timeout: 10_000,
+      env: { ...process.env, BASE: dir, CFP_CACHE_DIR: join(dir, 'cache') },
+    });
+    return { stdout: r.stdout || '', status: r.status ?? 1 };
+  }
+
+  it('runs a patch after a later-numbered patch it depends on', () => {
+    const r = load([
+      fix('010-T-001-a', `patch("T-001", "${target}", "alpha = 10;", "alpha = 100;")\n`),
+      fix('020-T-002-b', `patch("T-002", "${target}", "alpha = 1;", "alpha = 10;")\n`),
+    ]);
+    assert.equal(r.status, 0, r.stdout);
+    assert.ok(r.stdout.includes('PLAN: T-001 (010-T-001-a) needs 020-T-002-b — running it first'), r.stdout);
+    assert.ok(r.stdout.indexOf('Applied: T-002') < r.stdout.indexOf('Applied: T-001'), r.stdout);
+    assert.ok(readFileSync(target, 'utf-8').includes('alpha = 100;'));
+  });
+
+  it('reports a prerequisite that is not selected before running', () => {
+    fix('010-T-001-a', `patch("T-001", "${target}", "alpha = 1;", "alpha = 10;")\n`);
+    const b = fix('020-T-002-b', `patch("T-002", "${target}", "alpha = 10;", "alpha = 100;")\n`);
+    const r = load([b]);
+    assert.ok(r.stdout.startsWith('  PLAN: T-002 (020-T-002-b) needs 010-T-001-a, which is not selected'), r.stdout);
+    assert.ok(r.stdout.includes('WARN: T-002'), r.stdout);
+  });
+
+  it('reports a cycle and falls back to numeric order', () => {
+    const r = load([
+      fix('010-T-001-a', [
+        `patch("T-001a", "${target}", "beta = 20;", "beta = 200;")`,
+        `patch("T-001b", "${target}", "alpha = 1;", "alpha = 10;")`, ''].join('\n')),
+      fix('020-T-002-b', [
+        `patch("T-002a", "${target}", "alpha = 10;", "alpha = 100;")`,
+        `patch("T-002b", "${target}", "beta = 2;", "beta = 20;")`, ''].join('\n')),
+    ]);
+    assert.ok(r.stdout.includes('PLAN: cycle between 010-T-001-a <-> 020-T-002-b'), r.stdout);
+    assert.ok(r.stdout.indexOf('Applied: T-001b') < r.stdout.indexOf('Applied: T-002a'), r.stdout);
+  });
+
+  it('reports an op no patch provides before running', () => {
+    const r = load([fix('010-T-001-a', `patch("T-001", "${target}", "const gamma = 3;", "const gamma = 30;")\n`)]);
+    assert.ok(r.stdout.startsWith(`  PLAN: T-001 (010-T-001-a) — pattern not in '${target}' and no patch provides it`), r.stdout);
+    assert.ok(r.stdout.includes('WARN: T-001'), r.stdout);
+  });
+
+  it('reports an unguarded helper call whose defining patch is not selected', () => {
+    fix('010-T-001-a', `patch("T-001", "${target}", "alpha = 1;", "alpha = 1;\\nfunction _helper() {}")\n`);
+    const b = fix('020-T-002-b', [
+      `patch("T-002a", "${target}", "beta = 2;", "beta = _helper();")`,
+      `patch("T-002b", "${target}", "const beta", "const beta = typeof _other === 'function' ? _other() : 0;\\nconst gamma")`, ''].join('\n'));
+    fix('030-T-003-c', `patch("T-003", "${target}", "x", "function _other() {}")\n`);
+    const r = load([b]);
+    assert.ok(r.stdout.includes('PLAN: _helper() (020-T-002-b) needs 010-T-001-a, which is not selected'), r.stdout);
+    assert.ok(!r.stdout.includes('_other()'), r.stdout);
+  });
+
+  it('finds op-level dependencies between the shipped patches', () => {
+    const r = spawnSync('python3', [PLANNER, '--json'], { encoding: 'utf-8', timeout: 30_000 });
+    assert.equal(r.status, 0, r.stderr);
+    const plan = JSON.parse(r.stdout);
+    assert.ok(plan.edges['590-WM-011-reasoning-bank-controller'].includes('570-WM-009-agentdb-learning-loop'));
+    assert.deepEqual(plan.cycles, []);
+    assert.ok(plan.order.indexOf('570-WM-009-agentdb-learning-loop') < plan.order.indexOf('590-WM-011-reasoning-bank-controller'));
+    // WM-016a calls the _keywordSearch helper WM-015a defines
+    assert.ok(plan.edges['650-WM-016-hybrid-rrf-search'].includes('640-WM-015-fts5-keyword-index'));
+    const call = plan.calls.find(c => c.dir === '680-WM-019-ndjson-export-import' && c.symbol === '_embedBatch');
+    assert.deepEqual(call.from, ['610-WM-013-batch-store-entries']);
+    assert.equal(call.guarded, true);
+  });
+});
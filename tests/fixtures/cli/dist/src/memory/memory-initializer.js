@@ -1,4 +1,4 @@
-// Minimal fixture for EM-001, GV-001, NS-001, NS-002, WM-001
+// Minimal fixture for EM-001, EM-004, GV-001, GV-002, NS-001, NS-002, WM-001
 
 // WM-001 old_string: initializeMemoryDatabase function header
 export async function initializeMemoryDatabase(options) {
@@ -22,6 +22,80 @@ export async function generateEmbedding(text) {
     // stub
 }
 
+// EM-001 / EM-004 / GV-002 old_string: HNSW index load, search and metadata save
+let hnswIndex = null;
+let hnswInitializing = false;
+export async function getHNSWIndex(options) {
+    const dimensions = options?.dimensions ?? 384;
+    if (hnswIndex?.initialized && !options?.forceRebuild) {
+        return hnswIndex;
+    }
+    hnswInitializing = true;
+    try {
+        const { VectorDb } = await import('@ruvector/core');
+        // Persistent storage paths
+        const swarmDir = path.join(process.cwd(), '.swarm');
+        if (!fs.existsSync(swarmDir)) {
+            fs.mkdirSync(swarmDir, { recursive: true });
+        }
+        const hnswPath = path.join(swarmDir, 'hnsw.index');
+        const metadataPath = path.join(swarmDir, 'hnsw.metadata.json');
+        const dbPath = options?.dbPath || path.join(swarmDir, 'memory.db');
+        // Create HNSW index with persistent storage
+        const db = new VectorDb({
+            dimensions,
+            distanceMetric: 'Cosine',
+            storagePath: hnswPath // Persistent storage!
+        });
+        // Load metadata (entry info) if exists
+        const entries = new Map();
+        if (fs.existsSync(metadataPath)) {
+            try {
+                const metadataJson = fs.readFileSync(metadataPath, 'utf-8');
+                const metadata = JSON.parse(metadataJson);
+                for (const [key, value] of metadata) {
+                    entries.set(key, value);
+                }
+            }
+            catch {
+                // Ignore metadata load errors
+            }
+        }
+        hnswIndex = {
+            db,
+            entries,
+            dimensions,
+            initialized: false
+        };
+        hnswIndex.initialized = true;
+        hnswInitializing = false;
+        return hnswIndex;
+    }
+    catch {
+        hnswInitializing = false;
+        return null;
+    }
+}
+function saveHNSWMetadata() {
+    if (!hnswIndex?.entries)
+        return;
+    try {
+        const swarmDir = path.join(process.cwd(), '.swarm');
+        const metadataPath = path.join(swarmDir, 'hnsw.metadata.json');
+        const metadata = Array.from(hnswIndex.entries.entries());
+        fs.writeFileSync(metadataPath, JSON.stringify(metadata));
+    }
+    catch {
+        // Silently fail - metadata save is best-effort
+    }
+}
+export async function searchHNSWIndex(queryEmbedding, options) {
+    const index = await getHNSWIndex();
+    if (!index)
+        return null;
+    // stub
+}
+
 // WM-001 old_string: storeEntry with NS-002 patched signature
 export async function storeEntry(options) {
     const { key, value, namespace, generateEmbeddingFlag = true, tags = [], ttl, dbPath: customPath, upsert = false } = options;
@@ -23,6 +23,21 @@ export class HybridBackend extends EventEmitter {
     async store(entry) {}
     async get(id) { return null; }
     async search(embedding, options) { return []; }
+    async querySemantic(query) {
+        let embedding = query.embedding;
+        if (!embedding && query.content && this.config.embeddingGenerator) {
+            embedding = await this.config.embeddingGenerator(query.content);
+        }
+        if (!embedding) {
+            throw new Error('SemanticQuery requires either content or embedding');
+        }
+        const results = await this.agentdb.search(embedding, {
+            k: query.k || 10,
+            threshold: query.threshold,
+            filters: query.filters,
+        });
+        return results.map((r) => r.entry);
+    }
     getSQLiteBackend() {
         return this.sqlite;
     }
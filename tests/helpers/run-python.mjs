@@ -7,11 +7,12 @@ import { fileURLToPath } from 'node:url';
 const __dirname = dirname(fileURLToPath(import.meta.url));
 const ROOT = resolve(__dirname, '..', '..');
 const COMMON_PY = resolve(ROOT, 'lib', 'common.py');
+const LOADER_PY = resolve(ROOT, 'lib', 'patch-loader.py');
 const PATCH_DIR = resolve(ROOT, 'patch');
 
 /**
  * Run a single patch by ID against a fixture base path.
- * Replicates what patch-all.sh does: cat common.py + fix.py | python3
+ * Replicates what patch-all.sh does: lib/patch-loader.py <fix.py>
  */
 export function runPatch(patchId, base, opts = {}) {
   const dirs = readdirSync(PATCH_DIR, { withFileTypes: true });
@@ -21,17 +22,15 @@ export function runPatch(patchId, base, opts = {}) {
   if (!match) throw new Error(`No patch directory for ${patchId}`);
 
   const fixPath = resolve(PATCH_DIR, match.name, 'fix.py');
-  const commonSrc = readFileSync(COMMON_PY, 'utf-8');
-  const fixSrc = readFileSync(fixPath, 'utf-8');
 
-  const result = spawnSync('python3', ['-'], {
-    input: commonSrc + '\n' + fixSrc,
+  const result = spawnSync('python3', [LOADER_PY, fixPath], {
     encoding: 'utf-8',
     timeout: 10_000,
     env: {
       ...process.env,
       BASE: base,
       RUVECTOR_CLI: opts.ruvectorCli || '',
+      ...opts.env,
     },
   });
 